@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from app.api.summary import router as summary_router
 from app.api.user import router as user_router
 from app.api.auth import router as auth_router
+from app.api.system import router as system_router
 
 # 创建主路由，确保在docs中显示
 router = APIRouter(prefix="/api")
@@ -10,5 +11,6 @@ router = APIRouter(prefix="/api")
 router.include_router(summary_router)
 router.include_router(user_router)
 router.include_router(auth_router)
+router.include_router(system_router)
 
 __all__ = ["router"] 
\ No newline at end of file
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from app.database.base import get_db
+from app.database.base import get_async_db
 from app.schemas.user import Token
-from app.crud import authenticate_user
-from app.auth.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.crud.async_user import authenticate_user
+from app.auth.security import create_access_token, user_token_claims, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.auth.user_cache import user_cache
 
 # 创建认证路由，添加详细描述
 router = APIRouter(
@@ -21,9 +22,9 @@ router = APIRouter(
     summary="登录获取令牌",
     description="使用用户名和密码登录，获取JWT访问令牌。"
 )
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     用户登录获取JWT令牌：
@@ -35,7 +36,7 @@ def login_for_access_token(
     - **access_token**: JWT访问令牌
     - **token_type**: 令牌类型 (bearer)
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,10 +44,13 @@ def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # 登录时预热用户缓存，后续携带令牌的请求无需再查询用户
+    user_cache.put(user)
+
     # 创建访问令牌
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=user_token_claims(user), expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"} 
\ No newline at end of file
@@ -1,25 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from pydantic import BaseModel, field_validator, Field
-from app.services.downloader import download_audio, DEFAULT_OUTPUT_DIR
-from app.services.transcriber import transcribe_audio
-from app.services.summarizer import summarize_text
-from app.services.youtube_search import search_channel_videos
-from app.database.base import get_db
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, field_validator, model_validator, Field
+from app.services.channel_cache import channel_search_cache
+from app.services.job_queue import job_queue, JobQueueFullError, MAX_BATCH_VIDEOS
+from app.services.streaming import stream_summary_events, iter_ndjson
+from app.database.base import get_db, get_async_db
 from app.models.user import User
 from app.auth.security import get_current_user
-from app.schemas.summary import SummaryCreate, SummaryResponse, SummaryUpdate
-from app.crud.summary import (
-    create_summary, 
+from app.schemas.summary import SummaryResponse, SummaryListItem
+from app.schemas.job import JobResponse, BatchResponse
+from app.schemas.transcript import TranscriptRangeResponse
+from app.models.job import JOB_COMPLETED, JOB_FAILED
+from app.crud.async_summary import (
     get_summary, 
+    get_summary_detail,
     get_summaries, 
     get_user_summaries,
-    update_summary,
-    delete_summary,
-    extract_video_id
+    delete_summary
+)
+from app.crud.summary import (
+    LIST_FIELDS,
+    LIST_SELECTABLE_FIELDS,
+    DEFAULT_PREVIEW_LENGTH
 )
+from app.crud.async_job import get_job, get_batch, get_batch_jobs
+from app.crud.async_transcript import get_transcript_segments, get_transcript_range
+from app.crud.pagination import next_cursor
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
-import os
+from collections import Counter
 import logging
 import re
 
@@ -27,9 +38,6 @@ import re
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 音频文件清理配置
-KEEP_AUDIO_FILES = os.getenv("KEEP_AUDIO_FILES", "false").lower() == "true"
-
 # 创建路由，使用明确的标签和前缀
 router = APIRouter(
     prefix="/videos",
@@ -40,6 +48,7 @@ router = APIRouter(
 class VideoRequest(BaseModel):
     video_url: str = Field(..., description="YouTube视频URL", example="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
     keep_audio: bool = Field(False, description="是否保留音频文件（覆盖全局配置）")
+    force_refresh: bool = Field(False, description="忽略已有的摘要结果，重新下载、转录并生成摘要")
     
     @field_validator('video_url')
     @classmethod
@@ -52,115 +61,305 @@ class ChannelRequest(BaseModel):
     channel_name: str = Field(..., description="YouTube频道名称", example="Google Developers")
     max_results: int = Field(20, description="最大结果数，默认20个")
 
+class BatchRequest(BaseModel):
+    channel_name: Optional[str] = Field(None, description="YouTube频道名称或链接，与 video_urls 二选一", example="Google Developers")
+    video_urls: Optional[List[str]] = Field(None, description="YouTube视频URL列表，与 channel_name 二选一", max_length=MAX_BATCH_VIDEOS)
+    max_results: int = Field(20, ge=1, le=MAX_BATCH_VIDEOS, description="按频道提交时摘要最新的视频数，默认20个")
+    keep_audio: bool = Field(False, description="是否保留音频文件（覆盖全局配置）")
+    force_refresh: bool = Field(False, description="忽略已有的摘要结果，重新下载、转录并生成摘要")
+    
+    @field_validator('video_urls')
+    @classmethod
+    def validate_youtube_urls(cls, v):
+        if v is None:
+            return v
+        for url in v:
+            VideoRequest.validate_youtube_url(url)
+        return v
+    
+    @model_validator(mode='after')
+    def check_source(self):
+        if bool(self.channel_name) == bool(self.video_urls):
+            raise ValueError('Exactly one of channel_name or video_urls must be provided')
+        return self
+
 @router.post(
     "/summarize",
-    response_model=SummaryResponse,
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="生成视频摘要",
-    description="根据YouTube视频URL生成内容摘要"
+    description="提交YouTube视频摘要任务，返回任务ID，可通过 /videos/jobs/{job_id} 查询进度；已有摘要时直接返回已完成的任务"
 )
-async def summarize_video(
+def summarize_video(
     data: VideoRequest, 
+    response: Response,
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user)
 ):
     """
-    生成YouTube视频摘要：
+    提交YouTube视频摘要任务：
     
     - **video_url**: YouTube视频URL
     - **keep_audio**: 是否保留下载的音频文件
+    - **force_refresh**: 是否忽略已有的摘要结果
     
-    返回视频摘要信息，包括转录文本和摘要内容。
+    下载、转录和摘要在后台任务队列中执行，接口立即返回任务信息（202）。
+    该视频已有摘要时返回已完成的任务（200）。
     """
     try:
-        logger.info(f"Processing video URL: {data.video_url}")
-        
-        # 下载音频
-        logger.info(f"Downloading audio to {DEFAULT_OUTPUT_DIR}...")
-        audio_path = download_audio(data.video_url)
-        logger.info(f"Audio downloaded to: {audio_path}")
-        
-        # 转录音频
-        logger.info("Transcribing audio...")
-        transcript = transcribe_audio(audio_path)
-        logger.info(f"Transcription completed, length: {len(transcript)} characters")
-        
-        # 生成摘要
-        logger.info("Generating summary...")
-        summary_text = summarize_text(transcript)
-        logger.info("Summary generated successfully")
-        
-        # 判断是否需要清理音频文件
-        should_keep_audio = data.keep_audio or KEEP_AUDIO_FILES
-        audio_file_path = None
-        
-        if should_keep_audio:
-            audio_file_path = audio_path
-            logger.info(f"Keeping audio file: {audio_path}")
-        else:
-            # 清理音频文件
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-                logger.info(f"Removed audio file: {audio_path}")
-        
-        # 获取视频ID，用于存储在数据库中
-        video_id = extract_video_id(data.video_url)
-        
-        # 创建数据库记录
-        summary_data = SummaryCreate(
-            video_url=data.video_url,
-            keep_audio=should_keep_audio,
-            # 可以添加更多元数据，如标题和频道名
-        )
-        
-        # 创建摘要记录
+        logger.info(f"Queueing video URL: {data.video_url}")
         user_id = current_user.id if current_user else None
-        db_summary = create_summary(db, summary_data, user_id)
-        
-        # 更新摘要内容和转录
-        update_data = SummaryUpdate(
-            transcript=transcript,
-            summary=summary_text
+        job = job_queue.submit(
+            db,
+            data.video_url,
+            user_id=user_id,
+            keep_audio=data.keep_audio,
+            force_refresh=data.force_refresh
         )
-        db_summary = update_summary(db, db_summary.id, update_data)
-        
-        return db_summary
-    except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e))
+        if job.status == JOB_COMPLETED:
+            response.status_code = status.HTTP_200_OK
+        return job
+    except JobQueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
-        logger.error(f"Error processing video: {str(e)}", exc_info=True)
+        logger.error(f"Error queueing video: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _batch_response(batch, jobs) -> BatchResponse:
+    """汇总批次中各任务的状态和进度"""
+    counts = Counter(job.status for job in jobs)
+    return BatchResponse(
+        id=batch.id,
+        channel_name=batch.channel_name,
+        user_id=batch.user_id,
+        total=batch.total,
+        created_at=batch.created_at,
+        status_counts=dict(counts),
+        completed=counts[JOB_COMPLETED],
+        failed=counts[JOB_FAILED],
+        progress=round(sum(job.progress or 0 for job in jobs) / len(jobs)) if jobs else 0,
+        finished=counts[JOB_COMPLETED] + counts[JOB_FAILED] == len(jobs),
+        jobs=[JobResponse.model_validate(job) for job in jobs]
+    )
+
+def _submit_batch(db: Session, video_urls: List[str], data: BatchRequest, user_id: Optional[int]) -> BatchResponse:
+    batch, jobs = job_queue.submit_batch(
+        db,
+        video_urls,
+        user_id=user_id,
+        keep_audio=data.keep_audio,
+        force_refresh=data.force_refresh,
+        channel_name=data.channel_name
+    )
+    return _batch_response(batch, jobs)
+
+@router.post(
+    "/summarize_batch",
+    response_model=BatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="批量生成视频摘要",
+    description="提交一个频道最新的视频或一组视频URL的摘要任务，返回批次ID，可通过 /videos/batches/{batch_id} 查询整体进度"
+)
+async def summarize_batch(
+    data: BatchRequest,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """
+    批量提交YouTube视频摘要任务：
+    
+    - **channel_name**: YouTube频道名称，摘要该频道最新的 max_results 个视频
+    - **video_urls**: YouTube视频URL列表（与 channel_name 二选一）
+    - **keep_audio**: 是否保留下载的音频文件
+    - **force_refresh**: 是否忽略已有的摘要结果
+    
+    各视频的下载、转录和摘要在后台任务队列中重叠执行，每个视频完成后立即保存摘要。
+    """
+    user_id = current_user.id if current_user else None
+    try:
+        if data.channel_name:
+            logger.info(f"Queueing batch for channel: {data.channel_name}")
+            videos, _ = await channel_search_cache.search(data.channel_name, data.max_results)
+            video_urls = [video["url"] for video in videos if video.get("id")]
+            if not video_urls:
+                raise HTTPException(status_code=404, detail="No videos found for channel")
+        else:
+            logger.info(f"Queueing batch of {len(data.video_urls)} videos")
+            video_urls = data.video_urls
+        # 提交过程包含多次数据库写入，在线程池中执行，不阻塞事件循环
+        return await run_in_threadpool(_submit_batch, db, video_urls, data, user_id)
+    except HTTPException:
+        raise
+    except JobQueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error queueing batch: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/summarize/stream",
+    summary="流式生成视频摘要",
+    description="以NDJSON流的形式实时返回处理阶段、转录分段和摘要内容",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}}
+)
+def summarize_video_stream(
+    data: VideoRequest,
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """
+    流式生成YouTube视频摘要：
+    
+    - **video_url**: YouTube视频URL
+    - **keep_audio**: 是否保留下载的音频文件
+    - **force_refresh**: 是否忽略已有的摘要结果
+    
+    每行一个JSON事件：`stage`、`segment`、`summary_delta`、`heartbeat`，
+    最后以 `done`（包含摘要ID）或 `error` 结束。
+    """
+    logger.info(f"Streaming summary for video URL: {data.video_url}")
+    user_id = current_user.id if current_user else None
+    events = stream_summary_events(
+        data.video_url,
+        user_id=user_id,
+        keep_audio=data.keep_audio,
+        force_refresh=data.force_refresh
+    )
+    return StreamingResponse(
+        iter_ndjson(events),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    summary="查询摘要任务",
+    description="查询视频摘要任务的状态和进度，完成后返回摘要ID"
+)
+async def read_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """查询视频摘要任务进度"""
+    db_job = await get_job(db, job_id=job_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # 检查权限
+    if db_job.user_id and db_job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this job"
+        )
+    return db_job
+
+@router.get(
+    "/batches/{batch_id}",
+    response_model=BatchResponse,
+    summary="查询批量摘要进度",
+    description="查询批次中各任务的状态、完成数和整体进度"
+)
+async def read_batch(
+    batch_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """查询批量摘要任务进度"""
+    db_batch = await get_batch(db, batch_id)
+    if db_batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    # 检查权限
+    if db_batch.user_id and db_batch.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this batch"
+        )
+    return _batch_response(db_batch, await get_batch_jobs(db, batch_id))
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    """解析逗号分隔的字段列表，未指定时使用默认列表字段"""
+    if not fields:
+        return list(LIST_FIELDS)
+    selected = ["id"]
+    for field in fields.split(","):
+        field = field.strip()
+        if not field or field in selected:
+            continue
+        if field not in LIST_SELECTABLE_FIELDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown field: {field}. Allowed fields: {', '.join(LIST_SELECTABLE_FIELDS)}"
+            )
+        selected.append(field)
+    return selected
+
+def _to_list_items(summaries, fields: List[str]) -> List[Dict[str, Any]]:
+    """只读取已加载的列，避免触发延迟列的额外查询"""
+    return [{field: getattr(summary, field) for field in fields} for summary in summaries]
+
+def _set_next_cursor(response: Response, summaries, limit: int) -> None:
+    """本页已满时通过响应头返回下一页游标"""
+    token = next_cursor(summaries, limit)
+    if token:
+        response.headers["X-Next-Cursor"] = token
+
 @router.get(
     "/",
-    response_model=List[SummaryResponse],
+    response_model=List[SummaryListItem],
+    response_model_exclude_unset=True,
     summary="获取所有摘要",
-    description="获取所有视频摘要列表"
+    description="获取所有视频摘要列表（不包含完整转录，摘要只返回预览）；下一页游标通过 X-Next-Cursor 响应头返回"
 )
-def read_summaries(
+async def read_summaries(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，如 id,video_title,summary_preview"),
+    preview_length: int = Query(DEFAULT_PREVIEW_LENGTH, ge=0, le=5000, description="摘要预览的字符数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 X-Next-Cursor，指定后忽略 skip"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取所有视频摘要列表"""
-    summaries = get_summaries(db, skip=skip, limit=limit)
-    return summaries
+    selected = _parse_fields(fields)
+    try:
+        summaries = await get_summaries(db, skip=skip, limit=limit, fields=selected, preview_length=preview_length, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _set_next_cursor(response, summaries, limit)
+    return _to_list_items(summaries, selected)
 
 @router.get(
     "/my",
-    response_model=List[SummaryResponse],
+    response_model=List[SummaryListItem],
+    response_model_exclude_unset=True,
     summary="获取我的摘要",
-    description="获取当前用户的视频摘要列表"
+    description="获取当前用户的视频摘要列表（不包含完整转录，摘要只返回预览）；下一页游标通过 X-Next-Cursor 响应头返回"
 )
-def read_my_summaries(
+async def read_my_summaries(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，如 id,video_title,summary_preview"),
+    preview_length: int = Query(DEFAULT_PREVIEW_LENGTH, ge=0, le=5000, description="摘要预览的字符数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 X-Next-Cursor，指定后忽略 skip"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """获取当前用户的视频摘要列表"""
-    summaries = get_user_summaries(db, current_user.id, skip=skip, limit=limit)
-    return summaries
+    selected = _parse_fields(fields)
+    try:
+        summaries = await get_user_summaries(
+            db, current_user.id, skip=skip, limit=limit, fields=selected, preview_length=preview_length, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _set_next_cursor(response, summaries, limit)
+    return _to_list_items(summaries, selected)
 
 @router.get(
     "/{summary_id}",
@@ -168,29 +367,59 @@ def read_my_summaries(
     summary="获取特定摘要",
     description="获取特定视频摘要的详细信息"
 )
-def read_summary(
+async def read_summary(
     summary_id: int, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取特定视频摘要"""
-    db_summary = get_summary(db, summary_id=summary_id)
+    db_summary = await get_summary_detail(db, summary_id=summary_id)
     if db_summary is None:
         raise HTTPException(status_code=404, detail="Summary not found")
     return db_summary
 
+@router.get(
+    "/{summary_id}/transcript",
+    response_model=TranscriptRangeResponse,
+    summary="按时间范围获取转录",
+    description="获取与指定时间范围重叠的转录分段及其时间戳，不加载完整转录"
+)
+async def read_transcript_range(
+    summary_id: int,
+    start: float = Query(0.0, ge=0, description="开始时间（秒）"),
+    end: Optional[float] = Query(None, gt=0, description="结束时间（秒），默认到结尾"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """按时间范围获取带时间戳的转录分段"""
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+    
+    db_segments = await get_transcript_segments(db, summary_id=summary_id)
+    if db_segments is None:
+        raise HTTPException(status_code=404, detail="Transcript segments not found")
+    
+    segments = await get_transcript_range(db, summary_id, start=start, end=end)
+    return {
+        "summary_id": summary_id,
+        "start": start,
+        "end": end,
+        "duration": db_segments.duration_ms / 1000,
+        "segment_count": db_segments.segment_count,
+        "segments": segments
+    }
+
 @router.delete(
     "/{summary_id}",
     status_code=status.HTTP_204_NO_CONTENT,
     summary="删除摘要",
     description="删除特定视频摘要"
 )
-def delete_summary_endpoint(
+async def delete_summary_endpoint(
     summary_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """删除视频摘要"""
-    db_summary = get_summary(db, summary_id=summary_id)
+    db_summary = await get_summary(db, summary_id=summary_id)
     if db_summary is None:
         raise HTTPException(status_code=404, detail="Summary not found")
     
@@ -201,7 +430,7 @@ def delete_summary_endpoint(
             detail="Not authorized to delete this summary"
         )
     
-    success = delete_summary(db, summary_id=summary_id)
+    success = await delete_summary(db, summary_id=summary_id)
     if not success:
         raise HTTPException(status_code=404, detail="Summary not found")
     return None
@@ -209,9 +438,9 @@ def delete_summary_endpoint(
 @router.post(
     "/search_channel",
     summary="搜索频道视频",
-    description="搜索YouTube频道的视频列表并按上传时间排序"
+    description="搜索YouTube频道的视频列表并按上传时间排序。结果会被缓存，X-Cache 响应头表示结果来源（HIT/STALE/MISS）。"
 )
-async def search_channel(data: ChannelRequest) -> Dict[str, Any]:
+async def search_channel(data: ChannelRequest, response: Response) -> Dict[str, Any]:
     """
     搜索YouTube博主/频道的视频列表并按上传时间排序
     
@@ -221,8 +450,9 @@ async def search_channel(data: ChannelRequest) -> Dict[str, Any]:
     try:
         logger.info(f"Searching videos for channel: {data.channel_name}")
         
-        # 调用服务获取视频列表
-        videos = search_channel_videos(data.channel_name, data.max_results)
+        # 优先使用缓存，未命中时在线程池中执行 yt-dlp 提取，不阻塞事件循环
+        videos, cache_status = await channel_search_cache.search(data.channel_name, data.max_results)
+        response.headers["X-Cache"] = cache_status
         
         # 返回结果
         return {
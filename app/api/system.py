@@ -0,0 +1,70 @@
+from fastapi import APIRouter
+from typing import Dict, Any
+
+from app.services.model_registry import model_registry
+from app.services.summary_cache import summary_cache
+from app.auth.user_cache import user_cache
+from app.services.channel_cache import channel_search_cache
+from app.services.audio_cache import audio_cache
+from app.services.download_coordinator import download_coordinator
+
+# 创建系统状态路由
+router = APIRouter(
+    prefix="/system",
+    tags=["system"],
+)
+
+@router.get(
+    "/whisper_models",
+    summary="Whisper模型注册表状态",
+    description="返回已加载的Whisper模型以及加载、淘汰计数，用于确认模型保持预热"
+)
+def read_whisper_models() -> Dict[str, Any]:
+    """获取Whisper模型注册表的统计信息"""
+    return model_registry.stats()
+
+@router.get(
+    "/summary_cache",
+    summary="摘要缓存状态",
+    description="返回按video_id复用摘要结果的命中、未命中和合并计数"
+)
+def read_summary_cache() -> Dict[str, Any]:
+    """获取摘要缓存的统计信息"""
+    return summary_cache.stats()
+
+
+@router.get(
+    "/auth_cache",
+    summary="认证用户缓存状态",
+    description="返回get_current_user用户缓存的命中、未命中和失效计数"
+)
+def read_auth_cache() -> Dict[str, Any]:
+    """获取认证用户缓存的统计信息"""
+    return user_cache.stats()
+
+@router.get(
+    "/channel_cache",
+    summary="频道搜索缓存状态",
+    description="返回频道搜索缓存的命中、过期命中、未命中和后台刷新计数"
+)
+def read_channel_cache() -> Dict[str, Any]:
+    """获取频道搜索缓存的统计信息"""
+    return channel_search_cache.stats()
+
+@router.get(
+    "/audio_cache",
+    summary="音频缓存状态",
+    description="返回音频缓存的文件数、占用空间以及命中、未命中和淘汰计数"
+)
+def read_audio_cache() -> Dict[str, Any]:
+    """获取音频缓存的统计信息"""
+    return audio_cache.stats()
+
+@router.get(
+    "/downloads",
+    summary="音频下载协调状态",
+    description="返回实际下载次数、合并到进行中下载的请求数以及仍在使用中的音频文件数"
+)
+def read_downloads() -> Dict[str, Any]:
+    """获取下载协调器的统计信息"""
+    return download_coordinator.stats()
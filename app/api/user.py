@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.database.base import get_db
+from app.database.base import get_async_db
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
 from app.models.user import User
-from app.crud import (
+from app.crud.async_user import (
     create_user, 
     get_user, 
     get_users, 
@@ -14,6 +14,7 @@ from app.crud import (
     get_user_by_email,
     get_user_by_username
 )
+from app.crud.pagination import next_cursor
 from app.auth.security import get_current_user
 
 # 创建用户路由，添加详细描述
@@ -30,9 +31,9 @@ router = APIRouter(
     summary="注册新用户",
     description="创建新用户账户，需要提供有效的邮箱、用户名和密码。"
 )
-def register_user(
+async def register_user(
     user: UserCreate = Body(..., description="用户注册信息"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     注册新用户：
@@ -42,7 +43,7 @@ def register_user(
     - **password**: 至少8个字符，包含大小写字母和至少一个数字
     """
     # 检查邮箱是否已存在
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -50,25 +51,27 @@ def register_user(
         )
     
     # 检查用户名是否已存在
-    db_user = get_user_by_username(db, username=user.username)
+    db_user = await get_user_by_username(db, username=user.username)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
     
-    return create_user(db=db, user=user)
+    return await create_user(db=db, user=user)
 
 @router.get(
     "/", 
     response_model=List[UserResponse],
     summary="获取所有用户",
-    description="获取所有用户列表，需要管理员权限。"
+    description="获取所有用户列表，需要管理员权限。下一页游标通过 X-Next-Cursor 响应头返回。"
 )
-def read_users(
+async def read_users(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="上一页返回的 X-Next-Cursor，指定后忽略 skip"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -76,10 +79,17 @@ def read_users(
     
     - **skip**: 跳过的记录数
     - **limit**: 返回的最大记录数
+    - **cursor**: 分页游标
     - 需要认证：是
     """
     # 这里可以添加管理员权限检查，目前为简化演示而略过
-    users = get_users(db, skip=skip, limit=limit)
+    try:
+        users = await get_users(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    token = next_cursor(users, limit)
+    if token:
+        response.headers["X-Next-Cursor"] = token
     return users
 
 @router.get(
@@ -88,7 +98,7 @@ def read_users(
     summary="获取当前用户信息",
     description="获取当前登录用户的详细信息。"
 )
-def read_user_me(current_user: User = Depends(get_current_user)):
+async def read_user_me(current_user: User = Depends(get_current_user)):
     """
     获取当前登录用户信息：
     
@@ -102,9 +112,9 @@ def read_user_me(current_user: User = Depends(get_current_user)):
     summary="获取指定用户",
     description="根据用户ID获取用户信息。"
 )
-def read_user(
+async def read_user(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -113,7 +123,7 @@ def read_user(
     - **user_id**: 用户ID
     - 需要认证：是
     """
-    db_user = get_user(db, user_id=user_id)
+    db_user = await get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
@@ -124,10 +134,10 @@ def read_user(
     summary="更新用户信息",
     description="更新指定用户的信息，只有用户本人或管理员可以执行此操作。"
 )
-def update_user_endpoint(
+async def update_user_endpoint(
     user_id: int, 
     user_update: UserUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -147,7 +157,7 @@ def update_user_endpoint(
             detail="Not authorized to update this user"
         )
     
-    db_user = update_user(db, user_id=user_id, user_update=user_update)
+    db_user = await update_user(db, user_id=user_id, user_update=user_update)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
@@ -158,9 +168,9 @@ def update_user_endpoint(
     summary="删除用户",
     description="删除指定用户，只有用户本人或管理员可以执行此操作。"
 )
-def delete_user_endpoint(
+async def delete_user_endpoint(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -178,7 +188,7 @@ def delete_user_endpoint(
             detail="Not authorized to delete this user"
         )
     
-    success = delete_user(db, user_id=user_id)
+    success = await delete_user(db, user_id=user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
     return None 
\ No newline at end of file
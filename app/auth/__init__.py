@@ -1,15 +1,26 @@
 from app.auth.security import (
     get_password_hash, 
     verify_password,
+    verify_and_update_password,
+    hash_password_async,
+    verify_and_update_password_async,
     create_access_token,
+    user_token_claims,
     get_current_user,
     oauth2_scheme
 )
+from app.auth.user_cache import UserPrincipal, user_cache
 
 __all__ = [
     "get_password_hash", 
     "verify_password", 
+    "verify_and_update_password",
+    "hash_password_async",
+    "verify_and_update_password_async",
     "create_access_token", 
+    "user_token_claims",
     "get_current_user",
-    "oauth2_scheme"
+    "oauth2_scheme",
+    "UserPrincipal",
+    "user_cache"
 ] 
\ No newline at end of file
@@ -1,14 +1,19 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database.base import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.base import get_async_db
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.auth.user_cache import UserPrincipal, user_cache
 import os
+import asyncio
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,8 +23,17 @@ SECRET_KEY = os.getenv("SECRET_KEY", "a_very_secret_key_that_should_be_changed_i
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt 成本因子，每加 1 计算时间翻倍；修改后旧哈希在用户下次登录时透明地重新哈希
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 密码哈希和校验专用线程池的大小；bcrypt 计算时释放 GIL，多个线程可以同时占用多个核心
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // 2)))))
+
+# 密码加密上下文；成本因子与 BCRYPT_ROUNDS 不同的哈希会被判定为需要更新
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# 有界线程池：登录高峰时密码计算在此排队，既不阻塞事件循环，也不会占满所有核心
+_password_pool: Optional[ThreadPoolExecutor] = None
+_password_pool_lock = threading.Lock()
 
 # OAuth2 密码承载流程
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
@@ -32,6 +46,41 @@ def get_password_hash(password):
     """生成密码哈希"""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """
+    验证密码，并在哈希的成本因子与当前配置不一致时生成新哈希
+
+    Returns:
+        (密码是否正确, 新哈希)；不需要更新时新哈希为 None
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def get_password_pool() -> ThreadPoolExecutor:
+    """获取密码线程池，首次使用时创建"""
+    global _password_pool
+    with _password_pool_lock:
+        if _password_pool is None:
+            _password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+        return _password_pool
+
+def shutdown_password_pool() -> None:
+    """关闭密码线程池"""
+    global _password_pool
+    with _password_pool_lock:
+        if _password_pool is not None:
+            _password_pool.shutdown(wait=False, cancel_futures=True)
+        _password_pool = None
+
+async def hash_password_async(password) -> str:
+    """在密码线程池中生成密码哈希"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_pool(), get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """在密码线程池中验证密码，返回值同 verify_and_update_password"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_pool(), verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """创建访问令牌"""
     to_encode = data.copy()
@@ -43,8 +92,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """获取当前用户"""
+def user_token_claims(user) -> dict:
+    """
+    生成用户令牌的声明：用户名、用户ID和令牌版本
+
+    令牌版本在修改密码时递增，版本不一致的令牌会被拒绝。
+    """
+    return {"sub": user.username, "uid": user.id, "ver": user.token_version}
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> UserPrincipal:
+    """
+    获取当前用户
+
+    返回缓存的用户快照（UserPrincipal）而不是 ORM 对象，
+    同一用户的后续请求在缓存有效期内不再查询数据库。
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -58,8 +120,18 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
+
+    # 先查进程内缓存，未命中时才查询数据库
+    principal = user_cache.get(token_data.username)
+    if principal is None:
+        user = await db.scalar(select(User).where(User.username == token_data.username))
+        if user is None:
+            raise credentials_exception
+        principal = user_cache.put(user)
+
+    # 旧令牌不带 uid/ver 声明，只按用户名校验
+    uid = payload.get("uid")
+    ver = payload.get("ver")
+    if (uid is not None and uid != principal.id) or (ver is not None and ver != principal.token_version):
         raise credentials_exception
-    return user 
\ No newline at end of file
+    return principal
@@ -0,0 +1,90 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.schemas.user import UserResponse
+
+logger = logging.getLogger(__name__)
+
+# 用户缓存的过期时间（秒）和最大条目数；多进程部署时其他进程最多在 TTL 内看到旧数据
+USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+
+
+class UserPrincipal(UserResponse):
+    """已认证用户的只读快照，不绑定数据库会话"""
+    token_version: int = 0
+
+
+class UserCache:
+    """
+    按用户名缓存已认证用户，避免每个请求都查询用户表
+
+    条目在 TTL 后过期，超过容量时淘汰最久未使用的条目；
+    用户更新或删除时由 CRUD 层主动失效。
+    """
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_size: int = USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # 用户名 -> (过期时间, 用户快照)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, username: str) -> Optional[UserPrincipal]:
+        """返回未过期的缓存用户，未命中时返回 None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(username)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[username]
+            self.misses += 1
+            return None
+
+    def put(self, user: Any) -> UserPrincipal:
+        """缓存用户（ORM 对象或 UserPrincipal），返回缓存中的快照"""
+        principal = user if isinstance(user, UserPrincipal) else UserPrincipal.model_validate(user)
+        with self._lock:
+            self._entries[principal.username] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, username: str) -> None:
+        """使用户的缓存失效"""
+        with self._lock:
+            if self._entries.pop(username, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中、未命中和失效计数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# 进程级共享的用户缓存
+user_cache = UserCache()
@@ -12,10 +12,36 @@ from app.crud.user import (
 from app.crud.summary import (
     create_summary,
     get_summary,
+    get_summary_detail,
     get_summaries,
     get_user_summaries,
     update_summary,
-    delete_summary
+    delete_summary,
+    save_summary,
+    bulk_save_summaries
+)
+
+from app.crud.job import (
+    create_job,
+    get_job,
+    get_active_job,
+    get_unfinished_jobs,
+    update_job,
+    create_batch,
+    get_batch,
+    get_batch_jobs
+)
+
+from app.crud.transcript import (
+    save_transcript_segments,
+    get_transcript_segments,
+    get_transcript_range
+)
+
+from app.crud.channel import (
+    get_channel_by_key,
+    get_latest_channel_videos,
+    save_channel_videos
 )
 
 __all__ = [
@@ -29,8 +55,25 @@ __all__ = [
     "authenticate_user",
     "create_summary",
     "get_summary",
+    "get_summary_detail",
     "get_summaries",
     "get_user_summaries",
     "update_summary",
-    "delete_summary"
+    "delete_summary",
+    "save_summary",
+    "bulk_save_summaries",
+    "create_job",
+    "get_job",
+    "get_active_job",
+    "get_unfinished_jobs",
+    "update_job",
+    "create_batch",
+    "get_batch",
+    "get_batch_jobs",
+    "save_transcript_segments",
+    "get_transcript_segments",
+    "get_transcript_range",
+    "get_channel_by_key",
+    "get_latest_channel_videos",
+    "save_channel_videos"
 ] 
\ No newline at end of file
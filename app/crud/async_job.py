@@ -0,0 +1,20 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.job import SummaryJob, SummaryBatch
+from typing import List, Optional
+
+# 异步版本的任务查询，供 FastAPI 异步路由使用；任务的创建和状态更新由后台队列通过同步会话完成
+
+async def get_job(db: AsyncSession, job_id: str) -> Optional[SummaryJob]:
+    """根据ID获取任务"""
+    return await db.get(SummaryJob, job_id)
+
+
+async def get_batch(db: AsyncSession, batch_id: str) -> Optional[SummaryBatch]:
+    """根据ID获取批次"""
+    return await db.get(SummaryBatch, batch_id)
+
+async def get_batch_jobs(db: AsyncSession, batch_id: str) -> List[SummaryJob]:
+    """获取批次中的全部任务，按创建时间排序"""
+    stmt = select(SummaryJob).where(SummaryJob.batch_id == batch_id).order_by(SummaryJob.created_at.asc())
+    return list(await db.scalars(stmt))
@@ -0,0 +1,76 @@
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.summary import VideoSummary
+from app.models.job import SummaryJob
+from app.crud.summary import (
+    summary_list_statement,
+    source_transcript_statement,
+    transcript_heir_statement,
+    hand_over_transcript_statements,
+    DEFAULT_PREVIEW_LENGTH
+)
+from typing import List, Optional, Sequence
+
+# 异步版本的摘要查询，供 FastAPI 异步路由使用；流水线结果的写入由后台队列通过同步会话完成
+
+async def get_summary(db: AsyncSession, summary_id: int) -> Optional[VideoSummary]:
+    """根据ID获取视频摘要"""
+    return await db.get(VideoSummary, summary_id)
+
+async def get_summary_detail(db: AsyncSession, summary_id: int) -> Optional[VideoSummary]:
+    """获取视频摘要的完整记录，语义同 app.crud.summary.get_summary_detail"""
+    db_summary = await get_summary(db, summary_id)
+    if db_summary is not None and db_summary.source_summary_id is not None:
+        set_committed_value(db_summary, "transcript", await db.scalar(source_transcript_statement(db_summary)))
+    return db_summary
+
+async def get_summaries(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None,
+    preview_length: int = DEFAULT_PREVIEW_LENGTH,
+    cursor: Optional[str] = None
+) -> List[VideoSummary]:
+    """
+    获取所有视频摘要（列表字段），语义同 app.crud.summary.get_summaries
+
+    Raises:
+        ValueError: 游标无效
+    """
+    return list(await db.scalars(summary_list_statement(skip, limit, fields, preview_length, cursor)))
+
+async def get_user_summaries(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None,
+    preview_length: int = DEFAULT_PREVIEW_LENGTH,
+    cursor: Optional[str] = None
+) -> List[VideoSummary]:
+    """
+    获取指定用户的所有视频摘要（列表字段），语义同 app.crud.summary.get_user_summaries
+
+    Raises:
+        ValueError: 游标无效
+    """
+    return list(await db.scalars(summary_list_statement(skip, limit, fields, preview_length, cursor, user_id=user_id)))
+
+async def delete_summary(db: AsyncSession, summary_id: int) -> bool:
+    """删除视频摘要"""
+    db_summary = await get_summary(db, summary_id)
+    if not db_summary:
+        return False
+    
+    # 引用该摘要的任务保留记录、清空 summary_id；SQLite 未启用外键约束时 ON DELETE SET NULL 不生效
+    await db.execute(update(SummaryJob).where(SummaryJob.summary_id == summary_id).values(summary_id=None))
+    heir_id = await db.scalar(transcript_heir_statement(summary_id))
+    if heir_id is not None:
+        for stmt in hand_over_transcript_statements(summary_id, heir_id):
+            await db.execute(stmt)
+        db.expire(db_summary)
+    await db.delete(db_summary)
+    await db.commit()
+    return True
@@ -0,0 +1,28 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.transcript import TranscriptSegments
+from app.crud.transcript import transcript_owner_id, transcript_range_bounds, transcript_substring_statement, build_range_segments
+from typing import Any, Dict, List, Optional
+
+# 异步版本的分段时间轴查询，供 FastAPI 异步路由使用
+
+async def get_transcript_segments(db: AsyncSession, summary_id: int) -> Optional[TranscriptSegments]:
+    """获取摘要的分段时间轴（引用源记录时返回源记录的时间轴）"""
+    return await db.scalar(select(TranscriptSegments).where(TranscriptSegments.summary_id == transcript_owner_id(summary_id)))
+
+async def get_transcript_range(
+    db: AsyncSession,
+    summary_id: int,
+    start: float = 0.0,
+    end: Optional[float] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """获取与时间范围 [start, end) 重叠的分段，语义同 app.crud.transcript.get_transcript_range"""
+    db_segments = await get_transcript_segments(db, summary_id)
+    if db_segments is None:
+        return None
+
+    indices, char_start, char_end = transcript_range_bounds(db_segments, start, end)
+    if not indices:
+        return []
+    text = await db.scalar(transcript_substring_statement(summary_id, char_start, char_end)) or ""
+    return build_range_segments(db_segments, indices, char_start, text)
@@ -0,0 +1,93 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate
+from app.auth.security import hash_password_async, verify_and_update_password_async
+from app.auth.user_cache import user_cache
+from app.crud.user import user_list_statement
+from typing import List, Optional
+
+# 异步版本的用户 CRUD，供 FastAPI 异步路由使用；
+# 密码哈希和校验是 CPU 密集操作，在专用的有界线程池中执行，避免阻塞事件循环
+
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """根据ID获取用户"""
+    return await db.get(User, user_id)
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """根据邮箱获取用户"""
+    return await db.scalar(select(User).where(User.email == email))
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    """根据用户名获取用户"""
+    return await db.scalar(select(User).where(User.username == username))
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[User]:
+    """
+    获取用户列表，分页方式同 app.crud.user.get_users
+
+    Raises:
+        ValueError: 游标无效
+    """
+    return list(await db.scalars(user_list_statement(skip, limit, cursor)))
+
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
+    """创建新用户"""
+    hashed_password = await hash_password_async(user.password)
+    db_user = User(
+        email=user.email,
+        username=user.username,
+        hashed_password=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate) -> Optional[User]:
+    """更新用户信息"""
+    db_user = await get_user(db, user_id)
+    if not db_user:
+        return None
+    
+    update_data = user_update.dict(exclude_unset=True)
+    
+    # 如果有密码更新，需要哈希处理
+    if "password" in update_data:
+        update_data["hashed_password"] = await hash_password_async(update_data.pop("password"))
+        # 修改密码后使已签发的令牌失效
+        db_user.token_version = (db_user.token_version or 0) + 1
+    
+    for key, value in update_data.items():
+        setattr(db_user, key, value)
+    
+    await db.commit()
+    user_cache.invalidate(db_user.username)
+    await db.refresh(db_user)
+    return db_user
+
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
+    """删除用户"""
+    db_user = await get_user(db, user_id)
+    if not db_user:
+        return False
+    
+    username = db_user.username
+    await db.delete(db_user)
+    await db.commit()
+    user_cache.invalidate(username)
+    return True
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    """验证用户登录；哈希的成本因子与 BCRYPT_ROUNDS 不一致时顺便重新哈希"""
+    user = await get_user_by_username(db, username)
+    if not user:
+        return False
+    valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not valid:
+        return False
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        await db.refresh(user)
+    return user
@@ -0,0 +1,84 @@
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.models.channel import Channel, ChannelVideo
+from typing import Any, Dict, List, Optional, Set
+
+def get_channel_by_key(db: Session, channel_key: str) -> Optional[Channel]:
+    """根据规范化的频道标识获取频道"""
+    return db.scalar(select(Channel).where(Channel.channel_key == channel_key))
+
+def get_channel_video_ids(db: Session, channel_id: int) -> Set[str]:
+    """获取频道已索引的全部视频ID"""
+    return set(db.scalars(select(ChannelVideo.video_id).where(ChannelVideo.channel_id == channel_id)))
+
+def get_latest_channel_videos(db: Session, channel_id: int, limit: int = 20) -> List[ChannelVideo]:
+    """按上传顺序获取频道最新的 limit 个视频（走 (channel_id, seq) 索引）"""
+    stmt = (
+        select(ChannelVideo)
+        .where(ChannelVideo.channel_id == channel_id)
+        .order_by(ChannelVideo.seq.desc())
+        .limit(limit)
+    )
+    return list(db.scalars(stmt))
+
+def save_channel_videos(
+    db: Session,
+    channel_key: str,
+    channel_url: str,
+    videos: List[Dict[str, Any]],
+    replace: bool = False,
+    fully_indexed: Optional[bool] = None
+) -> Channel:
+    """
+    写入频道视频索引
+
+    Args:
+        db: 数据库会话
+        channel_key: 规范化的频道标识
+        channel_url: 频道链接
+        videos: 视频信息列表，按上传列表顺序（最新在前）；格式同 search_channel_videos 的返回值
+        replace: 为 True 时先删除该频道已有的视频，重新建立索引；
+            否则 videos 是比已有视频更新的视频，追加在最前面
+        fully_indexed: 是否已抓取到频道最早的视频，为 None 时保持不变
+
+    Returns:
+        Channel: 频道记录
+    """
+    channel = get_channel_by_key(db, channel_key)
+    if channel is None:
+        channel = Channel(channel_key=channel_key, channel_url=channel_url)
+        db.add(channel)
+        db.flush()
+
+    if replace:
+        db.execute(delete(ChannelVideo).where(ChannelVideo.channel_id == channel.id))
+        base = 0
+    else:
+        base = db.scalar(select(func.max(ChannelVideo.seq)).where(ChannelVideo.channel_id == channel.id)) or 0
+
+    seen = set()
+    rows = []
+    for video in videos:
+        if video["id"] in seen:
+            continue
+        seen.add(video["id"])
+        rows.append(video)
+    for i, video in enumerate(rows):
+        db.add(ChannelVideo(
+            channel_id=channel.id,
+            video_id=video["id"],
+            seq=base + len(rows) - i,
+            title=video.get("title"),
+            upload_date=video.get("upload_date"),
+            duration=video.get("duration"),
+            view_count=video.get("view_count"),
+            description=video.get("description")
+        ))
+
+    channel.channel_url = channel_url
+    channel.refreshed_at = func.now()
+    if fully_indexed is not None:
+        channel.fully_indexed = fully_indexed
+    db.commit()
+    return channel
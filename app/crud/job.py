@@ -0,0 +1,99 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.models.job import SummaryJob, SummaryBatch, ACTIVE_JOB_STATUSES, JOB_PENDING, JOB_COMPLETED, JOB_FAILED
+from app.crud.summary import extract_video_id
+from typing import List, Optional
+import uuid
+
+def create_batch(
+    db: Session,
+    total: int,
+    user_id: Optional[int] = None,
+    channel_name: Optional[str] = None
+) -> SummaryBatch:
+    """创建批量摘要批次"""
+    db_batch = SummaryBatch(
+        id=uuid.uuid4().hex,
+        channel_name=channel_name,
+        total=total,
+        user_id=user_id
+    )
+    db.add(db_batch)
+    db.commit()
+    db.refresh(db_batch)
+    return db_batch
+
+def get_batch(db: Session, batch_id: str) -> Optional[SummaryBatch]:
+    """根据ID获取批次"""
+    return db.get(SummaryBatch, batch_id)
+
+def get_batch_jobs(db: Session, batch_id: str) -> List[SummaryJob]:
+    """获取批次中的全部任务，按创建时间排序"""
+    return db.query(SummaryJob).filter(
+        SummaryJob.batch_id == batch_id
+    ).order_by(SummaryJob.created_at.asc()).all()
+
+def create_job(
+    db: Session,
+    video_url: str,
+    user_id: Optional[int] = None,
+    keep_audio: bool = False,
+    summary_id: Optional[int] = None,
+    batch_id: Optional[str] = None
+) -> SummaryJob:
+    """创建新的摘要任务，传入 summary_id 时直接创建为已完成的任务"""
+    completed = summary_id is not None
+    db_job = SummaryJob(
+        id=uuid.uuid4().hex,
+        video_id=extract_video_id(video_url),
+        video_url=video_url,
+        keep_audio=keep_audio,
+        status=JOB_COMPLETED if completed else JOB_PENDING,
+        progress=100 if completed else 0,
+        summary_id=summary_id,
+        finished_at=func.now() if completed else None,
+        batch_id=batch_id,
+        user_id=user_id
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_job(db: Session, job_id: str) -> SummaryJob:
+    """根据ID获取任务"""
+    return db.query(SummaryJob).filter(SummaryJob.id == job_id).first()
+
+def get_active_job(db: Session, video_id: str, user_id: Optional[int] = None) -> SummaryJob:
+    """获取同一用户针对同一视频尚未结束的任务"""
+    return db.query(SummaryJob).filter(
+        SummaryJob.video_id == video_id,
+        SummaryJob.user_id == user_id,
+        SummaryJob.status.in_(ACTIVE_JOB_STATUSES)
+    ).order_by(SummaryJob.created_at.desc()).first()
+
+def get_unfinished_jobs(db: Session) -> List[SummaryJob]:
+    """获取所有尚未结束的任务，按创建时间排序"""
+    return db.query(SummaryJob).filter(
+        SummaryJob.status.in_(ACTIVE_JOB_STATUSES)
+    ).order_by(SummaryJob.created_at.asc()).all()
+
+def count_unfinished_jobs(db: Session) -> int:
+    """统计尚未结束的任务数量"""
+    return db.query(SummaryJob).filter(SummaryJob.status.in_(ACTIVE_JOB_STATUSES)).count()
+
+def update_job(db: Session, job_id: str, **fields) -> SummaryJob:
+    """更新任务字段"""
+    db_job = get_job(db, job_id)
+    if not db_job:
+        return None
+    
+    for key, value in fields.items():
+        setattr(db_job, key, value)
+    
+    if fields.get("status") in (JOB_COMPLETED, JOB_FAILED):
+        db_job.finished_at = func.now()
+    
+    db.commit()
+    db.refresh(db_job)
+    return db_job
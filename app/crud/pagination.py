@@ -0,0 +1,56 @@
+from sqlalchemy import select, tuple_
+from sqlalchemy.sql import func
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+import base64
+import binascii
+import json
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """把 (created_at, id) 编码为不透明的游标"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """
+    解码游标
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def apply_keyset(query, model, cursor: Optional[str] = None, descending: bool = True):
+    """
+    按 (created_at, id) 做键集分页：排序并只返回游标之后的行
+
+    锚点行的 created_at 优先从数据库读取，避免绑定参数与库中存储的时间格式
+    不一致（如 SQLite 的 CURRENT_TIMESTAMP 不带微秒）；锚点行已删除时使用游标中的值。
+    """
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+    if cursor is None:
+        return query
+
+    created_at, row_id = decode_cursor(cursor)
+    anchor_created_at = func.coalesce(
+        select(model.created_at).where(model.id == row_id).scalar_subquery(),
+        created_at
+    )
+    key = tuple_(model.created_at, model.id)
+    anchor = tuple_(anchor_created_at, row_id)
+    return query.filter(key < anchor if descending else key > anchor)
+
+def next_cursor(rows: List[Any], limit: int) -> Optional[str]:
+    """本页已满时返回下一页的游标，否则返回 None"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
@@ -1,7 +1,15 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased, load_only, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import func
 from app.models.summary import VideoSummary
+from app.models.job import SummaryJob
+from app.models.transcript import TranscriptSegments
 from app.schemas.summary import SummaryCreate, SummaryUpdate
-from typing import List, Optional
+from app.crud.pagination import apply_keyset
+from app.crud.transcript import timeline_values
+from typing import Any, Dict, List, Optional, Sequence
 import re
 
 def extract_video_id(url: str) -> str:
@@ -12,21 +20,160 @@ def extract_video_id(url: str) -> str:
         return match.group(1)
     return ""
 
-def create_summary(db: Session, summary: SummaryCreate, user_id: Optional[int] = None) -> VideoSummary:
-    """创建新的视频摘要"""
-    video_id = extract_video_id(summary.video_url)
-    db_summary = VideoSummary(
-        video_id=video_id,
-        video_url=summary.video_url,
-        video_title=summary.video_title,
-        channel_name=summary.channel_name,
-        user_id=user_id
-    )
+# 支持 INSERT ... ON CONFLICT DO UPDATE 的方言
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# 覆盖已有记录时更新的列
+_UPSERT_COLUMNS = ("video_url", "video_title", "channel_name", "transcript", "summary", "audio_path", "metrics", "source_summary_id")
+
+def _summary_row(summary: SummaryCreate, user_id: Optional[int], source_summary_id: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        "video_id": extract_video_id(summary.video_url),
+        "video_url": summary.video_url,
+        "video_title": summary.video_title,
+        "channel_name": summary.channel_name,
+        "transcript": summary.transcript,
+        "summary": summary.summary,
+        "audio_path": summary.audio_path,
+        "metrics": summary.metrics,
+        "source_summary_id": source_summary_id,
+        "user_id": user_id,
+    }
+
+def create_summary(db: Session, summary: SummaryCreate, user_id: Optional[int] = None, commit: bool = True) -> VideoSummary:
+    """创建新的视频摘要，元数据、转录、摘要和音频路径在一次插入中写入"""
+    db_summary = VideoSummary(**_summary_row(summary, user_id))
     db.add(db_summary)
-    db.commit()
-    db.refresh(db_summary)
+    if commit:
+        db.commit()
+        db.refresh(db_summary)
+    else:
+        db.flush()
     return db_summary
 
+def _upsert_rows(db: Session, rows: List[Dict[str, Any]]) -> List[VideoSummary]:
+    """
+    按 (video_id, user_id) 插入或覆盖摘要，返回与 rows 顺序一致的记录
+
+    SQLite 和 PostgreSQL 使用单条 INSERT ... ON CONFLICT DO UPDATE ... RETURNING；
+    其他数据库逐行查询后写入。
+    """
+    insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        results = []
+        for row in rows:
+            db_summary = None
+            if row["user_id"] is not None:
+                db_summary = get_user_summary_by_video_id(db, row["video_id"], row["user_id"])
+            if db_summary is None:
+                db_summary = VideoSummary(video_id=row["video_id"], user_id=row["user_id"])
+                db.add(db_summary)
+            for key in _UPSERT_COLUMNS:
+                setattr(db_summary, key, row[key])
+            results.append(db_summary)
+        db.flush()
+        return results
+
+    stmt = insert(VideoSummary)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["video_id", "user_id"],
+        set_={**{key: stmt.excluded[key] for key in _UPSERT_COLUMNS}, "updated_at": func.now()}
+    )
+    return list(db.scalars(
+        stmt.returning(VideoSummary, sort_by_parameter_order=True),
+        rows,
+        execution_options={"populate_existing": True}
+    ))
+
+def _save_timelines(db: Session, summaries: List[VideoSummary], timelines: Sequence[Optional[bytes]]) -> None:
+    """写入分段时间轴；没有时间轴的记录删除旧的分段，避免与新转录不一致"""
+    stale = [db_summary.id for db_summary, timeline in zip(summaries, timelines) if not timeline]
+    if stale:
+        db.execute(delete(TranscriptSegments).where(TranscriptSegments.summary_id.in_(stale)))
+    rows = [
+        {"summary_id": db_summary.id, **timeline_values(timeline)}
+        for db_summary, timeline in zip(summaries, timelines) if timeline
+    ]
+    if not rows:
+        return
+    insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        for row in rows:
+            db_segments = db.query(TranscriptSegments).filter(TranscriptSegments.summary_id == row["summary_id"]).first()
+            if db_segments is None:
+                db.add(TranscriptSegments(**row))
+            else:
+                for key, value in row.items():
+                    setattr(db_segments, key, value)
+        return
+    stmt = insert(TranscriptSegments).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["summary_id"],
+        set_={key: stmt.excluded[key] for key in ("segment_count", "duration_ms", "timeline")}
+    )
+    db.execute(stmt)
+
+def save_summary(
+    db: Session,
+    summary: SummaryCreate,
+    user_id: Optional[int] = None,
+    timeline: Optional[bytes] = None,
+    commit: bool = True
+) -> VideoSummary:
+    """
+    保存流水线结果：整行（元数据、转录、摘要、音频路径）和分段时间轴在同一事务中写入
+
+    该用户已有该视频的记录时覆盖；匿名记录（user_id 为空）总是插入新行。
+    commit 为 False 时由调用方提交，便于和任务状态更新合并为一次提交。
+    """
+    return bulk_save_summaries(db, [summary], user_id=user_id, timelines=[timeline], commit=commit)[0]
+
+def bulk_save_summaries(
+    db: Session,
+    summaries: Sequence[SummaryCreate],
+    user_id: Optional[int] = None,
+    timelines: Optional[Sequence[Optional[bytes]]] = None,
+    commit: bool = True
+) -> List[VideoSummary]:
+    """
+    在一个事务中批量保存多个结果，语义同 save_summary
+
+    同一批中重复的视频以最后一条为准。
+
+    Returns:
+        与 summaries 顺序一致的摘要记录
+    """
+    if timelines is None:
+        timelines = [None] * len(summaries)
+    rows = [_summary_row(summary, user_id) for summary in summaries]
+
+    # ON CONFLICT 不允许同一语句多次更新同一行，先按 (video_id, user_id) 去重
+    positions = {}
+    unique_rows, unique_timelines = [], []
+    for i, (row, timeline) in enumerate(zip(rows, timelines)):
+        key = (row["video_id"], row["user_id"]) if row["user_id"] is not None else ("", i)
+        if key in positions:
+            unique_rows[positions[key]], unique_timelines[positions[key]] = row, timeline
+        else:
+            positions[key] = len(unique_rows)
+            unique_rows.append(row)
+            unique_timelines.append(timeline)
+
+    try:
+        saved = _upsert_rows(db, unique_rows)
+        _save_timelines(db, saved, unique_timelines)
+        if commit:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    results = []
+    for i, row in enumerate(rows):
+        key = (row["video_id"], row["user_id"]) if row["user_id"] is not None else ("", i)
+        results.append(saved[positions[key]])
+    return results
+
 def get_summary(db: Session, summary_id: int) -> VideoSummary:
     """根据ID获取视频摘要"""
     return db.query(VideoSummary).filter(VideoSummary.id == summary_id).first()
@@ -35,13 +182,165 @@ def get_summary_by_video_id(db: Session, video_id: str) -> VideoSummary:
     """根据视频ID获取摘要"""
     return db.query(VideoSummary).filter(VideoSummary.video_id == video_id).first()
 
-def get_summaries(db: Session, skip: int = 0, limit: int = 100) -> List[VideoSummary]:
-    """获取所有视频摘要"""
-    return db.query(VideoSummary).order_by(VideoSummary.created_at.desc()).offset(skip).limit(limit).all()
+def get_user_summary_by_video_id(db: Session, video_id: str, user_id: Optional[int]) -> VideoSummary:
+    """获取指定用户针对某个视频的摘要"""
+    return db.query(VideoSummary).filter(
+        VideoSummary.video_id == video_id,
+        VideoSummary.user_id == user_id
+    ).order_by(VideoSummary.created_at.desc()).first()
+
+def get_completed_summary(db: Session, video_id: str) -> VideoSummary:
+    """获取某个视频最新的已完成摘要（转录和摘要都不为空）"""
+    return db.query(VideoSummary).filter(
+        VideoSummary.video_id == video_id,
+        VideoSummary.transcript.isnot(None),
+        VideoSummary.summary.isnot(None)
+    ).order_by(VideoSummary.created_at.desc()).first()
+
+def attach_summary_to_user(db: Session, source: VideoSummary, user_id: Optional[int] = None) -> VideoSummary:
+    """
+    复用已有的摘要结果，写入该用户的记录（已有记录时覆盖）
+
+    转录和分段时间轴不复制：记录通过 source_summary_id 引用源记录，读取时解析到源记录；
+    只复制元数据、摘要文本（列表预览在本行截取）和流水线指标。
+    """
+    if user_id is not None and source.user_id == user_id:
+        return source
+    summary = SummaryCreate(
+        video_url=source.video_url,
+        video_title=source.video_title,
+        channel_name=source.channel_name,
+        summary=source.summary,
+        metrics=source.metrics
+    )
+    row = _summary_row(summary, user_id, source_summary_id=source.source_summary_id or source.id)
+    try:
+        db_summary = _upsert_rows(db, [row])[0]
+        # 覆盖的旧记录可能有自己的分段时间轴，与引用的转录不再对应
+        _save_timelines(db, [db_summary], [None])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db_summary
+
+def get_summary_detail(db: Session, summary_id: int) -> Optional[VideoSummary]:
+    """获取视频摘要的完整记录；引用源记录的摘要从源记录读出转录"""
+    db_summary = get_summary(db, summary_id)
+    if db_summary is not None and db_summary.source_summary_id is not None:
+        set_committed_value(db_summary, "transcript", db.scalar(source_transcript_statement(db_summary)))
+    return db_summary
+
+def source_transcript_statement(db_summary: VideoSummary) -> Select:
+    """查询被引用的源记录的转录全文"""
+    return select(VideoSummary.transcript).where(VideoSummary.id == db_summary.source_summary_id)
+
+def transcript_heir_statement(summary_id: int) -> Select:
+    """引用该摘要的记录中最早的一条，删除源记录时由它接管转录"""
+    return select(func.min(VideoSummary.id)).where(VideoSummary.source_summary_id == summary_id)
+
+def hand_over_transcript_statements(summary_id: int, heir_id: int) -> List[Any]:
+    """
+    删除源记录前的更新语句：转录和分段时间轴移交给 heir_id，其余引用改为指向 heir_id
+
+    同步和异步 CRUD 共用；调用方按顺序执行，并在删除前 expire 源记录，避免级联删除已移交的时间轴。
+    """
+    source = aliased(VideoSummary)
+    transcript = select(source.transcript).where(source.id == summary_id).scalar_subquery()
+    return [
+        update(VideoSummary).where(VideoSummary.id == heir_id).values(transcript=transcript, source_summary_id=None),
+        update(VideoSummary).where(VideoSummary.source_summary_id == summary_id).values(source_summary_id=heir_id),
+        update(TranscriptSegments).where(TranscriptSegments.summary_id == summary_id).values(summary_id=heir_id),
+    ]
+
+# 列表接口默认返回的字段；summary_preview 由 SQL 截取，不加载完整摘要
+LIST_FIELDS = (
+    "id",
+    "video_id",
+    "video_url",
+    "video_title",
+    "channel_name",
+    "summary_preview",
+    "created_at",
+    "updated_at",
+    "user_id",
+)
+
+# 列表接口可通过 fields 参数选择的字段，完整转录不在其中
+LIST_SELECTABLE_FIELDS = LIST_FIELDS + ("summary",)
+
+# 摘要预览的默认长度（字符）
+DEFAULT_PREVIEW_LENGTH = 200
+
+def summary_list_statement(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None,
+    preview_length: int = DEFAULT_PREVIEW_LENGTH,
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None
+) -> Select:
+    """
+    构造列表查询：只加载所需的列，摘要预览在数据库中截取，按创建时间倒序分页
+
+    未选中的列（包括 transcript）被延迟加载，不会出现在 SELECT 中。
+    指定 cursor 时从游标之后继续（键集分页），忽略 skip；同步和异步 CRUD 共用。
+
+    Raises:
+        ValueError: 游标无效
+    """
+    if fields is None:
+        fields = LIST_FIELDS
+    columns = [getattr(VideoSummary, field) for field in fields if field not in ("id", "created_at", "summary_preview")]
+    # id 和 created_at 始终加载，用于生成下一页游标
+    options = [load_only(VideoSummary.id, VideoSummary.created_at, *columns)]
+    if "summary_preview" in fields:
+        options.append(with_expression(
+            VideoSummary.summary_preview,
+            func.substr(VideoSummary.summary, 1, preview_length)
+        ))
+    stmt = select(VideoSummary).options(*options)
+    if user_id is not None:
+        stmt = stmt.where(VideoSummary.user_id == user_id)
+    stmt = apply_keyset(stmt, VideoSummary, cursor)
+    if cursor is None:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
+
+def get_summaries(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None,
+    preview_length: int = DEFAULT_PREVIEW_LENGTH,
+    cursor: Optional[str] = None
+) -> List[VideoSummary]:
+    """
+    获取所有视频摘要（列表字段），按创建时间倒序
+
+    指定 cursor 时从游标之后继续（键集分页），忽略 skip。
+
+    Raises:
+        ValueError: 游标无效
+    """
+    return list(db.scalars(summary_list_statement(skip, limit, fields, preview_length, cursor)))
+
+def get_user_summaries(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None,
+    preview_length: int = DEFAULT_PREVIEW_LENGTH,
+    cursor: Optional[str] = None
+) -> List[VideoSummary]:
+    """
+    获取指定用户的所有视频摘要（列表字段），分页方式同 get_summaries
 
-def get_user_summaries(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[VideoSummary]:
-    """获取指定用户的所有视频摘要"""
-    return db.query(VideoSummary).filter(VideoSummary.user_id == user_id).order_by(VideoSummary.created_at.desc()).offset(skip).limit(limit).all()
+    Raises:
+        ValueError: 游标无效
+    """
+    return list(db.scalars(summary_list_statement(skip, limit, fields, preview_length, cursor, user_id=user_id)))
 
 def update_summary(db: Session, summary_id: int, summary_update: SummaryUpdate) -> VideoSummary:
     """更新视频摘要"""
@@ -52,6 +351,9 @@ def update_summary(db: Session, summary_id: int, summary_update: SummaryUpdate)
     update_data = summary_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_summary, key, value)
+    if "transcript" in update_data:
+        # 改写转录后不再引用源记录
+        db_summary.source_summary_id = None
     
     db.commit()
     db.refresh(db_summary)
@@ -63,6 +365,13 @@ def delete_summary(db: Session, summary_id: int) -> bool:
     if not db_summary:
         return False
     
+    # 引用该摘要的任务保留记录、清空 summary_id；SQLite 未启用外键约束时 ON DELETE SET NULL 不生效
+    db.execute(update(SummaryJob).where(SummaryJob.summary_id == summary_id).values(summary_id=None))
+    heir_id = db.scalar(transcript_heir_statement(summary_id))
+    if heir_id is not None:
+        for stmt in hand_over_transcript_statements(summary_id, heir_id):
+            db.execute(stmt)
+        db.expire(db_summary)
     db.delete(db_summary)
     db.commit()
     return True 
\ No newline at end of file
@@ -0,0 +1,147 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import func
+from app.models.summary import VideoSummary
+from app.models.transcript import TranscriptSegments
+from typing import Any, Dict, List, Optional, Tuple
+from array import array
+from bisect import bisect_left, bisect_right
+import sys
+
+def _to_bytes(values: array) -> bytes:
+    """把 int32 数组按小端序序列化"""
+    if sys.byteorder != "little":
+        values = array("i", values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_bytes(data: bytes) -> array:
+    values = array("i")
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+def pack_segments(segments: List[Dict[str, Any]]) -> Tuple[str, bytes]:
+    """
+    把 Whisper 分段打包为全文和紧凑时间轴
+
+    全文是各分段文本的直接拼接，时间轴中的文本偏移指向全文中的字符位置。
+
+    Returns:
+        (全文, 时间轴字节串)
+    """
+    starts = array("i")
+    ends = array("i")
+    offsets = array("i", [0])
+    texts = []
+    position = 0
+    for segment in segments:
+        starts.append(int(round(segment["start"] * 1000)))
+        ends.append(int(round(segment["end"] * 1000)))
+        texts.append(segment["text"])
+        position += len(segment["text"])
+        offsets.append(position)
+    return "".join(texts), _to_bytes(starts + ends + offsets)
+
+def unpack_timeline(timeline: bytes) -> Tuple[array, array, array]:
+    """解包时间轴，返回 (开始时间ms, 结束时间ms, 文本偏移)"""
+    values = _from_bytes(timeline)
+    count = (len(values) - 1) // 3
+    return values[:count], values[count:2 * count], values[2 * count:]
+
+def timeline_values(timeline: bytes) -> Dict[str, Any]:
+    """由时间轴得到 transcript_segments 行的列值"""
+    starts, ends, _ = unpack_timeline(timeline)
+    return {
+        "segment_count": len(starts),
+        "duration_ms": max(ends) if ends else 0,
+        "timeline": timeline,
+    }
+
+def save_transcript_segments(db: Session, summary_id: int, timeline: bytes, commit: bool = True) -> TranscriptSegments:
+    """在一个事务中写入（或替换）摘要的全部分段"""
+    db_segments = db.query(TranscriptSegments).filter(TranscriptSegments.summary_id == summary_id).first()
+    if db_segments is None:
+        db_segments = TranscriptSegments(summary_id=summary_id)
+        db.add(db_segments)
+    for key, value in timeline_values(timeline).items():
+        setattr(db_segments, key, value)
+    if commit:
+        db.commit()
+        db.refresh(db_segments)
+    return db_segments
+
+def transcript_owner_id(summary_id: int):
+    """保存转录的记录 ID（标量子查询）：引用其他记录结果的摘要解析到源记录"""
+    summary = aliased(VideoSummary)
+    return select(func.coalesce(summary.source_summary_id, summary.id)).where(summary.id == summary_id).scalar_subquery()
+
+def get_transcript_segments(db: Session, summary_id: int) -> TranscriptSegments:
+    """获取摘要的分段时间轴（引用源记录时返回源记录的时间轴）"""
+    return db.query(TranscriptSegments).filter(TranscriptSegments.summary_id == transcript_owner_id(summary_id)).first()
+
+def transcript_range_bounds(
+    db_segments: TranscriptSegments,
+    start: float = 0.0,
+    end: Optional[float] = None
+) -> Tuple[range, int, int]:
+    """
+    在时间轴上二分查找与 [start, end) 重叠的分段
+
+    Returns:
+        (分段下标范围, 文本起始偏移, 文本结束偏移)
+    """
+    starts, ends, offsets = unpack_timeline(db_segments.timeline)
+    start_ms = int(start * 1000)
+    end_ms = int(end * 1000) if end is not None else None
+
+    # 第一个结束时间晚于 start 的分段，到第一个开始时间不早于 end 的分段之前
+    first = bisect_right(ends, start_ms)
+    last = bisect_left(starts, end_ms) if end_ms is not None else len(starts)
+    if first >= last:
+        return range(0), 0, 0
+    return range(first, last), offsets[first], offsets[last]
+
+def transcript_substring_statement(summary_id: int, char_start: int, char_end: int):
+    """只取出转录全文中 [char_start, char_end) 的子串"""
+    return select(
+        func.substr(VideoSummary.transcript, char_start + 1, char_end - char_start)
+    ).where(VideoSummary.id == transcript_owner_id(summary_id))
+
+def build_range_segments(db_segments: TranscriptSegments, indices: range, char_start: int, text: str) -> List[Dict[str, Any]]:
+    """把子串按文本偏移切回各个分段"""
+    starts, ends, offsets = unpack_timeline(db_segments.timeline)
+    return [
+        {
+            "id": i,
+            "start": starts[i] / 1000,
+            "end": ends[i] / 1000,
+            "text": text[offsets[i] - char_start:offsets[i + 1] - char_start],
+        }
+        for i in indices
+    ]
+
+def get_transcript_range(
+    db: Session,
+    summary_id: int,
+    start: float = 0.0,
+    end: Optional[float] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    获取与时间范围 [start, end) 重叠的分段
+
+    只读取紧凑时间轴和转录全文中对应的子串，不加载完整转录。
+
+    Returns:
+        分段列表；摘要没有分段数据时返回 None
+    """
+    db_segments = get_transcript_segments(db, summary_id)
+    if db_segments is None:
+        return None
+
+    indices, char_start, char_end = transcript_range_bounds(db_segments, start, end)
+    if not indices:
+        return []
+    text = db.scalar(transcript_substring_statement(summary_id, char_start, char_end)) or ""
+    return build_range_segments(db_segments, indices, char_start, text)
@@ -1,8 +1,11 @@
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.auth.security import get_password_hash, verify_password
-from typing import List
+from app.auth.security import get_password_hash, verify_and_update_password
+from app.auth.user_cache import user_cache
+from app.crud.pagination import apply_keyset
+from typing import List, Optional
 
 def get_user(db: Session, user_id: int):
     """根据ID获取用户"""
@@ -16,9 +19,28 @@ def get_user_by_username(db: Session, username: str):
     """根据用户名获取用户"""
     return db.query(User).filter(User.username == username).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    """获取用户列表"""
-    return db.query(User).offset(skip).limit(limit).all()
+def user_list_statement(skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Select:
+    """
+    构造用户列表查询，按注册时间顺序分页；同步和异步 CRUD 共用
+
+    Raises:
+        ValueError: 游标无效
+    """
+    stmt = apply_keyset(select(User), User, cursor, descending=False)
+    if cursor is None:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
+
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[User]:
+    """
+    获取用户列表，按注册时间顺序
+
+    指定 cursor 时从游标之后继续（键集分页），忽略 skip。
+
+    Raises:
+        ValueError: 游标无效
+    """
+    return list(db.scalars(user_list_statement(skip, limit, cursor)))
 
 def create_user(db: Session, user: UserCreate) -> User:
     """创建新用户"""
@@ -44,11 +66,14 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> User:
     # 如果有密码更新，需要哈希处理
     if "password" in update_data:
         update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        # 修改密码后使已签发的令牌失效
+        db_user.token_version = (db_user.token_version or 0) + 1
     
     for key, value in update_data.items():
         setattr(db_user, key, value)
     
     db.commit()
+    user_cache.invalidate(db_user.username)
     db.refresh(db_user)
     return db_user
 
@@ -58,15 +83,21 @@ def delete_user(db: Session, user_id: int) -> bool:
     if not db_user:
         return False
     
+    username = db_user.username
     db.delete(db_user)
     db.commit()
+    user_cache.invalidate(username)
     return True
 
 def authenticate_user(db: Session, username: str, password: str):
-    """验证用户登录"""
+    """验证用户登录；哈希的成本因子与 BCRYPT_ROUNDS 不一致时顺便重新哈希"""
     user = get_user_by_username(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
     return user 
\ No newline at end of file
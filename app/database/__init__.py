@@ -1,3 +1,3 @@
-from app.database.base import Base, engine, SessionLocal, get_db
+from app.database.base import Base, engine, SessionLocal, get_db, async_engine, AsyncSessionLocal, get_async_db
 
-__all__ = ["Base", "engine", "SessionLocal", "get_db"] 
\ No newline at end of file
+__all__ = ["Base", "engine", "SessionLocal", "get_db", "async_engine", "AsyncSessionLocal", "get_async_db"]
@@ -1,27 +1,31 @@
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# 数据库配置模块在导入时读取环境变量，需在加载 .env 之后导入
+from app.database.config import create_db_engine, create_async_db_engine
+
 # 获取数据库连接URL，默认使用SQLite
 SQLALCHEMY_DATABASE_URL = os.getenv(
     "DATABASE_URL", 
     "sqlite:///./youtube_summary.db"
 )
 
-# 创建数据库引擎
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    # 如果使用SQLite，需要添加connect_args
-    connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
-)
+# 创建数据库引擎（连接池和 SQLite PRAGMA 见 app/database/config.py）
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 
 # 创建会话
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎和会话，供 FastAPI 异步路由使用；Alembic、后台任务和脚本继续使用同步会话
+async_engine = create_async_db_engine(SQLALCHEMY_DATABASE_URL)
+# 提交后不使对象过期，避免在异步上下文中访问属性时触发隐式加载
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # 创建基类
 Base = declarative_base()
 
@@ -31,4 +35,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# 依赖项，用于获取异步数据库会话
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,149 @@
+import os
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+logger = logging.getLogger(__name__)
+
+# SQLite 连接参数，在每个新连接上通过 PRAGMA 设置
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# 页缓存大小（KiB），对应 PRAGMA cache_size 的负值
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# SQLite 文件库的连接池大小；连接会保留已设置的 PRAGMA，复用可以避免重复打开文件
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+
+# 服务端数据库（如 PostgreSQL）的连接池配置
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_sqlite_memory(url: str) -> bool:
+    database = make_url(url).database
+    return is_sqlite(url) and (not database or database == ":memory:")
+
+
+# 同步驱动对应的异步驱动
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    把同步数据库 URL 转换为对应异步驱动的 URL
+
+    例如 sqlite:///./app.db -> sqlite+aiosqlite:///./app.db，
+    postgresql://... / postgresql+psycopg2://... -> postgresql+asyncpg://...；
+    已经指定异步驱动的 URL 保持不变。
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.get_driver_name() in ("aiosqlite", "asyncpg") or backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    按数据库后端选择连接池和连接参数
+
+    - SQLite 内存库：StaticPool，所有会话共享同一个连接，否则每个连接各自是一个空库
+    - SQLite 文件库：QueuePool，连接复用以保留 PRAGMA 设置
+    - 其他数据库：QueuePool，大小和回收策略由 DB_POOL_* 环境变量配置
+
+    异步引擎使用对应的 AsyncAdaptedQueuePool。
+    """
+    queue_pool = AsyncAdaptedQueuePool if is_async else QueuePool
+    if is_sqlite_memory(url):
+        return {
+            "connect_args": {"check_same_thread": False},
+            "poolclass": StaticPool,
+        }
+    if is_sqlite(url):
+        return {
+            # timeout 是 sqlite3 驱动等待写锁的秒数，与 busy_timeout 保持一致
+            "connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            "poolclass": queue_pool,
+            "pool_size": SQLITE_POOL_SIZE,
+            "max_overflow": SQLITE_POOL_SIZE,
+        }
+    return {
+        "poolclass": queue_pool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def apply_sqlite_pragmas(dbapi_connection, memory: bool = False) -> None:
+    """在新建的 SQLite 连接上设置 WAL、同步级别、忙等待、缓存和内存映射"""
+    cursor = dbapi_connection.cursor()
+    try:
+        if not memory:
+            # WAL 允许读写并发，写事务只需追加日志；内存库不支持 WAL
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        # WAL 模式下 NORMAL 只在检查点时 fsync，断电最多丢失最近的事务，不会损坏数据库
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    finally:
+        cursor.close()
+
+
+def _listen_sqlite_pragmas(engine: Engine, url: str) -> None:
+    memory = is_sqlite_memory(url)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, memory=memory)
+
+
+def create_db_engine(url: str, **kwargs) -> Engine:
+    """创建数据库引擎；SQLite 连接在建立时应用 PRAGMA"""
+    options = engine_options(url)
+    options.update(kwargs)
+    engine = create_engine(url, **options)
+
+    if is_sqlite(url):
+        _listen_sqlite_pragmas(engine, url)
+        logger.info(
+            f"SQLite engine: journal_mode={SQLITE_JOURNAL_MODE}, synchronous={SQLITE_SYNCHRONOUS}, "
+            f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}ms"
+        )
+    return engine
+
+
+def create_async_db_engine(url: str, **kwargs) -> AsyncEngine:
+    """
+    创建异步数据库引擎（SQLite 使用 aiosqlite，PostgreSQL 使用 asyncpg）
+
+    连接池和 PRAGMA 与同步引擎相同。
+    """
+    url = async_database_url(url)
+    options = engine_options(url, is_async=True)
+    options.update(kwargs)
+    engine = create_async_engine(url, **options)
+
+    if is_sqlite(url):
+        # 异步驱动的连接事件在底层同步引擎上注册
+        _listen_sqlite_pragmas(engine.sync_engine, url)
+    return engine
@@ -1,4 +1,7 @@
 from app.models.user import User
 from app.models.summary import VideoSummary
+from app.models.job import SummaryJob, SummaryBatch
+from app.models.transcript import TranscriptSegments
+from app.models.channel import Channel, ChannelVideo
 
-__all__ = ["User", "VideoSummary"] 
\ No newline at end of file
+__all__ = ["User", "VideoSummary", "SummaryJob", "SummaryBatch", "TranscriptSegments", "Channel", "ChannelVideo"]
\ No newline at end of file
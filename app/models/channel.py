@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database.base import Base
+
+class Channel(Base):
+    __tablename__ = "channels"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    channel_key = Column(String, unique=True, nullable=False)  # 规范化的频道标识，见 normalize_channel
+    channel_url = Column(String, nullable=False)
+    # 已抓取到频道最早的视频，之后只需增量抓取新视频
+    fully_indexed = Column(Boolean, nullable=False, default=False, server_default="0")
+    refreshed_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # 与ChannelVideo的关系
+    videos = relationship("ChannelVideo", back_populates="channel", cascade="all, delete-orphan", passive_deletes=True)
+
+class ChannelVideo(Base):
+    __tablename__ = "channel_videos"
+    __table_args__ = (
+        Index("uq_channel_videos_channel_id_video_id", "channel_id", "video_id", unique=True),
+        # 按 seq 倒序读取频道最新的 N 个视频
+        Index("ix_channel_videos_channel_id_seq", "channel_id", "seq"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    channel_id = Column(Integer, ForeignKey("channels.id", ondelete="CASCADE"), nullable=False)
+    video_id = Column(String, nullable=False)  # YouTube视频ID
+    # 频道上传列表中的顺序，越新的视频越大；扁平提取的条目通常没有上传日期，不能按日期排序
+    seq = Column(Integer, nullable=False)
+    title = Column(String)
+    upload_date = Column(String)  # YYYY-MM-DD，未知时为空字符串
+    duration = Column(Integer)
+    view_count = Column(Integer)
+    description = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # 与Channel的关系
+    channel = relationship("Channel", back_populates="videos")
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, LargeBinary, JSON
+from sqlalchemy.sql import func
+from app.database.base import Base
+
+# 任务状态
+JOB_PENDING = "pending"
+JOB_DOWNLOADING = "downloading"
+JOB_TRANSCRIBING = "transcribing"
+JOB_SUMMARIZING = "summarizing"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# 尚未结束的任务状态，服务重启后需要恢复
+ACTIVE_JOB_STATUSES = (JOB_PENDING, JOB_DOWNLOADING, JOB_TRANSCRIBING, JOB_SUMMARIZING)
+
+class SummaryBatch(Base):
+    __tablename__ = "summary_batches"
+    
+    id = Column(String(32), primary_key=True, index=True)  # 批次ID（uuid hex）
+    channel_name = Column(String, nullable=True)  # 按频道提交时的频道名称
+    total = Column(Integer, nullable=False, default=0)  # 批次中的任务数
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # 外键关联到用户
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+class SummaryJob(Base):
+    __tablename__ = "summary_jobs"
+    
+    id = Column(String(32), primary_key=True, index=True)  # 任务ID（uuid hex）
+    video_id = Column(String, index=True, nullable=False)  # YouTube视频ID
+    video_url = Column(String, nullable=False)
+    keep_audio = Column(Boolean, default=False)
+    status = Column(String, index=True, nullable=False, default=JOB_PENDING)
+    progress = Column(Integer, default=0)  # 进度百分比
+    error = Column(Text, nullable=True)
+    audio_path = Column(String, nullable=True)  # 下载阶段的中间结果
+    transcript = Column(Text, nullable=True)  # 转录阶段的中间结果
+    segments = Column(LargeBinary, nullable=True)  # 转录阶段的分段时间轴（紧凑格式）
+    summary_id = Column(Integer, ForeignKey("video_summaries.id", ondelete="SET NULL"), nullable=True)
+    batch_id = Column(String(32), ForeignKey("summary_batches.id"), index=True, nullable=True)  # 所属批次
+    metrics = Column(JSON, nullable=True)  # 已完成阶段的耗时和用量（见 app/services/tracing.py）
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # 外键关联到用户
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
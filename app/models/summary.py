@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, JSON
+from sqlalchemy.orm import relationship, query_expression
 from sqlalchemy.sql import func
 from app.database.base import Base
 
 class VideoSummary(Base):
     __tablename__ = "video_summaries"
+    __table_args__ = (
+        # 支持按 (created_at, id) 的键集分页
+        Index("ix_video_summaries_created_at_id", "created_at", "id"),
+        Index("ix_video_summaries_user_id_created_at_id", "user_id", "created_at", "id"),
+        # 每个用户每个视频只保留一条摘要；匿名记录（user_id 为空）不受约束
+        Index("uq_video_summaries_video_id_user_id", "video_id", "user_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(String, index=True, nullable=False)  # YouTube视频ID
@@ -14,11 +21,20 @@ class VideoSummary(Base):
     transcript = Column(Text)  # 完整转录
     summary = Column(Text)  # 生成的摘要
     audio_path = Column(String, nullable=True)  # 音频文件路径（如果保存）
+    metrics = Column(JSON, nullable=True)  # 生成该摘要的流水线各阶段耗时和用量
+    # 复用其他记录的结果时引用的源摘要；转录和分段时间轴只保存在源记录中
+    source_summary_id = Column(Integer, ForeignKey("video_summaries.id"), index=True, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # 外键关联到用户
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     
+    # 列表查询时按需填充的摘要预览（摘要的前 N 个字符）
+    summary_preview = query_expression()
+    
     # 与User的关系
-    user = relationship("User", back_populates="summaries") 
\ No newline at end of file
+    user = relationship("User", back_populates="summaries")
+    
+    # 分段时间轴，随摘要一起删除
+    segments = relationship("TranscriptSegments", back_populates="summary", uselist=False, cascade="all, delete-orphan") 
\ No newline at end of file
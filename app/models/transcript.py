@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, LargeBinary, ForeignKey, DateTime
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database.base import Base
+
+class TranscriptSegments(Base):
+    __tablename__ = "transcript_segments"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    summary_id = Column(Integer, ForeignKey("video_summaries.id", ondelete="CASCADE"), unique=True, nullable=False)
+    segment_count = Column(Integer, nullable=False)
+    duration_ms = Column(Integer, nullable=False)
+    # 紧凑时间轴：int32 小端数组，依次为全部开始时间(ms)、结束时间(ms)
+    # 和 segment_count + 1 个文本偏移（指向 video_summaries.transcript 的字符位置）
+    timeline = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # 与VideoSummary的关系
+    summary = relationship("VideoSummary", back_populates="segments")
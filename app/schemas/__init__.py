@@ -1,5 +1,7 @@
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, Token
-from app.schemas.summary import SummaryCreate, SummaryUpdate, SummaryResponse
+from app.schemas.summary import SummaryCreate, SummaryUpdate, SummaryResponse, SummaryListItem
+from app.schemas.job import JobResponse, BatchResponse
+from app.schemas.transcript import TranscriptSegment, TranscriptRangeResponse
 
 __all__ = [
     "UserCreate", 
@@ -9,5 +11,10 @@ __all__ = [
     "Token",
     "SummaryCreate", 
     "SummaryUpdate", 
-    "SummaryResponse"
+    "SummaryResponse",
+    "SummaryListItem",
+    "JobResponse",
+    "BatchResponse",
+    "TranscriptSegment",
+    "TranscriptRangeResponse"
 ] 
\ No newline at end of file
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+class JobResponse(BaseModel):
+    id: str
+    video_id: str
+    video_url: str
+    status: str
+    progress: int = 0
+    error: Optional[str] = None
+    summary_id: Optional[int] = None
+    batch_id: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = Field(None, description="已完成阶段的耗时和用量")
+    user_id: Optional[int] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class BatchResponse(BaseModel):
+    id: str
+    channel_name: Optional[str] = None
+    user_id: Optional[int] = None
+    total: int
+    created_at: datetime
+    status_counts: Dict[str, int] = Field(default_factory=dict, description="各状态的任务数")
+    completed: int = 0
+    failed: int = 0
+    progress: int = Field(0, description="全部任务的平均进度百分比")
+    finished: bool = Field(False, description="全部任务都已结束（完成或失败）")
+    jobs: List[JobResponse] = []
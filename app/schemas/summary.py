@@ -1,5 +1,5 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 import re
 
@@ -16,6 +16,10 @@ class SummaryCreate(SummaryBase):
     keep_audio: bool = False
     video_title: Optional[str] = None
     channel_name: Optional[str] = None
+    transcript: Optional[str] = None
+    summary: Optional[str] = None
+    audio_path: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
 
 class SummaryUpdate(BaseModel):
     summary: Optional[str] = None
@@ -31,6 +35,20 @@ class SummaryResponse(SummaryBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     user_id: Optional[int] = None
+    metrics: Optional[Dict[str, Any]] = None
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class SummaryListItem(BaseModel):
+    """列表接口的精简条目，不包含完整转录；只返回请求的字段"""
+    id: int
+    video_id: Optional[str] = None
+    video_url: Optional[str] = None
+    video_title: Optional[str] = None
+    channel_name: Optional[str] = None
+    summary: Optional[str] = None
+    summary_preview: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    user_id: Optional[int] = None
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class TranscriptSegment(BaseModel):
+    id: int
+    start: float
+    end: float
+    text: str
+
+class TranscriptRangeResponse(BaseModel):
+    summary_id: int
+    start: float
+    end: Optional[float] = None
+    duration: float
+    segment_count: int
+    segments: List[TranscriptSegment]
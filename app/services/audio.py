@@ -0,0 +1,52 @@
+import os
+import subprocess
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Whisper 期望的采样率
+SAMPLE_RATE = 16000
+
+def decode_audio(audio_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    使用 ffmpeg 把音频文件直接解码为单声道 float32 PCM
+    
+    ffmpeg 的输出通过管道读入内存，不会生成中间文件，
+    结果可以直接传给 Whisper 的 transcribe。
+    
+    Args:
+        audio_path: 音频文件路径（任意 ffmpeg 支持的容器，如 webm、m4a、mp3）
+        sample_rate: 输出采样率
+    
+    Returns:
+        取值范围 [-1, 1] 的 float32 一维数组
+    
+    Raises:
+        FileNotFoundError: 音频文件不存在
+        RuntimeError: ffmpeg 解码失败
+    """
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError(f"Audio file not found at: {audio_path}")
+    
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        "-i", audio_path,
+        "-vn",
+        "-f", "f32le",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-",
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg 未安装或不在 PATH 中")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')[-500:]}")
+    
+    audio = np.frombuffer(result.stdout, dtype=np.float32)
+    logger.info(f"Decoded {audio_path} to {len(audio) / sample_rate:.1f}s of {sample_rate} Hz mono PCM")
+    return audio
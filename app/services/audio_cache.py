@@ -0,0 +1,436 @@
+import os
+import time
+import shutil
+import socket
+import hashlib
+import logging
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# 音频缓存目录，默认在 AUDIO_OUTPUT_DIR 下
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR") or os.path.join(os.getenv("AUDIO_OUTPUT_DIR", "."), "audio_cache")
+# 未固定的缓存文件总大小上限（MB），超出时按最近最少使用淘汰；0 表示关闭缓存
+AUDIO_CACHE_MAX_MB = float(os.getenv("AUDIO_CACHE_MAX_MB", "2048"))
+# 其他主机（如共享缓存卷的其他容器）登记的占用无法检查进程是否存活，超过该时长（小时）视为失效；
+# 同样用于清理其他进程遗留的临时下载目录
+AUDIO_CACHE_LEASE_MAX_HOURS = float(os.getenv("AUDIO_CACHE_LEASE_MAX_HOURS", "24"))
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AudioCache:
+    """
+    按内容寻址的音频文件缓存
+
+    文件以内容的 SHA-256 命名（objects/<前两位>/<digest><扩展名>），SQLite 索引记录
+    (video_id, 格式) 到文件的映射、文件大小和最近访问时间：
+    - 下载前先查索引，命中时直接复用已有文件
+    - 下载写入缓存目录下的私有临时目录，完成后 os.replace 原子地移动到最终路径，
+      其他任务不会读到写了一半的文件；内容相同的文件只保存一份
+    - 未固定的文件总大小超过 AUDIO_CACHE_MAX_MB 时按最近访问时间淘汰；
+      需要保留的音频（keep_audio）固定在缓存中，不计入容量也不会被淘汰
+    - 正在被任务使用的文件由持有者登记占用，占用期间不会被淘汰
+
+    多个工作进程可以共享同一缓存目录：每个进程使用自己的临时目录（tmp/<主机名>-<pid>），
+    占用除了在进程内按持有者计数外，还以 (digest, 进程) 记录在索引的 audio_leases 表中，
+    任何进程淘汰文件前都会跳过仍被存活进程占用的文件。
+    """
+
+    def __init__(self, directory: str = AUDIO_CACHE_DIR, max_mb: float = AUDIO_CACHE_MAX_MB):
+        self.directory = directory
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # digest -> 本进程中占用该文件的持有者（任务ID等）
+        self._leases: Dict[str, Set[str]] = {}
+        self._host = socket.gethostname()
+        self._owner = f"{self._host}-{os.getpid()}"
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _object_dir(self) -> str:
+        return os.path.join(self.directory, "objects")
+
+    def _tmp_root(self) -> str:
+        return os.path.join(self.directory, "tmp")
+
+    def _tmp_dir(self) -> str:
+        return os.path.join(self._tmp_root(), self._owner)
+
+    def _owner_alive(self, owner: str, created: float) -> bool:
+        """占用或临时目录的所属进程是否可能仍在运行"""
+        host, _, pid = owner.rpartition("-")
+        if host == self._host and pid.isdigit():
+            return _pid_alive(int(pid))
+        return time.time() - created < AUDIO_CACHE_LEASE_MAX_HOURS * 3600
+
+    def _clean_tmp(self) -> None:
+        """删除本进程上次运行（相同 pid）、已退出的本机进程以及过旧的临时下载目录"""
+        root = self._tmp_root()
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            if name != self._owner and self._owner_alive(name, mtime):
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+    @contextmanager
+    def _write(self, conn: sqlite3.Connection):
+        """立即获取写锁的事务，进程间的占用登记和淘汰互斥执行"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def _object_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self._object_dir(), digest[:2], f"{digest}{ext}")
+
+    def _db(self) -> sqlite3.Connection:
+        """
+        首次使用时打开索引，清理遗留的临时文件、失效的占用和索引中缺失的文件；调用方持有锁
+
+        只清理本进程上次运行和已退出进程遗留的内容，不影响共享缓存目录的其他进程。
+        """
+        if self._conn is not None:
+            return self._conn
+        os.makedirs(self._object_dir(), exist_ok=True)
+        os.makedirs(self._tmp_root(), exist_ok=True)
+        self._clean_tmp()
+        os.makedirs(self._tmp_dir(), exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.directory, "index.db"), timeout=30, check_same_thread=False)
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audio_objects ("
+                "digest TEXT PRIMARY KEY, ext TEXT NOT NULL, size INTEGER NOT NULL, "
+                "last_access REAL NOT NULL, pinned INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_audio_objects_last_access ON audio_objects (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS audio_keys (key TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audio_leases ("
+                "digest TEXT NOT NULL, owner TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (digest, owner))"
+            )
+            stale = [
+                owner for owner, created in conn.execute("SELECT owner, MIN(created) FROM audio_leases GROUP BY owner")
+                if owner == self._owner or not self._owner_alive(owner, created)
+            ]
+            conn.executemany("DELETE FROM audio_leases WHERE owner = ?", [(owner,) for owner in stale])
+            missing = [
+                digest for digest, ext in conn.execute("SELECT digest, ext FROM audio_objects")
+                if not os.path.exists(self._object_path(digest, ext))
+            ]
+            for digest in missing:
+                self._drop(conn, digest)
+        if missing:
+            logger.warning(f"Audio cache index had {len(missing)} missing files, removed from index")
+        self._conn = conn
+        return conn
+
+    @staticmethod
+    def _drop(conn: sqlite3.Connection, digest: str) -> None:
+        conn.execute("DELETE FROM audio_keys WHERE digest = ?", (digest,))
+        conn.execute("DELETE FROM audio_objects WHERE digest = ?", (digest,))
+        conn.execute("DELETE FROM audio_leases WHERE digest = ?", (digest,))
+
+    @staticmethod
+    def _key(video_id: str, variant: str) -> str:
+        return f"{video_id}:{variant}"
+
+    def _lease(self, conn: sqlite3.Connection, digest: str, holder: Optional[str]) -> None:
+        """登记占用，本进程第一个持有者同时写入 audio_leases；调用方持有锁并处于写事务中"""
+        if holder is None:
+            return
+        if digest not in self._leases:
+            conn.execute(
+                "INSERT OR IGNORE INTO audio_leases (digest, owner, created) VALUES (?, ?, ?)",
+                (digest, self._owner, time.time())
+            )
+        self._leases.setdefault(digest, set()).add(holder)
+
+    def _leased_elsewhere(self, conn: sqlite3.Connection, digest: str) -> bool:
+        """是否有其他存活的进程占用该文件；调用方持有锁"""
+        return any(
+            owner != self._owner and self._owner_alive(owner, created)
+            for owner, created in conn.execute("SELECT owner, created FROM audio_leases WHERE digest = ?", (digest,))
+        )
+
+    def get(self, video_id: str, variant: str, holder: Optional[str] = None, pin: bool = False) -> Optional[str]:
+        """
+        查找缓存的音频文件，命中时更新访问时间
+
+        Args:
+            video_id: YouTube视频ID
+            variant: 音频格式（native / mp3）
+            holder: 占用者标识，登记后文件在 release 之前不会被淘汰
+            pin: 是否把文件固定在缓存中
+
+        Returns:
+            文件路径，未命中时返回 None
+        """
+        with self._lock:
+            conn = self._db()
+            row = conn.execute(
+                "SELECT o.digest, o.ext FROM audio_keys k JOIN audio_objects o ON o.digest = k.digest WHERE k.key = ?",
+                (self._key(video_id, variant),)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            digest, ext = row
+            path = self._object_path(digest, ext)
+            # 检查文件和登记占用在同一个写事务中，其他进程不会在两者之间淘汰该文件
+            with self._write(conn):
+                found = conn.execute("SELECT 1 FROM audio_objects WHERE digest = ?", (digest,)).fetchone()
+                if found is None or not os.path.exists(path):
+                    self._drop(conn, digest)
+                    path = None
+                else:
+                    conn.execute(
+                        "UPDATE audio_objects SET last_access = ?, pinned = MAX(pinned, ?) WHERE digest = ?",
+                        (time.time(), int(pin), digest)
+                    )
+                    self._lease(conn, digest, holder)
+            if path is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return path
+
+    def put(self, video_id: str, variant: str, source: str, holder: Optional[str] = None, pin: bool = False) -> str:
+        """
+        把下载好的文件移入缓存
+
+        source 应位于 new_tmp_dir() 创建的临时目录中（与缓存同一文件系统），
+        计算摘要后原子地重命名为最终路径；内容相同的文件已存在时丢弃 source。
+
+        Returns:
+            缓存中的文件路径
+        """
+        digest = _file_digest(source)
+        ext = os.path.splitext(source)[1]
+        size = os.path.getsize(source)
+        with self._lock:
+            conn = self._db()
+            with self._write(conn):
+                existing = conn.execute("SELECT ext FROM audio_objects WHERE digest = ?", (digest,)).fetchone()
+                if existing is not None and os.path.exists(self._object_path(digest, existing[0])):
+                    ext = existing[0]
+                    os.remove(source)
+                else:
+                    path = self._object_path(digest, ext)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(source, path)
+                conn.execute(
+                    "INSERT INTO audio_objects (digest, ext, size, last_access, pinned) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (digest) DO UPDATE SET ext = excluded.ext, size = excluded.size, "
+                    "last_access = excluded.last_access, pinned = MAX(pinned, excluded.pinned)",
+                    (digest, ext, size, time.time(), int(pin))
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO audio_keys (key, digest) VALUES (?, ?)",
+                    (self._key(video_id, variant), digest)
+                )
+                self._lease(conn, digest, holder)
+            self._evict(conn, keep=digest)
+        logger.info(f"Cached audio for {video_id} ({variant}): {digest[:12]}, {size / 1024 / 1024:.1f} MB")
+        return self._object_path(digest, ext)
+
+    def _evict(self, conn: sqlite3.Connection, keep: str) -> None:
+        """
+        按最近访问时间淘汰未固定、未被占用的文件，直到总大小不超过上限；调用方持有锁
+
+        在写事务中执行，其他进程不能同时登记占用，已登记的占用（包括其他进程的）都会被跳过。
+        """
+        with self._write(conn):
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM audio_objects WHERE pinned = 0").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            candidates = conn.execute(
+                "SELECT digest, ext, size FROM audio_objects WHERE pinned = 0 ORDER BY last_access"
+            ).fetchall()
+            for digest, ext, size in candidates:
+                if total <= self.max_bytes:
+                    break
+                if digest == keep or self._leases.get(digest) or self._leased_elsewhere(conn, digest):
+                    continue
+                try:
+                    os.remove(self._object_path(digest, ext))
+                except FileNotFoundError:
+                    pass
+                self._drop(conn, digest)
+                total -= size
+                self.evictions += 1
+                self.evicted_bytes += size
+                logger.info(f"Evicted cached audio {digest[:12]} ({size / 1024 / 1024:.1f} MB)")
+        if total > self.max_bytes:
+            logger.warning(f"Audio cache over quota ({total / 1024 / 1024:.1f} MB), remaining files are in use")
+
+    def new_tmp_dir(self) -> str:
+        """创建下载用的私有临时目录，与缓存文件在同一文件系统上以便原子重命名"""
+        with self._lock:
+            self._db()
+        # 其他进程可能把长时间空闲的临时目录当作遗留目录清理掉
+        os.makedirs(self._tmp_dir(), exist_ok=True)
+        return tempfile.mkdtemp(dir=self._tmp_dir())
+
+    def fetch(
+        self,
+        video_id: str,
+        variant: str,
+        download: Callable[[str], str],
+        holder: Optional[str] = None,
+        pin: bool = False
+    ) -> str:
+        """
+        获取音频文件：命中缓存时直接返回，否则调用 download(临时目录) 下载后移入缓存
+
+        Args:
+            video_id: YouTube视频ID
+            variant: 音频格式（native / mp3）
+            download: 下载函数，参数为临时目录，返回下载的文件路径
+            holder: 占用者标识，用完后调用 release
+            pin: 是否把文件固定在缓存中（需要保留的音频）
+
+        Returns:
+            缓存中的文件路径
+        """
+        path = self.get(video_id, variant, holder=holder, pin=pin)
+        if path is not None:
+            logger.info(f"Audio cache hit for {video_id} ({variant}): {path}")
+            return path
+        tmp_dir = self.new_tmp_dir()
+        try:
+            return self.put(video_id, variant, download(tmp_dir), holder=holder, pin=pin)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def contains(self, path: str) -> bool:
+        """路径是否为缓存中的文件"""
+        objects = os.path.abspath(self._object_dir())
+        return os.path.commonpath([objects, os.path.abspath(path)]) == objects
+
+    def lease(self, path: str, holder: str) -> bool:
+        """
+        为已在缓存中的文件登记占用者（如服务重启后恢复的任务），release 之前不会被淘汰
+
+        Returns:
+            文件是否仍在缓存中
+        """
+        if not self.enabled or not self.contains(path):
+            return False
+        digest = os.path.splitext(os.path.basename(path))[0]
+        with self._lock:
+            conn = self._db()
+            with self._write(conn):
+                row = conn.execute("SELECT 1 FROM audio_objects WHERE digest = ?", (digest,)).fetchone()
+                if row is None or not os.path.exists(path):
+                    return False
+                self._lease(conn, digest, holder)
+        return True
+
+    def release(self, path: Optional[str], holder: Optional[str], keep: bool = False) -> None:
+        """
+        任务用完音频文件后调用，同一持有者重复调用没有影响
+
+        缓存中的文件只解除该持有者的占用，之后可以被淘汰；
+        不在缓存中的文件（缓存关闭时下载的）除非 keep 为 True，直接删除。
+        """
+        if not path:
+            return
+        if self.enabled and self.contains(path):
+            digest = os.path.splitext(os.path.basename(path))[0]
+            with self._lock:
+                holders = self._leases.get(digest)
+                if holders is not None:
+                    holders.discard(holder)
+                    if not holders:
+                        del self._leases[digest]
+                        conn = self._db()
+                        with conn:
+                            conn.execute(
+                                "DELETE FROM audio_leases WHERE digest = ? AND owner = ?", (digest, self._owner)
+                            )
+            return
+        if not keep and os.path.exists(path):
+            os.remove(path)
+            logger.info(f"Removed audio file: {path}")
+
+    def close(self) -> None:
+        """关闭索引并撤销本进程的占用（未完成的任务在下次启动时重新登记）"""
+        with self._lock:
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM audio_leases WHERE owner = ?", (self._owner,))
+                self._conn.close()
+            self._conn = None
+            self._leases.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回文件数、占用空间、命中和淘汰计数"""
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            conn = self._db()
+            count, size, pinned_count, pinned_size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(pinned), 0), "
+                "COALESCE(SUM(CASE WHEN pinned THEN size ELSE 0 END), 0) FROM audio_objects"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "directory": self.directory,
+                "files": count,
+                "size_mb": round((size - pinned_size) / 1024 / 1024, 1),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 1),
+                "pinned_files": pinned_count,
+                "pinned_mb": round(pinned_size / 1024 / 1024, 1),
+                "in_use": len(self._leases),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "evicted_mb": round(self.evicted_bytes / 1024 / 1024, 1),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# 进程级共享的音频缓存
+audio_cache = AudioCache()
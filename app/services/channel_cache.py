@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.youtube_search import normalize_channel, search_channel_videos
+
+logger = logging.getLogger(__name__)
+
+# 结果在 TTL 内直接返回；过期后 STALE_TTL 内先返回旧结果并在后台刷新，再之后同步重新获取
+CHANNEL_CACHE_TTL = float(os.getenv("CHANNEL_CACHE_TTL", "900"))
+CHANNEL_CACHE_STALE_TTL = float(os.getenv("CHANNEL_CACHE_STALE_TTL", "86400"))
+# 内存中最多缓存的 (频道, 数量) 组合，超出时淘汰最久未使用的条目
+CHANNEL_CACHE_SIZE = int(os.getenv("CHANNEL_CACHE_SIZE", "256"))
+# 可选的 SQLite 缓存文件，设置后缓存在重启后仍然有效
+CHANNEL_CACHE_DB = os.getenv("CHANNEL_CACHE_DB", "")
+# 执行 yt-dlp 提取的线程数
+CHANNEL_SEARCH_WORKERS = int(os.getenv("CHANNEL_SEARCH_WORKERS", "4"))
+
+# 结果来源，通过 X-Cache 响应头返回
+CACHE_HIT = "HIT"
+CACHE_STALE = "STALE"
+CACHE_MISS = "MISS"
+
+CacheKey = Tuple[str, int]
+
+
+class _DiskTier:
+    """SQLite 缓存层，保存每个键最近一次获取的结果"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS channel_search_cache ("
+                "channel TEXT NOT NULL, max_results INTEGER NOT NULL, fetched_at REAL NOT NULL, videos TEXT NOT NULL, "
+                "PRIMARY KEY (channel, max_results))"
+            )
+
+    def get(self, key: CacheKey) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, videos FROM channel_search_cache WHERE channel = ? AND max_results = ?", key
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def put(self, key: CacheKey, fetched_at: float, videos: List[Dict[str, Any]]) -> None:
+        payload = json.dumps(videos, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO channel_search_cache (channel, max_results, fetched_at, videos) VALUES (?, ?, ?, ?)",
+                (key[0], key[1], fetched_at, payload)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ChannelSearchCache:
+    """
+    频道视频搜索结果缓存
+
+    按 (规范化频道, max_results) 缓存 search_channel_videos 的结果：
+    - 新鲜（TTL 内）：直接返回
+    - 过期但在 STALE_TTL 内：返回旧结果，同时在后台刷新（同一键只刷新一次）
+    - 未命中或过旧：在线程池中执行 yt-dlp 提取，同一键的并发请求共享一次提取
+
+    内存层按 LRU 淘汰；配置 CHANNEL_CACHE_DB 时结果同时写入 SQLite，重启后先从文件加载。
+    空结果通常是提取失败，不写入缓存。
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, int], List[Dict[str, Any]]] = search_channel_videos,
+        ttl: float = CHANNEL_CACHE_TTL,
+        stale_ttl: float = CHANNEL_CACHE_STALE_TTL,
+        max_size: int = CHANNEL_CACHE_SIZE,
+        db_path: str = CHANNEL_CACHE_DB,
+        workers: int = CHANNEL_SEARCH_WORKERS,
+    ):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.db_path = db_path
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, Future] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._disk: Optional[_DiskTier] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="channel-search")
+        return self._pool
+
+    def _get_disk(self) -> Optional[_DiskTier]:
+        """首次使用时打开 SQLite 缓存文件；调用方持有锁"""
+        if self._disk is None and self.db_path:
+            try:
+                self._disk = _DiskTier(self.db_path)
+            except sqlite3.Error as e:
+                logger.error(f"Channel cache database unavailable, using memory only: {str(e)}")
+                self.db_path = ""
+        return self._disk
+
+    def _store(self, key: CacheKey, fetched_at: float, videos: List[Dict[str, Any]]) -> None:
+        """写入内存层并按容量淘汰；调用方持有锁"""
+        self._entries[key] = (fetched_at, videos)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _lookup(self, key: CacheKey) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        """依次查找内存层和 SQLite 层；调用方持有锁"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        disk = self._get_disk()
+        if disk is None:
+            return None
+        entry = disk.get(key)
+        if entry is not None:
+            self.disk_hits += 1
+            self._store(key, *entry)
+        return entry
+
+    def _run_fetch(self, key: CacheKey, channel_name: str, max_results: int) -> List[Dict[str, Any]]:
+        """在线程池中执行提取，成功后写入缓存"""
+        try:
+            videos = self.fetch(channel_name, max_results)
+            if videos:
+                fetched_at = time.time()
+                with self._lock:
+                    self._store(key, fetched_at, videos)
+                    disk = self._get_disk()
+                if disk is not None:
+                    try:
+                        disk.put(key, fetched_at, videos)
+                    except sqlite3.Error as e:
+                        logger.warning(f"Failed to persist channel search for {key[0]}: {str(e)}")
+            return videos
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _submit(self, key: CacheKey, channel_name: str, max_results: int) -> Tuple[Future, bool]:
+        """提交提取任务，同一键已有进行中的任务时复用；调用方持有锁"""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = self._get_pool().submit(self._run_fetch, key, channel_name, max_results)
+        self._inflight[key] = future
+        return future, True
+
+    def _on_refresh_done(self, future: Future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            with self._lock:
+                self.refresh_errors += 1
+            logger.warning(f"Background channel refresh failed, keeping stale result: {str(error)}")
+
+    async def search(self, channel_name: str, max_results: int = 20) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        获取频道视频列表，优先使用缓存
+
+        Args:
+            channel_name: YouTube博主名字、频道名称或频道链接
+            max_results: 最大返回结果数量
+
+        Returns:
+            (视频列表, 结果来源 HIT/STALE/MISS)
+
+        Raises:
+            Exception: 未命中缓存且提取失败
+        """
+        key = (normalize_channel(channel_name), max_results)
+        now = time.time()
+        with self._lock:
+            entry = self._lookup(key)
+            age = now - entry[0] if entry is not None else None
+            if age is not None and age < self.ttl:
+                self.hits += 1
+                return entry[1], CACHE_HIT
+            if age is not None and age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                future, started = self._submit(key, channel_name, max_results)
+                if started:
+                    self.refreshes += 1
+                    logger.info(f"Refreshing stale channel search in background: {key[0]} ({age:.0f}s old)")
+                    future.add_done_callback(self._on_refresh_done)
+                return entry[1], CACHE_STALE
+            self.misses += 1
+            future, started = self._submit(key, channel_name, max_results)
+            if not started:
+                self.coalesced += 1
+
+        videos = await asyncio.wrap_future(future)
+        return videos, CACHE_MISS
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def shutdown(self) -> None:
+        """关闭提取线程池和 SQLite 连接"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._inflight.clear()
+            if self._disk is not None:
+                self._disk.close()
+            self._disk = None
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中、过期命中、未命中、合并和后台刷新计数"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "persistent": bool(self.db_path),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "evictions": self.evictions,
+                "in_flight": len(self._inflight),
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+
+# 进程级共享的频道搜索缓存
+channel_search_cache = ChannelSearchCache()
@@ -0,0 +1,210 @@
+import os
+import re
+import math
+import logging
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken 为可选依赖，缺失时使用估算器
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# 各模型的上下文窗口（token）
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-3.5-turbo-1106": 16385,
+    "gpt-3.5-turbo-0125": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# 可通过环境变量覆盖模型的上下文窗口
+CONTEXT_WINDOW_OVERRIDE = os.getenv("OPENAI_CONTEXT_WINDOW")
+
+# 估算器参数：基于 cl100k_base 对中文和英文转录文本的统计校准
+CJK_TOKENS_PER_CHAR = 1.3
+OTHER_TOKENS_PER_CHAR = 0.27
+
+# 中日韩字符及全角标点
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+
+# 句子切分：在句末标点之后切分，标点保留在句子中
+_SENTENCE_PATTERN = re.compile(r'.*?(?:[。！？.!?]+\s*|$)', re.S)
+
+
+def get_context_window(model: str) -> int:
+    """获取模型的上下文窗口大小"""
+    if CONTEXT_WINDOW_OVERRIDE:
+        return int(CONTEXT_WINDOW_OVERRIDE)
+    if model in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[model]
+    # 带日期后缀的模型名按最长前缀匹配
+    for name in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_CONTEXT_WINDOWS[name]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: Optional[str]):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Failed to load tiktoken encoding, falling back to estimator: {str(e)}")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """按字符类别估算 token 数（不依赖分词器）"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return math.ceil(cjk * CJK_TOKENS_PER_CHAR + (len(text) - cjk) * OTHER_TOKENS_PER_CHAR)
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    统计文本的 token 数
+
+    安装了 tiktoken 时使用模型对应的分词器，否则使用校准过的估算器。
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _decode_complete(encoding, tokens: List[int]) -> Optional[str]:
+    """解码 token 序列，末尾是不完整的 UTF-8 字符时返回 None"""
+    try:
+        return encoding.decode_bytes(tokens).decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def _hard_split(sentence: str, max_tokens: int, model: Optional[str]) -> List[Tuple[str, int]]:
+    """把超过预算的单个句子强制切分成不超过 max_tokens 的片段"""
+    encoding = _get_encoding(model)
+    pieces = []
+    if encoding is not None:
+        tokens = encoding.encode(sentence, disallowed_special=())
+        start = 0
+        while start < len(tokens):
+            # 字节级 BPE 可能把一个中文字符拆到多个 token 中，
+            # 窗口末尾回退到完整字符的边界，避免解码出 U+FFFD
+            limit = min(start + max_tokens, len(tokens))
+            end = limit
+            text = _decode_complete(encoding, tokens[start:end])
+            while text is None and end - start > 1:
+                end -= 1
+                text = _decode_complete(encoding, tokens[start:end])
+            # 预算小于单个字符的 token 数时向后扩展，保证前进
+            end = end if text is not None else limit
+            while text is None and end < len(tokens):
+                end += 1
+                text = _decode_complete(encoding, tokens[start:end])
+            if text is None:
+                text = encoding.decode(tokens[start:end])
+            pieces.append((text, end - start))
+            start = end
+        return pieces
+
+    start = 0
+    weight = 0.0
+    for i, char in enumerate(sentence):
+        char_weight = CJK_TOKENS_PER_CHAR if _CJK_PATTERN.match(char) else OTHER_TOKENS_PER_CHAR
+        if weight + char_weight > max_tokens and i > start:
+            pieces.append((sentence[start:i], math.ceil(weight)))
+            start = i
+            weight = 0.0
+        weight += char_weight
+    if start < len(sentence):
+        pieces.append((sentence[start:], math.ceil(weight)))
+    return pieces
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int = 3000,
+    overlap_tokens: int = 0,
+    model: Optional[str] = None
+) -> List[str]:
+    """
+    按 token 预算把长文本切分成块
+
+    在句子边界处切分，单遍扫描完成；单个句子超过预算时强制切分。
+    设置 overlap_tokens 时，每个块开头会重复上一个块末尾不超过该预算的完整句子。
+
+    Args:
+        text: 要分割的文本
+        max_tokens: 每个块的最大 token 数
+        overlap_tokens: 相邻块之间重叠的 token 数
+        model: 用于选择分词器的模型名称
+
+    Returns:
+        文本块列表
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+    chunks: List[str] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    # 当前块中不属于重叠部分的句子数
+    fresh = 0
+
+    def flush() -> None:
+        nonlocal current, current_tokens, fresh
+        if not fresh:
+            return
+        chunks.append("".join(sentence for sentence, _ in current))
+        # 保留末尾的句子作为下一个块的重叠部分
+        carried: List[Tuple[str, int]] = []
+        carried_tokens = 0
+        if overlap_tokens:
+            for sentence, tokens in reversed(current):
+                if carried_tokens + tokens > overlap_tokens:
+                    break
+                carried.append((sentence, tokens))
+                carried_tokens += tokens
+            carried.reverse()
+        current = carried
+        current_tokens = carried_tokens
+        fresh = 0
+
+    for match in _SENTENCE_PATTERN.finditer(text):
+        sentence = match.group(0)
+        if not sentence:
+            continue
+        tokens = count_tokens(sentence, model)
+
+        if tokens > max_tokens:
+            flush()
+            # 重叠部分不与强制切分的片段拼接，避免再次超出预算
+            current, current_tokens = [], 0
+            chunks.extend(piece for piece, _ in _hard_split(sentence, max_tokens, model))
+            continue
+
+        if current_tokens + tokens > max_tokens:
+            flush()
+            # 重叠部分加上当前句子仍超预算时丢弃重叠
+            if current_tokens + tokens > max_tokens:
+                current, current_tokens = [], 0
+
+        current.append((sentence, tokens))
+        current_tokens += tokens
+        fresh += 1
+
+    flush()
+    return chunks
@@ -0,0 +1,206 @@
+import os
+import uuid
+import shutil
+import logging
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.crud.summary import extract_video_id
+from app.services.audio_cache import audio_cache
+from app.services.downloader import download_audio, DEFAULT_OUTPUT_DIR
+
+logger = logging.getLogger(__name__)
+
+DownloadKey = Tuple[str, bool]
+
+
+class _Download:
+    """一次下载及其使用者；path 在下载完成后设置"""
+
+    def __init__(self, key: DownloadKey):
+        self.key = key
+        self.future: Future = Future()
+        self.holders: Set[str] = set()
+        self.path: Optional[str] = None
+        # 音频缓存中登记占用时使用的标识，所有使用者共用一份占用
+        self.lease = f"download-{uuid.uuid4().hex}"
+        # 缓存关闭时下载到的私有目录
+        self.private_dir: Optional[str] = None
+
+
+class DownloadCoordinator:
+    """
+    按 video_id 协调音频下载
+
+    同一视频（和同一 keep_audio 选项）同时只下载一次：第一个请求者执行下载，
+    后到的请求者登记为使用者并等待同一个 Future，下载失败时所有等待者都收到该错误。
+    文件按使用者计数，最后一个使用者 release 之后才清理：
+    - 启用音频缓存时解除占用，文件留在缓存中按 LRU 淘汰
+    - 缓存关闭时每次下载写入独立的目录，互不覆盖，不需要保留时删除
+
+    使用者以任务ID等标识登记，同一使用者重复 release 没有影响；
+    尚未拿到路径的使用者以 release(None, holder) 撤销登记。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 进行中的下载
+        self._inflight: Dict[DownloadKey, _Download] = {}
+        # 文件路径 -> 已完成且仍有使用者的下载
+        self._active: Dict[str, _Download] = {}
+        self.downloads = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def acquire(self, video_url: str, holder: str, keep_audio: bool = False) -> str:
+        """
+        获取视频的音频文件，用完后调用 release(path, holder)
+
+        Args:
+            video_url: YouTube视频链接
+            holder: 使用者标识（如任务ID）
+            keep_audio: 是否需要保留 MP3 归档副本
+
+        Returns:
+            音频文件路径
+
+        Raises:
+            Exception: 下载失败（等待同一下载的使用者收到同一个错误）
+        """
+        key = (extract_video_id(video_url) or video_url, keep_audio)
+        with self._lock:
+            download = self._inflight.get(key)
+            leader = download is None
+            if leader:
+                download = _Download(key)
+                self._inflight[key] = download
+                self.downloads += 1
+            else:
+                self.coalesced += 1
+                logger.info(f"Waiting for in-flight download of {key[0]}")
+            # 在结果发布之前登记，领头者完成后立即 release 也不会清理掉等待者要用的文件
+            download.holders.add(holder)
+
+        if leader:
+            self._run(download, video_url, keep_audio)
+        return download.future.result()
+
+    def _run(self, download: _Download, video_url: str, keep_audio: bool) -> None:
+        try:
+            if audio_cache.enabled:
+                path = download_audio(video_url, keep_audio=keep_audio, holder=download.lease)
+            else:
+                os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
+                download.private_dir = tempfile.mkdtemp(prefix="download-", dir=DEFAULT_OUTPUT_DIR)
+                path = download_audio(video_url, output_path=download.private_dir, keep_audio=keep_audio)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(download.key, None)
+                self.failures += 1
+            if download.private_dir is not None:
+                shutil.rmtree(download.private_dir, ignore_errors=True)
+            download.future.set_exception(e)
+            return
+
+        with self._lock:
+            self._inflight.pop(download.key, None)
+            download.path = path
+            previous = self._active.get(path)
+            abandoned = not download.holders
+            if previous is not None:
+                # 缓存命中同一文件的另一次下载仍有使用者，合并计数
+                previous.holders |= download.holders
+            elif not abandoned:
+                self._active[path] = download
+        if previous is not None:
+            audio_cache.release(path, download.lease)
+        elif abandoned:
+            # 所有使用者都在下载完成前撤销了登记（如客户端断开），立即清理
+            self._cleanup(download)
+        download.future.set_result(path)
+
+    def adopt(self, video_url: str, path: str, holder: str, keep_audio: bool = False) -> bool:
+        """
+        登记服务重启前下载的音频文件的使用者（从转录阶段恢复的任务），之后同样以 release 释放
+
+        占用只保存在内存中，重启后需要重新登记，否则缓存中的文件可能在转录之前被淘汰。
+
+        Returns:
+            文件是否仍然存在；不存在时调用方应重新下载
+        """
+        download = _Download((extract_video_id(video_url) or video_url, keep_audio))
+        download.path = path
+        cached = audio_cache.enabled and audio_cache.contains(path)
+        if not (cached and audio_cache.lease(path, download.lease)):
+            if not os.path.exists(path):
+                return False
+            parent = os.path.dirname(os.path.abspath(path))
+            if (os.path.basename(parent).startswith("download-")
+                    and os.path.dirname(parent) == os.path.abspath(DEFAULT_OUTPUT_DIR)):
+                download.private_dir = parent
+
+        with self._lock:
+            existing = self._active.get(path)
+            if existing is not None:
+                existing.holders.add(holder)
+            else:
+                download.holders.add(holder)
+                self._active[path] = download
+        if existing is not None:
+            audio_cache.release(path, download.lease, keep=True)
+        return True
+
+    def release(self, path: Optional[str], holder: str, keep: bool = False) -> None:
+        """
+        使用者用完音频文件后调用；最后一个使用者 release 后清理文件
+
+        path 为 None 时（如客户端在下载完成前断开、任务在记录音频路径前失败）按 holder 撤销登记，
+        进行中的下载完成后如已没有使用者会立即清理。
+        不是通过 acquire / adopt 登记的文件按 audio_cache.release 处理。
+        """
+        with self._lock:
+            download = self._find_holder(holder) if path is None else self._active.get(path)
+            if download is not None:
+                download.holders.discard(holder)
+                # 仍有使用者，或下载尚未完成（完成时由 _run 清理）
+                if download.holders or download.path is None:
+                    return
+                del self._active[download.path]
+        if download is not None:
+            self._cleanup(download, keep)
+        elif path is not None:
+            audio_cache.release(path, holder, keep=keep)
+
+    def _find_holder(self, holder: str) -> Optional[_Download]:
+        """查找登记了 holder 的进行中或使用中的下载；调用方需持有 self._lock"""
+        for download in list(self._inflight.values()) + list(self._active.values()):
+            if holder in download.holders:
+                return download
+        return None
+
+    def _cleanup(self, download: _Download, keep: bool = False) -> None:
+        """最后一个使用者离开后解除缓存占用，或删除未缓存的文件"""
+        keep = keep or download.key[1]
+        if download.private_dir is None:
+            audio_cache.release(download.path, download.lease, keep=keep)
+        elif not keep:
+            shutil.rmtree(download.private_dir, ignore_errors=True)
+            logger.info(f"Removed audio file after last consumer: {download.path}")
+
+    def stats(self) -> Dict[str, Any]:
+        """返回下载次数、合并的请求数和当前使用中的文件数"""
+        with self._lock:
+            return {
+                "downloads": self.downloads,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "in_flight": len(self._inflight),
+                "active_files": len(self._active),
+                "holders": sum(len(download.holders) for download in self._active.values()),
+            }
+
+
+# 进程级共享的下载协调器
+download_coordinator = DownloadCoordinator()
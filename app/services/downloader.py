@@ -7,19 +7,30 @@ import re
 import uuid
 import logging
 from pathlib import Path
+from typing import Optional
+
+from app.crud.summary import extract_video_id
+from app.services.audio_cache import audio_cache
 
 logger = logging.getLogger(__name__)
 
 # 从环境变量获取默认输出目录，如果没有设置则使用当前目录
 DEFAULT_OUTPUT_DIR = os.getenv("AUDIO_OUTPUT_DIR", ".")
 
-def download_with_ytdlp(url: str, output_dir: str = None) -> str:
+# 下载模式：native 保留原始音频容器（不转码），mp3 转码为 192k MP3
+AUDIO_DOWNLOAD_MODE = os.getenv("AUDIO_DOWNLOAD_MODE", "native").lower()
+
+def download_with_ytdlp(url: str, output_dir: str = None, keep_audio: bool = False) -> str:
     """
     使用 yt-dlp 下载音频文件
     
+    默认保留 bestaudio 的原始容器（webm/m4a），不再经过 MP3 有损转码；
+    只有需要保留归档副本（keep_audio）或配置为 mp3 模式时才转码为 MP3。
+    
     Args:
         url: YouTube 视频 URL
         output_dir: 输出目录，如果为 None 则使用环境变量中的配置
+        keep_audio: 是否需要保留 MP3 归档副本
         
     Returns:
         str: 下载的音频文件路径
@@ -53,25 +64,33 @@ def download_with_ytdlp(url: str, output_dir: str = None) -> str:
             raise PermissionError(f"没有目录 {output_dir} 的写入权限")
         
         # 配置下载选项
+        convert_to_mp3 = keep_audio or AUDIO_DOWNLOAD_MODE == "mp3"
         ydl_opts = {
             'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
             'outtmpl': os.path.join(output_dir, '%(id)s.%(ext)s'),
             'quiet': True,
             'no_warnings': True,
             'cookiesfrombrowser': ('chrome',),
         }
+        if convert_to_mp3:
+            ydl_opts['postprocessors'] = [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '192',
+            }]
         
         # 下载音频
-        logger.info(f"Starting download from URL: {url}")
+        logger.info(f"Starting download from URL: {url} (mp3: {convert_to_mp3})")
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=True)
             video_id = info['id']
-            output_file = os.path.join(output_dir, f"{video_id}.mp3")
+            if convert_to_mp3:
+                output_file = os.path.join(output_dir, f"{video_id}.mp3")
+            else:
+                requested = info.get('requested_downloads') or []
+                output_file = requested[0].get('filepath') if requested else None
+                if not output_file:
+                    output_file = ydl.prepare_filename(info)
             
             if not os.path.exists(output_file):
                 logger.error(f"Downloaded file not found: {output_file}")
@@ -87,19 +106,42 @@ def download_with_ytdlp(url: str, output_dir: str = None) -> str:
         logger.error(f"Unexpected error during download: {str(e)}")
         raise Exception(f"下载过程中发生错误: {str(e)}")
 
-def download_audio(video_url: str, output_path: str = None, filename: str = None) -> str:
+def download_audio(
+    video_url: str,
+    output_path: str = None,
+    filename: str = None,
+    keep_audio: bool = False,
+    holder: Optional[str] = None
+) -> str:
     """
     下载YouTube视频的音频部分
     
+    未指定 output_path 且启用了音频缓存时，先查找缓存，未命中才下载并移入缓存；
+    调用方用完文件后应调用 audio_cache.release(path, holder)。
+    任务和流式接口通过 download_coordinator 调用，同一视频的并发请求只下载一次。
+    
     Args:
         video_url: YouTube视频链接
-        output_path: 音频文件保存路径
+        output_path: 音频文件保存路径，指定时不使用缓存
         filename: 音频文件名，默认使用唯一ID生成
+        keep_audio: 是否需要保留 MP3 归档副本（缓存中的副本固定，不会被淘汰）
+        holder: 缓存占用者标识（如任务ID），占用期间文件不会被淘汰
     
     Returns:
         音频文件的完整路径
     """
     try:
+        video_id = extract_video_id(video_url)
+        if output_path is None and audio_cache.enabled and video_id:
+            variant = "mp3" if keep_audio or AUDIO_DOWNLOAD_MODE == "mp3" else "native"
+            return audio_cache.fetch(
+                video_id,
+                variant,
+                lambda tmp_dir: download_with_ytdlp(video_url, tmp_dir, keep_audio=keep_audio),
+                holder=holder,
+                pin=keep_audio
+            )
+        
         # 如果没有提供输出路径，使用默认路径
         if output_path is None:
             output_path = DEFAULT_OUTPUT_DIR
@@ -109,7 +151,7 @@ def download_audio(video_url: str, output_path: str = None, filename: str = None
             filename = f"audio_{uuid.uuid4().hex[:8]}.mp4"
             
         # 使用 yt-dlp 下载
-        return download_with_ytdlp(video_url, output_path)
+        return download_with_ytdlp(video_url, output_path, keep_audio=keep_audio)
         
     except Exception as e:
         logger.error(f"All download methods failed: {str(e)}")
@@ -0,0 +1,518 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.database.base import SessionLocal
+from app.models.job import (
+    SummaryJob,
+    SummaryBatch,
+    JOB_DOWNLOADING,
+    JOB_TRANSCRIBING,
+    JOB_SUMMARIZING,
+    JOB_COMPLETED,
+    JOB_FAILED,
+)
+from app.crud.job import (
+    create_job,
+    create_batch,
+    get_job,
+    get_active_job,
+    get_unfinished_jobs,
+    count_unfinished_jobs,
+    update_job
+)
+from app.crud.summary import (
+    save_summary,
+    get_summary,
+    attach_summary_to_user,
+    extract_video_id
+)
+from app.crud.transcript import pack_segments
+from app.schemas.summary import SummaryCreate
+from app.services.download_coordinator import download_coordinator
+from app.services.transcriber import transcribe_with_segments
+from app.services.audio import decode_audio, SAMPLE_RATE
+from app.services.summarizer import summarize_text
+from app.services.summary_cache import summary_cache
+from app.services.tracing import (
+    JobTrace,
+    pipeline_metrics,
+    STAGE_DOWNLOAD,
+    STAGE_DECODE,
+    STAGE_TRANSCRIBE,
+    STAGE_SUMMARIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+# 各阶段工作线程数量
+DOWNLOAD_WORKERS = int(os.getenv("JOB_DOWNLOAD_WORKERS", "2"))
+TRANSCRIBE_WORKERS = int(os.getenv("JOB_TRANSCRIBE_WORKERS", "1"))
+SUMMARIZE_WORKERS = int(os.getenv("JOB_SUMMARIZE_WORKERS", "4"))
+
+# 允许同时排队或执行的最大任务数
+MAX_PENDING_JOBS = int(os.getenv("JOB_MAX_PENDING", "100"))
+
+# 单个批次最多包含的视频数
+MAX_BATCH_VIDEOS = int(os.getenv("JOB_BATCH_MAX_VIDEOS", "50"))
+
+# 相邻阶段之间最多积压的任务数（不含正在执行的）；下游积压时上游工作线程等待，
+# 避免下载远远跑在转录前面、音频文件堆满磁盘
+STAGE_BUFFER = int(os.getenv("JOB_STAGE_BUFFER", "2"))
+
+# 关闭时等待进行中的摘要调用结束的最长时间（秒），超时的任务在下次启动时恢复
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "30"))
+
+# 音频文件清理配置
+KEEP_AUDIO_FILES = os.getenv("KEEP_AUDIO_FILES", "false").lower() == "true"
+
+# 各阶段开始时报告的进度百分比
+STAGE_PROGRESS = {
+    JOB_DOWNLOADING: 10,
+    JOB_TRANSCRIBING: 40,
+    JOB_SUMMARIZING: 80,
+    JOB_COMPLETED: 100,
+}
+
+
+class JobQueueFullError(Exception):
+    """排队任务数超过上限"""
+
+
+class JobQueue:
+    """
+    视频摘要后台任务队列
+
+    下载、转录和摘要三个阶段分别运行在各自有界的线程池中，
+    每个阶段完成后把中间结果写入任务表，再把任务交给下一阶段。
+    上游阶段开始前先在下游预留位置（每个下游阶段的容量为工作线程数 + STAGE_BUFFER），
+    下游已满时上游等待，批量提交时各阶段重叠执行且积压有界。
+    任务状态保存在数据库中，服务重启后未完成的任务会从最近的阶段继续执行。
+    每个阶段的耗时和用量（JobTrace）随中间结果写入任务的 metrics 列，完成时复制到摘要记录。
+
+    同一 video_id 同时只运行一条流水线：后到的任务作为跟随者等待进行中的任务，
+    完成后直接复用其结果。
+    """
+
+    def __init__(
+        self,
+        download_workers: int = DOWNLOAD_WORKERS,
+        transcribe_workers: int = TRANSCRIBE_WORKERS,
+        summarize_workers: int = SUMMARIZE_WORKERS,
+    ):
+        self._sizes = (download_workers, transcribe_workers, summarize_workers)
+        self._stage_buffer = STAGE_BUFFER
+        self._download_pool: Optional[ThreadPoolExecutor] = None
+        self._transcribe_pool: Optional[ThreadPoolExecutor] = None
+        self._summarize_pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.RLock()
+        # video_id -> 正在执行流水线的任务ID
+        self._inflight: Dict[str, str] = {}
+        # video_id -> 等待该视频结果的任务ID列表
+        self._followers: Dict[str, List[str]] = {}
+        # 下游阶段 -> 可用位置的信号量，以及已预留位置的任务ID
+        self._slots: Dict[str, threading.Semaphore] = {}
+        self._slot_holders: Dict[str, Set[str]] = {}
+        self._stopped = threading.Event()
+        # 正在执行的摘要阶段数；关闭时等待其归零后才能释放 OpenAI 客户端
+        self._summarizing = 0
+        self._idle = threading.Condition(self._lock)
+        # 领头任务结束（退出进行中状态）的次数，submit 据此判断是否需要重新查找缓存
+        self._finished = 0
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._download_pool is not None:
+                return
+            download_workers, transcribe_workers, summarize_workers = self._sizes
+            self._download_pool = ThreadPoolExecutor(download_workers, thread_name_prefix="job-download")
+            self._transcribe_pool = ThreadPoolExecutor(transcribe_workers, thread_name_prefix="job-transcribe")
+            self._summarize_pool = ThreadPoolExecutor(summarize_workers, thread_name_prefix="job-summarize")
+            self._slots = {
+                JOB_TRANSCRIBING: threading.Semaphore(transcribe_workers + self._stage_buffer),
+                JOB_SUMMARIZING: threading.Semaphore(summarize_workers + self._stage_buffer),
+            }
+            self._slot_holders = {JOB_TRANSCRIBING: set(), JOB_SUMMARIZING: set()}
+            self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """启动线程池并恢复服务重启前未完成的任务"""
+        self._ensure_started()
+        db = SessionLocal()
+        try:
+            jobs = get_unfinished_jobs(db)
+            for job in jobs:
+                # 音频文件的占用只保存在内存中，重新登记，转录之前不会被淘汰；
+                # 文件已不存在时 _dispatch 从下载阶段重新开始
+                if job.audio_path and not job.transcript and not download_coordinator.adopt(
+                    job.video_url, job.audio_path, job.id, keep_audio=job.keep_audio or KEEP_AUDIO_FILES
+                ):
+                    logger.info(f"Audio for job {job.id} is gone, downloading again")
+            with self._lock:
+                for job in jobs:
+                    logger.info(f"Recovering job {job.id} (status: {job.status})")
+                    self._schedule(job)
+        finally:
+            db.close()
+
+    def shutdown(self, timeout: float = JOB_SHUTDOWN_TIMEOUT) -> None:
+        """
+        停止线程池，未完成的任务保留在数据库中，下次启动时恢复
+
+        排队中的阶段直接取消；进行中的摘要阶段最多等待 timeout 秒，
+        返回后调用方才可以关闭 OpenAI 客户端。超时仍未结束的阶段在客户端关闭后中断，
+        任务保留当前状态而不标记为失败。
+        """
+        with self._lock:
+            pools = (self._download_pool, self._transcribe_pool, self._summarize_pool)
+            self._download_pool = self._transcribe_pool = self._summarize_pool = None
+            self._inflight.clear()
+            self._followers.clear()
+            # 唤醒等待下游位置的工作线程，让其退出
+            self._stopped.set()
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        with self._idle:
+            if not self._idle.wait_for(lambda: self._summarizing == 0, timeout=timeout):
+                logger.warning(
+                    f"{self._summarizing} summarize jobs still running after {timeout:g}s, "
+                    f"they will resume on next start"
+                )
+
+    def submit(
+        self,
+        db,
+        video_url: str,
+        user_id: Optional[int] = None,
+        keep_audio: bool = False,
+        force_refresh: bool = False,
+        batch_id: Optional[str] = None,
+        check_capacity: bool = True
+    ) -> SummaryJob:
+        """
+        按 video_id 提交摘要任务
+        
+        - 同一用户针对同一视频已有未结束的任务时直接返回该任务（批次中的任务除外，
+          批次需要自己的任务记录来统计进度，作为跟随者等待进行中的任务）
+        - 该视频已有完成的摘要且未要求强制刷新时，返回一个已完成的任务
+        - 其他用户正在处理同一视频时，新任务等待该任务的结果而不重复执行流水线
+        
+        Raises:
+            JobQueueFullError: 未结束的任务数达到上限
+        """
+        video_id = extract_video_id(video_url)
+        existing = get_active_job(db, video_id, user_id) if batch_id is None else None
+        if existing:
+            logger.info(f"Reusing active job {existing.id} for video: {video_id}")
+            return existing
+        
+        # 数据库读写不持有队列锁。领头任务可能在缓存查找之后、调度之前写入结果并退出进行中状态，
+        # 调度时发现期间有任务结束（_finished 变化）就重新查找缓存，避免重复执行流水线
+        with self._lock:
+            finished = self._finished
+        if not force_refresh:
+            cached = summary_cache.lookup(db, video_id, user_id)
+            if cached is not None:
+                logger.info(f"Summary cache hit for video: {video_id}")
+                pipeline_metrics.count_job("cached")
+                return create_job(
+                    db, video_url, user_id=user_id, keep_audio=keep_audio, summary_id=cached.id, batch_id=batch_id
+                )
+        
+        # 容量检查不加锁，并发提交时可能略微超过上限
+        if check_capacity:
+            with self._lock:
+                joining = video_id in self._inflight
+            if not joining and count_unfinished_jobs(db) >= MAX_PENDING_JOBS:
+                raise JobQueueFullError(f"任务队列已满（{MAX_PENDING_JOBS}），请稍后重试")
+        
+        job = create_job(db, video_url, user_id=user_id, keep_audio=keep_audio, batch_id=batch_id)
+        while True:
+            with self._lock:
+                if force_refresh or self._finished == finished or video_id in self._inflight:
+                    logger.info(f"Enqueued job {job.id} for video: {video_id}")
+                    self._ensure_started()
+                    self._schedule(job)
+                    return job
+                finished = self._finished
+            cached = summary_cache.lookup(db, video_id, user_id)
+            if cached is not None:
+                logger.info(f"Summary cache hit for video: {video_id} (completed while submitting)")
+                pipeline_metrics.count_job("cached")
+                return update_job(
+                    db, job.id, status=JOB_COMPLETED, progress=STAGE_PROGRESS[JOB_COMPLETED], summary_id=cached.id
+                )
+
+    def submit_batch(
+        self,
+        db,
+        video_urls: Sequence[str],
+        user_id: Optional[int] = None,
+        keep_audio: bool = False,
+        force_refresh: bool = False,
+        channel_name: Optional[str] = None
+    ) -> Tuple[SummaryBatch, List[SummaryJob]]:
+        """
+        批量提交摘要任务
+
+        按 video_id 去重后为每个视频创建一个属于同一批次的任务；已有摘要的视频直接完成，
+        其余任务进入流水线，每个视频完成后立即保存结果。
+
+        Returns:
+            (批次, 任务列表)
+
+        Raises:
+            JobQueueFullError: 加入这些任务后未结束的任务数会超过上限（整个批次都不提交）
+        """
+        unique_urls = list({extract_video_id(url): url for url in video_urls}.values())
+        # 只有容量检查和创建批次在锁内，避免并发的批次一起越过上限；
+        # 逐个提交视频时不持有队列锁，工作线程的调度不会被整个批次的数据库读写阻塞
+        with self._lock:
+            if count_unfinished_jobs(db) + len(unique_urls) > MAX_PENDING_JOBS:
+                raise JobQueueFullError(
+                    f"任务队列已满（{MAX_PENDING_JOBS}），无法再提交 {len(unique_urls)} 个任务，请稍后重试"
+                )
+            batch = create_batch(db, len(unique_urls), user_id=user_id, channel_name=channel_name)
+        jobs = [
+            self.submit(
+                db,
+                url,
+                user_id=user_id,
+                keep_audio=keep_audio,
+                force_refresh=force_refresh,
+                batch_id=batch.id,
+                check_capacity=False
+            )
+            for url in unique_urls
+        ]
+        logger.info(f"Submitted batch {batch.id} with {len(jobs)} jobs")
+        return batch, jobs
+
+    def _reserve_slot(self, stage: str, job_id: str) -> bool:
+        """
+        为任务预留下游阶段的位置，下游已满时阻塞等待（背压）
+
+        Returns:
+            是否预留成功；队列已关闭时返回 False，任务留在数据库中等待下次启动时恢复
+        """
+        slots, stopped = self._slots[stage], self._stopped
+        while not slots.acquire(timeout=1):
+            if stopped.is_set():
+                return False
+        with self._lock:
+            if stopped.is_set():
+                slots.release()
+                return False
+            self._slot_holders[stage].add(job_id)
+        return True
+
+    def _free_slot(self, stage: str, job_id: str) -> None:
+        """释放任务预留的位置；从中间阶段恢复的任务没有预留位置，直接忽略"""
+        with self._lock:
+            holders = self._slot_holders.get(stage)
+            if holders is None or job_id not in holders:
+                return
+            holders.discard(job_id)
+            self._slots[stage].release()
+
+    def _schedule(self, job: SummaryJob) -> None:
+        """同一视频已有进行中的任务时登记为跟随者，否则开始执行流水线；调用方需持有 self._lock"""
+        leader_id = self._inflight.get(job.video_id)
+        if leader_id and leader_id != job.id:
+            self._followers.setdefault(job.video_id, []).append(job.id)
+            summary_cache.record_coalesced()
+            logger.info(f"Job {job.id} waits on in-flight job {leader_id} for video: {job.video_id}")
+            return
+        self._inflight[job.video_id] = job.id
+        self._dispatch(job)
+
+    def _release(self, db, job: SummaryJob, summary_id: Optional[int] = None, error: Optional[str] = None) -> None:
+        """领头任务结束后退出进行中状态，并把结果或错误分发给跟随者"""
+        with self._lock:
+            if self._inflight.get(job.video_id) == job.id:
+                del self._inflight[job.video_id]
+            followers = self._followers.pop(job.video_id, [])
+            self._finished += 1
+        
+        source = get_summary(db, summary_id) if summary_id is not None else None
+        for follower_id in followers:
+            try:
+                follower = get_job(db, follower_id)
+                if follower is None:
+                    continue
+                if source is None:
+                    update_job(db, follower_id, status=JOB_FAILED, error=error)
+                    continue
+                if follower.user_id == source.user_id:
+                    summary_id_for_follower = source.id
+                else:
+                    summary_id_for_follower = attach_summary_to_user(db, source, follower.user_id).id
+                update_job(
+                    db,
+                    follower_id,
+                    status=JOB_COMPLETED,
+                    progress=STAGE_PROGRESS[JOB_COMPLETED],
+                    summary_id=summary_id_for_follower
+                )
+            except Exception as e:
+                logger.error(f"Failed to complete follower job {follower_id}: {str(e)}", exc_info=True)
+
+    def _dispatch(self, job: SummaryJob) -> None:
+        """根据任务已保存的中间结果选择从哪个阶段开始执行"""
+        if job.transcript:
+            self._summarize_pool.submit(self._run_summarize, job.id)
+        elif job.audio_path and os.path.exists(job.audio_path):
+            self._transcribe_pool.submit(self._run_transcribe, job.id)
+        else:
+            self._download_pool.submit(self._run_download, job.id)
+
+    def _run_stage(self, job_id: str, status: str, work) -> bool:
+        """执行单个阶段，失败时把任务及其跟随者标记为失败"""
+        db = SessionLocal()
+        job = None
+        stopped = self._stopped
+        try:
+            job = update_job(db, job_id, status=status, progress=STAGE_PROGRESS[status])
+            if job is None:
+                logger.warning(f"Job {job_id} no longer exists")
+                return False
+            with self._lock:
+                followers = list(self._followers.get(job.video_id, []))
+            for follower_id in followers:
+                update_job(db, follower_id, status=status, progress=STAGE_PROGRESS[status])
+            work(db, job)
+            return True
+        except Exception as e:
+            # 在下载完成之后、解码之前失败时撤销对音频文件的占用
+            download_coordinator.release(None, job_id)
+            if stopped.is_set():
+                # 关闭过程中被中断（如 OpenAI 客户端已关闭），保留任务当前状态，下次启动时恢复
+                logger.info(f"Job {job_id} interrupted by shutdown during {status}, will resume on next start: {str(e)}")
+                db.rollback()
+                return False
+            logger.error(f"Job {job_id} failed during {status}: {str(e)}", exc_info=True)
+            pipeline_metrics.count_job(JOB_FAILED)
+            try:
+                db.rollback()
+                update_job(db, job_id, status=JOB_FAILED, error=str(e))
+                if job is not None:
+                    self._release(db, job, error=str(e))
+            except Exception as update_error:
+                logger.error(f"Failed to mark job {job_id} as failed: {str(update_error)}")
+            return False
+        finally:
+            db.close()
+
+    def _run_download(self, job_id: str) -> None:
+        def work(db, job):
+            logger.info(f"[job {job_id}] Downloading audio: {job.video_url}")
+            trace = JobTrace(job_id, job.metrics)
+            with trace.stage(STAGE_DOWNLOAD):
+                audio_path = download_coordinator.acquire(job.video_url, job_id, keep_audio=job.keep_audio or KEEP_AUDIO_FILES)
+            update_job(db, job_id, audio_path=audio_path, metrics=trace.to_dict())
+
+        # 转录阶段积压已满时在下载前等待，下载好的音频不会无限堆积
+        if not self._reserve_slot(JOB_TRANSCRIBING, job_id):
+            return
+        if self._run_stage(job_id, JOB_DOWNLOADING, work):
+            self._submit_stage(self._transcribe_pool, self._run_transcribe, job_id)
+        else:
+            self._free_slot(JOB_TRANSCRIBING, job_id)
+
+    def _run_transcribe(self, job_id: str) -> None:
+        def work(db, job):
+            trace = JobTrace(job_id, job.metrics)
+            # 直接把原始音频解码为 16 kHz PCM；之后不再需要音频文件，
+            # 缓存中的文件解除占用，未缓存且不需要保留的文件立即删除
+            try:
+                with trace.stage(STAGE_DECODE):
+                    audio = decode_audio(job.audio_path)
+            finally:
+                download_coordinator.release(job.audio_path, job_id, keep=job.keep_audio or KEEP_AUDIO_FILES)
+            
+            logger.info(f"[job {job_id}] Transcribing {len(audio) / SAMPLE_RATE:.1f}s of audio")
+            with trace.stage(STAGE_TRANSCRIBE):
+                result = transcribe_with_segments(audio)
+            # 全文由分段文本拼接而成，时间轴中的文本偏移直接指向全文
+            transcript, timeline = pack_segments(result.get("segments", []))
+            if not transcript:
+                transcript, timeline = result.get("text", ""), None
+            trace.finish_transcription(len(audio) / SAMPLE_RATE, len(transcript))
+            logger.info(f"[job {job_id}] Transcription completed, length: {len(transcript)} characters")
+            update_job(db, job_id, transcript=transcript, segments=timeline, metrics=trace.to_dict())
+
+        if not self._reserve_slot(JOB_SUMMARIZING, job_id):
+            self._free_slot(JOB_TRANSCRIBING, job_id)
+            return
+        try:
+            succeeded = self._run_stage(job_id, JOB_TRANSCRIBING, work)
+        finally:
+            self._free_slot(JOB_TRANSCRIBING, job_id)
+        if succeeded:
+            self._submit_stage(self._summarize_pool, self._run_summarize, job_id)
+        else:
+            self._free_slot(JOB_SUMMARIZING, job_id)
+
+    def _run_summarize(self, job_id: str) -> None:
+        def work(db, job):
+            logger.info(f"[job {job_id}] Generating summary")
+            trace = JobTrace(job_id, job.metrics)
+            with trace.stage(STAGE_SUMMARIZE):
+                summary_text = summarize_text(job.transcript, trace=trace)
+            metrics = trace.to_dict()
+
+            # 从摘要阶段恢复的任务可能还留有未清理的音频文件
+            should_keep_audio = job.keep_audio or KEEP_AUDIO_FILES
+            audio_path = job.audio_path
+            download_coordinator.release(audio_path, job_id, keep=should_keep_audio)
+
+            # 摘要记录、分段时间轴和任务完成状态在同一事务中提交
+            summary_data = SummaryCreate(
+                video_url=job.video_url,
+                keep_audio=should_keep_audio,
+                transcript=job.transcript,
+                summary=summary_text,
+                audio_path=audio_path if should_keep_audio else None,
+                metrics=metrics
+            )
+            db_summary = save_summary(db, summary_data, job.user_id, timeline=job.segments, commit=False)
+
+            update_job(
+                db,
+                job_id,
+                status=JOB_COMPLETED,
+                progress=STAGE_PROGRESS[JOB_COMPLETED],
+                summary_id=db_summary.id,
+                transcript=None,
+                segments=None,
+                metrics=metrics,
+            )
+            pipeline_metrics.count_job(JOB_COMPLETED)
+            self._release(db, job, summary_id=db_summary.id)
+            logger.info(f"[job {job_id}] Completed, summary id: {db_summary.id}")
+
+        with self._lock:
+            self._summarizing += 1
+        try:
+            self._run_stage(job_id, JOB_SUMMARIZING, work)
+        finally:
+            self._free_slot(JOB_SUMMARIZING, job_id)
+            with self._idle:
+                self._summarizing -= 1
+                self._idle.notify_all()
+
+    def _submit_stage(self, pool: Optional[ThreadPoolExecutor], fn, job_id: str) -> None:
+        """把任务交给下一阶段；队列已关闭时任务留在数据库中，下次启动时恢复"""
+        if pool is None:
+            return
+        try:
+            pool.submit(fn, job_id)
+        except RuntimeError:
+            logger.info(f"Job queue stopped, job {job_id} will resume on next start")
+
+
+# 进程级共享的任务队列
+job_queue = JobQueue()
@@ -0,0 +1,200 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import whisper
+
+logger = logging.getLogger(__name__)
+
+# 从环境变量获取模型内存预算（MB），超过预算时淘汰最久未使用的模型
+WHISPER_MODEL_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MODEL_MEMORY_BUDGET_MB", "4096"))
+
+# 各模型大小的参数量估算（百万），用于加载前的内存预估
+_ESTIMATED_PARAMS_M = {
+    "tiny": 39,
+    "base": 74,
+    "small": 244,
+    "medium": 769,
+    "large": 1550,
+    "turbo": 809,
+}
+
+
+def _estimate_model_bytes(model_size: str) -> int:
+    """按参数量估算模型占用的内存字节数（float32）"""
+    base_size = model_size.split(".")[0].split("-")[0]
+    params_m = _ESTIMATED_PARAMS_M.get(base_size, _ESTIMATED_PARAMS_M["large"])
+    return params_m * 1_000_000 * 4
+
+
+def _measure_model_bytes(model: Any) -> int:
+    """统计已加载模型的参数和缓冲区实际占用的字节数"""
+    try:
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+        return int(total)
+    except Exception:
+        return 0
+
+
+class _ModelEntry:
+    """注册表中的单个模型条目"""
+
+    def __init__(self, model_size: str, model: Any, size_bytes: int):
+        self.model_size = model_size
+        self.model = model
+        self.size_bytes = size_bytes
+        self.use_lock = threading.Lock()
+        self.in_use = 0
+        self.use_count = 0
+        self.last_used = time.monotonic()
+
+
+class WhisperModelRegistry:
+    """
+    进程内的 Whisper 模型注册表
+
+    每种模型大小在每个工作进程中只加载一次，并在请求之间共享。
+    总内存超过预算时，按最近最少使用的顺序淘汰未被使用且未固定的模型。
+    """
+
+    def __init__(self, memory_budget_mb: int = WHISPER_MODEL_MEMORY_BUDGET_MB):
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024
+        self._models: "OrderedDict[str, _ModelEntry]" = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _get_load_lock(self, model_size: str) -> threading.Lock:
+        with self._lock:
+            if model_size not in self._load_locks:
+                self._load_locks[model_size] = threading.Lock()
+            return self._load_locks[model_size]
+
+    def _used_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._models.values())
+
+    def _evict_for(self, incoming_bytes: int, keep: Optional[str] = None) -> None:
+        """淘汰模型直到能容纳新模型，调用方需持有 self._lock"""
+        for model_size in list(self._models.keys()):
+            if self._used_bytes() + incoming_bytes <= self.memory_budget_bytes:
+                break
+            entry = self._models[model_size]
+            if model_size == keep or model_size in self._pinned or entry.in_use:
+                continue
+            del self._models[model_size]
+            self.evictions += 1
+            logger.info(
+                f"Evicted Whisper model '{model_size}' "
+                f"({entry.size_bytes / 1024 / 1024:.0f} MB, used {entry.use_count} times)"
+            )
+
+    def _get_entry(self, model_size: str, acquire: bool = False) -> _ModelEntry:
+        """
+        获取（必要时加载）模型条目
+
+        acquire 为 True 时在返回条目的同一次持锁中增加 in_use，
+        避免返回之后、登记使用之前被并发的 _evict_for 淘汰
+        """
+        with self._lock:
+            entry = self._models.get(model_size)
+            if entry is not None:
+                self._models.move_to_end(model_size)
+                self.hits += 1
+                if acquire:
+                    entry.in_use += 1
+                return entry
+
+        # 同一模型大小的并发请求只会触发一次加载
+        with self._get_load_lock(model_size):
+            with self._lock:
+                entry = self._models.get(model_size)
+                if entry is not None:
+                    self._models.move_to_end(model_size)
+                    self.hits += 1
+                    if acquire:
+                        entry.in_use += 1
+                    return entry
+                self.misses += 1
+                self._evict_for(_estimate_model_bytes(model_size))
+
+            logger.info(f"Loading Whisper model: {model_size}")
+            start = time.perf_counter()
+            model = whisper.load_model(model_size)
+            size_bytes = _measure_model_bytes(model) or _estimate_model_bytes(model_size)
+            logger.info(
+                f"Whisper model '{model_size}' loaded in {time.perf_counter() - start:.2f}s "
+                f"({size_bytes / 1024 / 1024:.0f} MB)"
+            )
+
+            with self._lock:
+                self._evict_for(size_bytes, keep=model_size)
+                entry = _ModelEntry(model_size, model, size_bytes)
+                self._models[model_size] = entry
+                self.loads += 1
+                if acquire:
+                    entry.in_use += 1
+                return entry
+
+    def get_model(self, model_size: str) -> Any:
+        """获取（必要时加载）指定大小的模型"""
+        return self._get_entry(model_size).model
+
+    @contextmanager
+    def use(self, model_size: str):
+        """
+        独占使用指定大小的模型
+
+        Whisper 解码时会在模型上安装 KV 缓存钩子，同一模型实例不能被并发调用，
+        因此这里对每个模型加锁；使用期间模型不会被淘汰。
+        """
+        entry = self._get_entry(model_size, acquire=True)
+        try:
+            with entry.use_lock:
+                entry.use_count += 1
+                entry.last_used = time.monotonic()
+                yield entry.model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+
+    def preload(self, model_size: str, pin: bool = True) -> None:
+        """预加载模型，默认固定在内存中不被淘汰"""
+        if pin:
+            with self._lock:
+                self._pinned.add(model_size)
+        self._get_entry(model_size)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回注册表的加载、淘汰计数和当前驻留的模型"""
+        with self._lock:
+            return {
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_budget_mb": self.memory_budget_bytes // (1024 * 1024),
+                "memory_used_mb": self._used_bytes() // (1024 * 1024),
+                "models": [
+                    {
+                        "model_size": entry.model_size,
+                        "size_mb": entry.size_bytes // (1024 * 1024),
+                        "use_count": entry.use_count,
+                        "in_use": entry.in_use,
+                        "pinned": entry.model_size in self._pinned,
+                    }
+                    for entry in self._models.values()
+                ],
+            }
+
+
+# 进程级共享的注册表实例
+model_registry = WhisperModelRegistry()
@@ -0,0 +1,86 @@
+import os
+import logging
+import threading
+from typing import Optional
+
+import httpx
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+# OpenAI 兼容服务地址，可指向本地桩服务用于测试和基准
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# 超时配置（秒）
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+
+# 连接池配置
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+
+_lock = threading.Lock()
+_client: Optional[OpenAI] = None
+
+
+def _get_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY 环境变量未设置")
+    return api_key
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_client() -> OpenAI:
+    """
+    获取进程共享的同步 OpenAI 客户端
+
+    客户端复用同一个 HTTP 连接池，避免每次调用重新建立连接和 TLS 握手。
+    重试由调用方统一处理，因此关闭了 SDK 自带的重试。
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=_get_api_key(),
+                    base_url=OPENAI_BASE_URL,
+                    max_retries=0,
+                    timeout=_timeout(),
+                    http_client=httpx.Client(limits=_limits(), timeout=_timeout()),
+                )
+                logger.info(f"Created OpenAI client (base_url: {OPENAI_BASE_URL or 'default'})")
+    return _client
+
+
+def init_clients() -> None:
+    """在应用启动时创建客户端；未配置 API 密钥时推迟到首次使用"""
+    try:
+        get_client()
+    except ValueError as e:
+        logger.warning(f"OpenAI client not initialized: {str(e)}")
+
+
+def close_clients() -> None:
+    """
+    在应用关闭时释放连接池
+
+    需在任务队列停止之后调用，否则仍在进行的摘要请求会使用已关闭的连接池。
+    """
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
@@ -0,0 +1,149 @@
+import os
+import json
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Iterator, Optional
+
+from app.database.base import SessionLocal
+from app.models.job import JOB_COMPLETED, JOB_FAILED
+from app.crud.summary import save_summary, extract_video_id
+from app.crud.transcript import pack_segments
+from app.schemas.summary import SummaryCreate
+from app.services.download_coordinator import download_coordinator
+from app.services.audio import decode_audio, SAMPLE_RATE
+from app.services.transcriber import iter_transcribe_segments
+from app.services.summarizer import build_summary_messages, summarize_text_stream
+from app.services.summary_cache import summary_cache
+from app.services.tracing import (
+    JobTrace,
+    pipeline_metrics,
+    STAGE_DOWNLOAD,
+    STAGE_DECODE,
+    STAGE_TRANSCRIBE,
+    STAGE_SUMMARIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+# 长时间没有输出时发送心跳的间隔（秒），避免代理因空闲超时断开连接
+HEARTBEAT_INTERVAL = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "10"))
+
+# 音频文件清理配置
+KEEP_AUDIO_FILES = os.getenv("KEEP_AUDIO_FILES", "false").lower() == "true"
+
+# 执行下载和解码等阻塞步骤的线程池，以便在等待期间发送心跳
+_blocking_pool = ThreadPoolExecutor(max_workers=int(os.getenv("STREAM_WORKERS", "4")), thread_name_prefix="stream")
+
+
+def _event(event: str, **data: Any) -> Dict[str, Any]:
+    return {"event": event, **data}
+
+
+def _wait_with_heartbeat(fn, *args, **kwargs):
+    """
+    在线程池中执行阻塞调用，等待期间每隔 HEARTBEAT_INTERVAL 产出一个心跳事件
+
+    用法: result = yield from _wait_with_heartbeat(fn, ...)
+    """
+    future = _blocking_pool.submit(fn, *args, **kwargs)
+    while True:
+        try:
+            return future.result(timeout=HEARTBEAT_INTERVAL)
+        except FutureTimeoutError:
+            yield _event("heartbeat")
+
+
+def stream_summary_events(
+    video_url: str,
+    user_id: Optional[int] = None,
+    keep_audio: bool = False,
+    force_refresh: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    执行摘要流水线并逐步产出事件
+
+    事件类型:
+        - stage: 进入新阶段（downloading / transcribing / summarizing）
+        - segment: 一个 Whisper 分段（start、end、text）
+        - summary_delta: 流式摘要的文本片段
+        - summary: 命中缓存时的完整摘要
+        - heartbeat: 长时间阻塞时的心跳
+        - done: 完成，包含保存的摘要ID
+        - error: 失败，包含错误信息
+    """
+    db = SessionLocal()
+    audio_path = None
+    trace = JobTrace(f"stream-{uuid.uuid4().hex}")
+    should_keep_audio = keep_audio or KEEP_AUDIO_FILES
+    try:
+        video_id = extract_video_id(video_url)
+
+        if not force_refresh:
+            cached = summary_cache.lookup(db, video_id, user_id)
+            if cached is not None:
+                pipeline_metrics.count_job("cached")
+                yield _event("summary", text=cached.summary, cached=True)
+                yield _event("done", summary_id=cached.id, cached=True)
+                return
+
+        # 下载音频
+        yield _event("stage", stage="downloading")
+        audio_path = yield from _wait_with_heartbeat(
+            trace.timed(STAGE_DOWNLOAD, download_coordinator.acquire), video_url, trace.trace_id, keep_audio=should_keep_audio
+        )
+
+        # 解码后按片段流式转录
+        yield _event("stage", stage="transcribing")
+        audio = yield from _wait_with_heartbeat(trace.timed(STAGE_DECODE, decode_audio), audio_path)
+        download_coordinator.release(audio_path, trace.trace_id, keep=should_keep_audio)
+        yield _event("audio", duration=round(len(audio) / SAMPLE_RATE, 3))
+
+        # 流式阶段在多个线程中逐步执行，且包含客户端读取的等待，只记录墙钟时间
+        segments = []
+        with trace.stage(STAGE_TRANSCRIBE, cpu=False):
+            for segment in iter_transcribe_segments(audio):
+                segments.append(segment)
+                yield _event("segment", **segment)
+        transcript, timeline = pack_segments(segments)
+        trace.finish_transcription(len(audio) / SAMPLE_RATE, len(transcript))
+        logger.info(f"Streamed transcription completed, length: {len(transcript)} characters")
+
+        # 流式生成摘要
+        yield _event("stage", stage="summarizing")
+        parts = []
+        with trace.stage(STAGE_SUMMARIZE, cpu=False):
+            # 长文本的分块摘要和整合可能持续数分钟，在线程池中执行，等待期间发送心跳
+            messages = yield from _wait_with_heartbeat(build_summary_messages, transcript, trace=trace)
+            for delta in summarize_text_stream(transcript, trace=trace, messages=messages):
+                parts.append(delta)
+                yield _event("summary_delta", text=delta)
+        summary_text = "".join(parts)
+
+        # 保存结果：整行和分段时间轴在同一事务中写入
+        summary_data = SummaryCreate(
+            video_url=video_url,
+            keep_audio=should_keep_audio,
+            transcript=transcript,
+            summary=summary_text,
+            audio_path=audio_path if should_keep_audio else None,
+            metrics=trace.to_dict()
+        )
+        db_summary = save_summary(db, summary_data, user_id, timeline=timeline if segments else None)
+        pipeline_metrics.count_job(JOB_COMPLETED)
+        yield _event("done", summary_id=db_summary.id, cached=False)
+    except Exception as e:
+        pipeline_metrics.count_job(JOB_FAILED)
+        logger.error(f"Error streaming summary for {video_url}: {str(e)}", exc_info=True)
+        yield _event("error", detail=str(e))
+    finally:
+        # 缓存中的文件解除占用，未缓存且不需要保留的文件删除；重复调用没有影响。
+        # 客户端在下载完成前断开时 audio_path 为 None，按 trace_id 撤销登记，下载完成后即清理
+        download_coordinator.release(audio_path, trace.trace_id, keep=should_keep_audio)
+        db.close()
+
+
+def iter_ndjson(events: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    """把事件序列编码为 NDJSON，每行一个事件"""
+    for event in events:
+        yield (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
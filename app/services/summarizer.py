@@ -1,50 +1,206 @@
 import openai
 import os
+import time
+import random
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
 from openai import OpenAI
-import re
+from app.services.openai_client import get_client
+from app.services.chunker import chunk_text, count_tokens, get_context_window
+from app.services.tracing import JobTrace
 
 logger = logging.getLogger(__name__)
 
 # 从环境变量获取 OpenAI 模型
 DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo-1106")
 
-def chunk_text(text, max_chunk_size=4000):
+# 进程内同时进行的 OpenAI 请求上限
+MAX_CONCURRENT_REQUESTS = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+
+# 遇到 429 / 5xx / 网络错误时的重试次数和退避基数（秒）
+MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", "5"))
+RETRY_BASE_DELAY = float(os.getenv("SUMMARY_RETRY_BASE_DELAY", "1.0"))
+RETRY_MAX_DELAY = 30.0
+
+# 每个文本块的 token 预算和相邻块的重叠 token 数
+CHUNK_MAX_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("SUMMARY_CHUNK_OVERLAP_TOKENS", "100"))
+
+# 最终整合调用可接受的输入 token 数，未设置时按模型上下文窗口计算
+REDUCE_MAX_INPUT_TOKENS = os.getenv("SUMMARY_REDUCE_MAX_TOKENS")
+
+# 各类调用的输出 token 上限，以及系统提示词等固定开销的预留
+CHUNK_OUTPUT_TOKENS = 500
+FINAL_OUTPUT_TOKENS = 1000
+PROMPT_OVERHEAD_TOKENS = 300
+
+CHUNK_SYSTEM_PROMPT = "你是一个擅长总结中文视频内容的助手。请简要总结以下文本片段。"
+MERGE_SYSTEM_PROMPT = "你是一个擅长总结中文视频内容的助手。请将以下多段摘要整合成一个连贯的整体摘要。"
+
+_request_semaphore = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+def _is_retryable(error: Exception) -> bool:
+    """判断 OpenAI 错误是否值得重试：限流、服务端错误和网络错误"""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+def _backoff_delay(attempt: int) -> float:
+    """第 attempt 次重试前的等待时间：指数退避加随机抖动"""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+def _create_completion(client: OpenAI, model: str, messages: list, max_tokens: int, trace: Optional[JobTrace] = None) -> str:
     """
-    将长文本分割成更小的块
+    调用聊天补全接口，限流和服务端错误时按指数退避重试
     
     Args:
-        text: 要分割的文本
-        max_chunk_size: 每个块的最大字符数
+        client: OpenAI 客户端
+        model: 模型名称
+        messages: 消息列表
+        max_tokens: 最大输出 token 数
+        trace: 记录 token 用量的任务追踪，可选
     
     Returns:
-        文本块列表
+        模型返回的文本
     """
-    # 按句子分割
-    sentences = re.split(r'(?<=[。！？.!?])\s*', text)
-    chunks = []
-    current_chunk = ""
+    attempt = 0
+    while True:
+        try:
+            with _request_semaphore:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.5,
+                    max_tokens=max_tokens
+                )
+            if trace is not None:
+                trace.add_usage(response.usage)
+            return response.choices[0].message.content
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not _is_retryable(e):
+                raise
+            delay = _backoff_delay(attempt)
+            attempt += 1
+            logger.warning(f"OpenAI request failed ({str(e)}), retry {attempt}/{MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+
+def _summarize_parts(
+    client: OpenAI,
+    model: str,
+    parts: List[str],
+    system_prompt: str,
+    user_prefix: str,
+    trace: Optional[JobTrace] = None
+) -> List[str]:
+    """并发地对多个文本片段生成摘要，结果顺序与输入一致"""
+    def summarize_part(indexed_part):
+        i, part = indexed_part
+        logger.info(f"Summarizing part {i+1}/{len(parts)}")
+        return _create_completion(
+            client,
+            model,
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"{user_prefix}\n{part}"}
+            ],
+            max_tokens=CHUNK_OUTPUT_TOKENS,
+            trace=trace
+        )
     
-    for sentence in sentences:
-        if len(current_chunk) + len(sentence) <= max_chunk_size:
-            current_chunk += sentence
-        else:
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = sentence
+    if len(parts) == 1:
+        return [summarize_part((0, parts[0]))]
     
-    if current_chunk:
-        chunks.append(current_chunk)
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(parts))) as executor:
+        return list(executor.map(summarize_part, enumerate(parts)))
+
+def _chunk_budget(model: str) -> int:
+    """单个文本块的 token 预算，不超过模型上下文窗口扣除输出和提示词后的容量"""
+    capacity = get_context_window(model) - CHUNK_OUTPUT_TOKENS - PROMPT_OVERHEAD_TOKENS
+    return max(1, min(CHUNK_MAX_TOKENS, capacity))
+
+def _reduce_budget(model: str) -> int:
+    """最终整合调用的输入 token 预算"""
+    if REDUCE_MAX_INPUT_TOKENS:
+        return int(REDUCE_MAX_INPUT_TOKENS)
+    return max(1, get_context_window(model) - FINAL_OUTPUT_TOKENS - PROMPT_OVERHEAD_TOKENS)
+
+def _reduce_summaries(client: OpenAI, model: str, summaries: List[str], trace: Optional[JobTrace] = None) -> str:
+    """
+    分层整合片段摘要
     
-    return chunks
+    合并后的摘要超过最终调用的输入限制时，先把摘要分组并发整合，
+    重复直到能放入一次调用。
+    """
+    budget = _reduce_budget(model)
+    combined = "\n\n".join(summaries)
+    combined_tokens = count_tokens(combined, model)
+    level = 1
+    while combined_tokens > budget and len(summaries) > 1:
+        groups = chunk_text(combined, max_tokens=min(budget, _chunk_budget(model)), model=model)
+        if len(groups) >= len(summaries):
+            # 单个摘要本身已经超过限制，继续分组无法收敛
+            break
+        logger.info(f"Combined summaries too long ({combined_tokens} tokens), reducing {len(groups)} groups at level {level}")
+        summaries = _summarize_parts(client, model, groups, MERGE_SYSTEM_PROMPT, "请整合以下多段视频内容摘要：", trace)
+        combined = "\n\n".join(summaries)
+        combined_tokens = count_tokens(combined, model)
+        level += 1
+    return combined
 
-def summarize_text(text: str, model: str = None) -> str:
+def _build_final_messages(client: OpenAI, model: str, text: str, trace: Optional[JobTrace] = None) -> list:
+    """
+    准备最终调用的消息
+    
+    长文本先分块并发摘要、必要时分层整合，再把整合结果作为最终调用的输入；
+    短文本直接作为最终调用的输入。
+    """
+    chunk_budget = _chunk_budget(model)
+    text_tokens = count_tokens(text, model)
+    logger.info(f"Preparing text for summarization. Text length: {len(text)} chars, {text_tokens} tokens")
+    
+    # 处理长文本
+    if text_tokens > chunk_budget:
+        logger.info("Text too long, chunking...")
+        chunks = chunk_text(text, max_tokens=chunk_budget, overlap_tokens=CHUNK_OVERLAP_TOKENS, model=model)
+        logger.info(f"Split into {len(chunks)} chunks")
+        if trace is not None:
+            trace.set(chunk_count=len(chunks))
+        
+        # 并发地对每个块进行摘要
+        chunk_summaries = _summarize_parts(client, model, chunks, CHUNK_SYSTEM_PROMPT, "请总结以下视频内容片段：", trace)
+        
+        # 合并所有摘要，过长时分层整合
+        combined_summary = _reduce_summaries(client, model, chunk_summaries, trace)
+        
+        # 对合并的摘要再进行一次总结
+        logger.info("Creating final summary from chunk summaries")
+        return [
+            {"role": "system", "content": MERGE_SYSTEM_PROMPT},
+            {"role": "user", "content": f"请把内容得到的文字生成一段可读性高的文字，不需要对文字进行总结，只需要把文字转换成可读性高的文字， 修改文章中的错别字，有语言不通的地方，请修改：\n\n{combined_summary}"}
+        ]
+    
+    # 对于较短的文本直接总结
+    logger.info("Text within limits, summarizing directly")
+    if trace is not None:
+        trace.set(chunk_count=1)
+    return [
+        {"role": "system", "content": "你是一个擅长中文视频内容的助手。"},
+        {"role": "user", "content": f"请把内容得到的文字生成一段可读性高的文字，不需要对文字进行总结，只需要把文字转换成可读性高的文字， 修改文章中的错别字，有语言不通的地方，请修改：\n\n{text}"}
+    ]
+
+def summarize_text(text: str, model: str = None, trace: Optional[JobTrace] = None) -> str:
     """
     使用 OpenAI 模型总结文本
     
     Args:
         text: 要总结的文本
         model: OpenAI 模型名称
+        trace: 记录分块数和 token 用量的任务追踪，可选
     
     Returns:
         总结后的文本
@@ -53,77 +209,104 @@ def summarize_text(text: str, model: str = None) -> str:
         # 如果没有指定模型，使用默认模型
         if model is None:
             model = DEFAULT_MODEL
-            
-        # 获取 API 密钥
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY 环境变量未设置")
         
-        # 初始化客户端
-        client = OpenAI(api_key=api_key)
+        # 复用进程共享的客户端，重试由 _create_completion 统一处理
+        client = get_client()
         
-        logger.info(f"Preparing text for summarization. Text length: {len(text)}")
+        messages = _build_final_messages(client, model, text, trace)
+        summary = _create_completion(client, model, messages, max_tokens=FINAL_OUTPUT_TOKENS, trace=trace)
+        logger.info(f"Summary created, length: {len(summary)}")
         
-        # 处理长文本
-        if len(text) > 4000:
-            logger.info("Text too long, chunking...")
-            chunks = chunk_text(text)
-            logger.info(f"Split into {len(chunks)} chunks")
-            
-            # 对每个块进行摘要
-            chunk_summaries = []
-            for i, chunk in enumerate(chunks):
-                logger.info(f"Summarizing chunk {i+1}/{len(chunks)}")
-                
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": "你是一个擅长总结中文视频内容的助手。请简要总结以下文本片段。"},
-                        {"role": "user", "content": f"请总结以下视频内容片段：\n{chunk}"}
-                    ],
-                    temperature=0.5,
-                    max_tokens=500
-                )
-                
-                chunk_summary = response.choices[0].message.content
-                chunk_summaries.append(chunk_summary)
-            
-            # 合并所有摘要
-            combined_summary = "\n\n".join(chunk_summaries)
-            
-            # 对合并的摘要再进行一次总结
-            logger.info("Creating final summary from chunk summaries")
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "你是一个擅长总结中文视频内容的助手。请将以下多段摘要整合成一个连贯的整体摘要。"},
-                    {"role": "user", "content": f"请把内容得到的文字生成一段可读性高的文字，不需要对文字进行总结，只需要把文字转换成可读性高的文字， 修改文章中的错别字，有语言不通的地方，请修改：\n\n{combined_summary}"}
-                ],
-                temperature=0.5,
-                max_tokens=1000
-            )
-            
-            final_summary = response.choices[0].message.content
-            logger.info(f"Final summary created, length: {len(final_summary)}")
-            
-            return final_summary
-        else:
-            # 对于较短的文本直接总结
-            logger.info("Text within limits, summarizing directly")
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "你是一个擅长中文视频内容的助手。"},
-                    {"role": "user", "content": f"请把内容得到的文字生成一段可读性高的文字，不需要对文字进行总结，只需要把文字转换成可读性高的文字， 修改文章中的错别字，有语言不通的地方，请修改：\n\n{text}"}
-                ],
-                temperature=0.5,
-                max_tokens=1000
-            )
-            
-            summary = response.choices[0].message.content
-            logger.info(f"Summary created, length: {len(summary)}")
-            
-            return summary
+        return summary
     except Exception as e:
         logger.error(f"Error summarizing text: {str(e)}")
         raise Exception(f"Failed to summarize text: {str(e)}")
+
+def build_summary_messages(text: str, model: str = None, trace: Optional[JobTrace] = None) -> list:
+    """
+    准备最终摘要调用的消息，长文本的分块摘要和整合在这一步完成
+    
+    流式接口在后台线程中调用它，等待期间继续发送心跳，再把结果传给 summarize_text_stream。
+    
+    Args:
+        text: 要总结的文本
+        model: OpenAI 模型名称
+        trace: 记录分块数和 token 用量的任务追踪，可选
+    
+    Returns:
+        最终调用的消息列表
+    """
+    try:
+        if model is None:
+            model = DEFAULT_MODEL
+        return _build_final_messages(get_client(), model, text, trace)
+    except Exception as e:
+        logger.error(f"Error preparing summary: {str(e)}")
+        raise Exception(f"Failed to summarize text: {str(e)}")
+
+def summarize_text_stream(
+    text: str,
+    model: str = None,
+    trace: Optional[JobTrace] = None,
+    messages: Optional[list] = None
+) -> Iterator[str]:
+    """
+    使用 OpenAI 模型总结文本，以流式方式逐段返回最终摘要
+    
+    长文本的分块摘要和整合阶段与 summarize_text 相同，只有最终调用以流式返回。
+    在收到第一个 token 之前的限流和服务端错误会按指数退避重试。
+    并发信号量只在建立流式请求时持有，读取期间不占用，读取慢的客户端不会阻塞其他 OpenAI 调用。
+    
+    Args:
+        text: 要总结的文本
+        model: OpenAI 模型名称
+        trace: 记录分块数和 token 用量的任务追踪，可选
+        messages: build_summary_messages 准备好的消息，为 None 时在此生成
+    
+    Yields:
+        摘要文本片段
+    """
+    try:
+        if model is None:
+            model = DEFAULT_MODEL
+        client = get_client()
+        
+        if messages is None:
+            messages = _build_final_messages(client, model, text, trace)
+        attempt = 0
+        while True:
+            started = False
+            try:
+                with _request_semaphore:
+                    stream = client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=0.5,
+                        max_tokens=FINAL_OUTPUT_TOKENS,
+                        stream=True,
+                        # 需要记录用量时，最后一个事件携带整次调用的 token 用量
+                        **({"stream_options": {"include_usage": True}} if trace is not None else {})
+                    )
+                # 生成器提前关闭（客户端断开）时同时关闭 HTTP 响应
+                with stream:
+                    for event in stream:
+                        if getattr(event, "usage", None) is not None and trace is not None:
+                            trace.add_usage(event.usage)
+                        if not event.choices:
+                            continue
+                        delta = event.choices[0].delta.content
+                        if delta:
+                            started = True
+                            yield delta
+                return
+            except Exception as e:
+                # 已经输出过内容时不能重试，否则客户端会收到重复的文本
+                if started or attempt >= MAX_RETRIES or not _is_retryable(e):
+                    raise
+                delay = _backoff_delay(attempt)
+                attempt += 1
+                logger.warning(f"OpenAI stream failed ({str(e)}), retry {attempt}/{MAX_RETRIES} in {delay:.1f}s")
+                time.sleep(delay)
+    except Exception as e:
+        logger.error(f"Error streaming summary: {str(e)}")
+        raise Exception(f"Failed to summarize text: {str(e)}")
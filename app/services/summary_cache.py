@@ -0,0 +1,71 @@
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.summary import VideoSummary
+from app.crud.summary import get_completed_summary, get_user_summary_by_video_id, attach_summary_to_user
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryCache:
+    """
+    按 video_id 缓存已完成的摘要结果
+
+    数据库中已有该视频的转录和摘要时直接复用，
+    当前用户没有对应记录时只插入一行引用同一结果的记录，不再重新下载、转录和摘要。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def lookup(self, db: Session, video_id: str, user_id: Optional[int] = None) -> Optional[VideoSummary]:
+        """
+        查找已完成的摘要，命中时返回属于该用户的记录
+
+        Returns:
+            命中时返回摘要记录，否则返回 None
+        """
+        db_summary = get_user_summary_by_video_id(db, video_id, user_id)
+        if db_summary is None or not db_summary.summary:
+            source = get_completed_summary(db, video_id)
+            if source is None:
+                self._record(hit=False)
+                return None
+            db_summary = attach_summary_to_user(db, source, user_id)
+            logger.info(f"Attached cached summary {source.id} of video {video_id} to user {user_id}")
+        self._record(hit=True)
+        return db_summary
+
+    def record_coalesced(self) -> None:
+        """记录一次合并到进行中任务的请求"""
+        with self._lock:
+            self.coalesced += 1
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存命中、未命中和合并计数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "miss_rate": self.misses / lookups if lookups else 0.0,
+            }
+
+
+# 进程级共享的摘要缓存
+summary_cache = SummaryCache()
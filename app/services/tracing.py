@@ -0,0 +1,273 @@
+import os
+import time
+import random
+import logging
+import cProfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import prometheus_client
+except ImportError:  # prometheus_client 为可选依赖，缺失时 /metrics 使用内置的简易导出
+    prometheus_client = None
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # pyinstrument 为可选依赖，缺失时使用 cProfile
+    PyinstrumentProfiler = None
+
+logger = logging.getLogger(__name__)
+
+# 按此比例抽样任务并记录各阶段的性能剖析，0 表示关闭
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# 剖析结果目录：pyinstrument 输出 HTML，cProfile 输出 .prof（可用 snakeviz 等工具查看）
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+
+METRIC_PREFIX = "youtube_summary"
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+
+# 各阶段名称
+STAGE_DOWNLOAD = "download"
+STAGE_DECODE = "decode"
+STAGE_TRANSCRIBE = "transcribe"
+STAGE_SUMMARIZE = "summarize"
+
+
+def _cpu_time() -> float:
+    """
+    进程 CPU 时间，包括已回收的子进程（如 ffmpeg 解码）
+
+    按进程统计才能计入 PyTorch 等原生线程池的计算；同时执行的其他任务也会计入，
+    转录进程池中尚在运行的工作进程不会计入。
+    """
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class PipelineMetrics:
+    """
+    流水线指标的进程内汇总，通过 /metrics 以 Prometheus 文本格式导出
+
+    安装了 prometheus_client 时使用其直方图和计数器（包含分位数所需的分桶），
+    否则只记录每个标签的总和与次数。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sums: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._counts: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+        if prometheus_client is not None:
+            self._stage_seconds = prometheus_client.Histogram(
+                f"{METRIC_PREFIX}_stage_seconds", "Wall time of a pipeline stage", ["stage"], buckets=STAGE_BUCKETS
+            )
+            self._stage_cpu_seconds = prometheus_client.Histogram(
+                f"{METRIC_PREFIX}_stage_cpu_seconds", "Process CPU time during a pipeline stage", ["stage"], buckets=STAGE_BUCKETS
+            )
+            self._real_time_factor = prometheus_client.Histogram(
+                f"{METRIC_PREFIX}_transcribe_real_time_factor", "Transcription wall time divided by audio duration", buckets=RTF_BUCKETS
+            )
+            self._audio_seconds = prometheus_client.Counter(
+                f"{METRIC_PREFIX}_audio_seconds", "Seconds of audio transcribed"
+            )
+            self._tokens = prometheus_client.Counter(
+                f"{METRIC_PREFIX}_openai_tokens", "OpenAI tokens used", ["kind"]
+            )
+            self._jobs = prometheus_client.Counter(
+                f"{METRIC_PREFIX}_jobs", "Finished pipeline runs", ["status"]
+            )
+
+    def _add(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._sums[key] = self._sums.get(key, 0.0) + value
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def observe_stage(self, stage: str, wall: float, cpu: Optional[float]) -> None:
+        if prometheus_client is not None:
+            self._stage_seconds.labels(stage=stage).observe(wall)
+            if cpu is not None:
+                self._stage_cpu_seconds.labels(stage=stage).observe(cpu)
+            return
+        self._add("stage_seconds", wall, stage=stage)
+        if cpu is not None:
+            self._add("stage_cpu_seconds", cpu, stage=stage)
+
+    def observe_transcription(self, audio_seconds: float, real_time_factor: Optional[float]) -> None:
+        if prometheus_client is not None:
+            self._audio_seconds.inc(audio_seconds)
+            if real_time_factor is not None:
+                self._real_time_factor.observe(real_time_factor)
+            return
+        self._add("audio_seconds_total", audio_seconds)
+        if real_time_factor is not None:
+            self._add("transcribe_real_time_factor", real_time_factor)
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        if prometheus_client is not None:
+            self._tokens.labels(kind="prompt").inc(prompt_tokens)
+            self._tokens.labels(kind="completion").inc(completion_tokens)
+            return
+        self._add("openai_tokens_total", prompt_tokens, kind="prompt")
+        self._add("openai_tokens_total", completion_tokens, kind="completion")
+
+    def count_job(self, status: str) -> None:
+        if prometheus_client is not None:
+            self._jobs.labels(status=status).inc()
+            return
+        self._add("jobs_total", 1, status=status)
+
+    def render(self) -> Tuple[bytes, str]:
+        """返回 (Prometheus 文本格式的指标, Content-Type)"""
+        if prometheus_client is not None:
+            return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+        def fmt(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+        with self._lock:
+            sums = dict(self._sums)
+            counts = dict(self._counts)
+        lines = []
+        for name in sorted({name for name, _ in sums}):
+            metric = f"{METRIC_PREFIX}_{name}"
+            keys = sorted(key for key in sums if key[0] == name)
+            if name.endswith("_total"):
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{fmt(labels)} {sums[(name, labels)]:g}" for _, labels in keys)
+            else:
+                lines.append(f"# TYPE {metric} summary")
+                for _, labels in keys:
+                    lines.append(f"{metric}_sum{fmt(labels)} {sums[(name, labels)]:g}")
+                    lines.append(f"{metric}_count{fmt(labels)} {counts[(name, labels)]}")
+        return ("\n".join(lines) + "\n").encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+
+
+# 进程级共享的流水线指标
+pipeline_metrics = PipelineMetrics()
+
+
+class JobTrace:
+    """
+    单次流水线运行的耗时和用量记录
+
+    任务队列的各阶段在不同线程中执行，记录通过 to_dict / from_dict 保存在任务行上，
+    完成时写入摘要行的 metrics 列。结构：
+
+        {
+            "stages": {"download": {"wall_s": 3.2, "cpu_s": 0.4}, ...},
+            "audio_seconds": 600.0, "real_time_factor": 0.21, "transcript_chars": 9000,
+            "chunk_count": 3, "openai_requests": 4, "prompt_tokens": 7000, "completion_tokens": 1800,
+            "profiled": false
+        }
+    """
+
+    def __init__(self, trace_id: str, data: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self._lock = threading.Lock()
+        self.data: Dict[str, Any] = dict(data or {})
+        self.data.setdefault("stages", {})
+        if "profiled" not in self.data:
+            self.data["profiled"] = PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    @property
+    def profiled(self) -> bool:
+        return bool(self.data.get("profiled"))
+
+    @contextmanager
+    def stage(self, name: str, cpu: bool = True) -> Iterator[None]:
+        """
+        记录一个阶段的墙钟时间和 CPU 时间，抽样的任务同时记录性能剖析
+
+        cpu=False 用于跨线程逐步执行的阶段（如流式转录），只记录墙钟时间，不做剖析。
+        """
+        profiler = self._start_profiler() if cpu and self.profiled else None
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_time() if cpu else None
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu_used = _cpu_time() - cpu_start if cpu_start is not None else None
+            if profiler is not None:
+                self._save_profile(profiler, name)
+            with self._lock:
+                self.data["stages"][name] = {
+                    "wall_s": round(wall, 3),
+                    "cpu_s": round(cpu_used, 3) if cpu_used is not None else None,
+                }
+            pipeline_metrics.observe_stage(name, wall, cpu_used)
+            logger.info(f"[trace {self.trace_id}] {name}: {wall:.2f}s wall" + (f", {cpu_used:.2f}s cpu" if cpu_used is not None else ""))
+
+    def timed(self, name: str, fn):
+        """返回在 stage(name) 中执行 fn 的包装函数，用于交给线程池执行的阻塞调用"""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def set(self, **values: Any) -> None:
+        """记录音频时长、转录长度、分块数等属性"""
+        with self._lock:
+            self.data.update(values)
+
+    def add_usage(self, usage: Any) -> None:
+        """累加一次 OpenAI 调用的 token 用量（response.usage，可能为 None）"""
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        with self._lock:
+            self.data["openai_requests"] = self.data.get("openai_requests", 0) + 1
+            self.data["prompt_tokens"] = self.data.get("prompt_tokens", 0) + prompt_tokens
+            self.data["completion_tokens"] = self.data.get("completion_tokens", 0) + completion_tokens
+        pipeline_metrics.add_tokens(prompt_tokens, completion_tokens)
+
+    def finish_transcription(self, audio_seconds: float, transcript_chars: int) -> None:
+        """转录阶段结束后记录音频时长、转录长度和实时率（转录耗时 / 音频时长）"""
+        transcribe = self.data["stages"].get(STAGE_TRANSCRIBE)
+        real_time_factor = None
+        if transcribe and audio_seconds > 0:
+            real_time_factor = round(transcribe["wall_s"] / audio_seconds, 4)
+        self.set(
+            audio_seconds=round(audio_seconds, 3),
+            transcript_chars=transcript_chars,
+            real_time_factor=real_time_factor
+        )
+        pipeline_metrics.observe_transcription(audio_seconds, real_time_factor)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self.data)
+            data["stages"] = dict(self.data["stages"])
+            return data
+
+    def _start_profiler(self):
+        try:
+            if PyinstrumentProfiler is not None:
+                profiler = PyinstrumentProfiler()
+            else:
+                profiler = cProfile.Profile()
+            profiler.enable() if isinstance(profiler, cProfile.Profile) else profiler.start()
+            return profiler
+        except Exception as e:
+            # 同一线程已有剖析器在运行等情况下跳过，不影响任务本身
+            logger.warning(f"[trace {self.trace_id}] Profiler not started: {str(e)}")
+            return None
+
+    def _save_profile(self, profiler, stage: str) -> None:
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+                path = os.path.join(PROFILE_DIR, f"{self.trace_id}-{stage}.prof")
+                profiler.dump_stats(path)
+            else:
+                profiler.stop()
+                path = os.path.join(PROFILE_DIR, f"{self.trace_id}-{stage}.html")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+            logger.info(f"[trace {self.trace_id}] Saved {stage} profile: {path}")
+        except Exception as e:
+            logger.warning(f"[trace {self.trace_id}] Failed to save {stage} profile: {str(e)}")
@@ -1,43 +1,258 @@
-import whisper
 import os
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from app.services.model_registry import model_registry
+from app.services.audio import decode_audio, SAMPLE_RATE
+from app.services.vad import split_on_silence
 
 logger = logging.getLogger(__name__)
 
 # 从环境变量获取 Whisper 模型大小
 DEFAULT_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
 
-def transcribe_audio(audio_path: str, model_size: str = None) -> str:
+# 并行转录的进程数，每个进程各自加载一份模型；设置为 1 时关闭并行转录
+TRANSCRIBE_PROCESSES = int(os.getenv("TRANSCRIBE_PROCESSES", str(max(1, min(4, (os.cpu_count() or 1) // 2)))))
+
+# 音频时长达到该值（秒）时才切分并行转录
+TRANSCRIBE_PARALLEL_MIN_SECONDS = float(os.getenv("TRANSCRIBE_PARALLEL_MIN_SECONDS", "600"))
+
+# 切分片段的时长范围（秒）
+TRANSCRIBE_SEGMENT_MAX_SECONDS = float(os.getenv("TRANSCRIBE_SEGMENT_MAX_SECONDS", "300"))
+TRANSCRIBE_SEGMENT_MIN_SECONDS = float(os.getenv("TRANSCRIBE_SEGMENT_MIN_SECONDS", "30"))
+
+# 流式转录时每个片段的最大时长（秒），越短首个结果返回越快
+STREAM_SEGMENT_SECONDS = float(os.getenv("TRANSCRIBE_STREAM_SEGMENT_SECONDS", "30"))
+
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_key: Optional[Tuple[str, int]] = None
+
+# 工作进程内加载的模型
+_worker_model = None
+
+
+def _init_worker(model_size: str, torch_threads: int) -> None:
+    """工作进程初始化：限制 PyTorch 线程数并加载模型"""
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    _worker_model = model_registry.get_model(model_size)
+
+
+def _transcribe_in_worker(audio: np.ndarray) -> Dict[str, Any]:
+    """在工作进程中转录一个片段"""
+    return _worker_model.transcribe(audio, language='zh')
+
+
+def get_transcribe_pool(model_size: str, processes: int) -> ProcessPoolExecutor:
+    """
+    获取转录进程池
+
+    进程池在多次转录之间复用，每个工作进程只在启动时加载一次模型；
+    模型大小或进程数变化时重建进程池，旧进程池完成其他任务已提交的片段后退出。
+    """
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None and _pool_key == (model_size, processes):
+            return _pool
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=False)
+        torch_threads = max(1, (os.cpu_count() or 1) // processes)
+        # 使用 spawn 避免 fork 继承父进程中 PyTorch/OpenMP 的线程状态
+        _pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, torch_threads),
+        )
+        _pool_key = (model_size, processes)
+        logger.info(f"Started transcription pool: {processes} processes, model {model_size}")
+        return _pool
+
+
+def shutdown_transcribe_pool() -> None:
+    """关闭转录进程池"""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _pool_key = None
+
+
+def _stitch(results: List[Dict[str, Any]], offsets: List[float]) -> Dict[str, Any]:
+    """按顺序拼接各片段的转录结果，并把时间戳平移到整段音频的时间轴"""
+    segments = []
+    for result, offset in zip(results, offsets):
+        for segment in result.get("segments", []):
+            segments.append({
+                "id": len(segments),
+                "start": round(segment["start"] + offset, 3),
+                "end": round(segment["end"] + offset, 3),
+                "text": segment["text"],
+            })
+    text = "".join(result.get("text", "") for result in results)
+    return {"text": text, "segments": segments, "language": "zh"}
+
+
+def transcribe_long_audio(
+    audio: np.ndarray,
+    model_size: str = None,
+    processes: int = None
+) -> Dict[str, Any]:
+    """
+    在静音处切分长音频，并在进程池中并行转录
+
+    Args:
+        audio: 16 kHz 单声道 float32 PCM 数组
+        model_size: Whisper 模型大小
+        processes: 并行进程数
+
+    Returns:
+        与 Whisper transcribe 相同结构的结果：text、segments（时间戳相对整段音频）
+    """
+    if model_size is None:
+        model_size = DEFAULT_MODEL_SIZE
+    if processes is None:
+        processes = TRANSCRIBE_PROCESSES
+
+    duration = len(audio) / SAMPLE_RATE
+    # 片段长度按进程数均分，使各进程负载接近
+    max_segment = min(TRANSCRIBE_SEGMENT_MAX_SECONDS, max(TRANSCRIBE_SEGMENT_MIN_SECONDS * 2, duration / processes))
+    spans = split_on_silence(
+        audio,
+        SAMPLE_RATE,
+        max_segment_s=max_segment,
+        min_segment_s=TRANSCRIBE_SEGMENT_MIN_SECONDS,
+    )
+    if not spans:
+        return {"text": "", "segments": [], "language": "zh"}
+
+    pool = get_transcribe_pool(model_size, processes)
+    logger.info(f"Transcribing {duration:.1f}s audio as {len(spans)} segments on {processes} processes")
+    futures = [pool.submit(_transcribe_in_worker, audio[start:end]) for start, end in spans]
+    results = [future.result() for future in futures]
+    return _stitch(results, [start / SAMPLE_RATE for start, _ in spans])
+
+
+def iter_transcribe_segments(audio: np.ndarray, model_size: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    流式转录：在静音处把音频切成短片段，按时间顺序逐个产出 Whisper 分段
+
+    启用多进程时所有片段同时提交到进程池，结果仍按顺序产出；
+    否则在当前进程中使用注册表中的共享模型依次转录。
+
+    Args:
+        audio: 16 kHz 单声道 float32 PCM 数组
+        model_size: Whisper 模型大小
+
+    Yields:
+        包含 id、start、end、text 的分段，时间戳相对整段音频
+    """
+    if model_size is None:
+        model_size = DEFAULT_MODEL_SIZE
+    audio = np.asarray(audio, dtype=np.float32)
+    spans = split_on_silence(
+        audio,
+        SAMPLE_RATE,
+        max_segment_s=STREAM_SEGMENT_SECONDS,
+        min_segment_s=min(5.0, STREAM_SEGMENT_SECONDS / 2),
+    )
+
+    futures = []
+    if TRANSCRIBE_PROCESSES > 1 and len(spans) > 1:
+        pool = get_transcribe_pool(model_size, TRANSCRIBE_PROCESSES)
+        futures = [pool.submit(_transcribe_in_worker, audio[start:end]) for start, end in spans]
+
+    segment_id = 0
+    try:
+        for i, (start, end) in enumerate(spans):
+            if futures:
+                result = futures[i].result()
+            else:
+                with model_registry.use(model_size) as model:
+                    result = model.transcribe(audio[start:end], language='zh')
+            offset = start / SAMPLE_RATE
+            for segment in result.get("segments", []):
+                yield {
+                    "id": segment_id,
+                    "start": round(segment["start"] + offset, 3),
+                    "end": round(segment["end"] + offset, 3),
+                    "text": segment["text"],
+                }
+                segment_id += 1
+    finally:
+        # 消费方提前结束（如客户端断开）时取消尚未开始的片段
+        for future in futures:
+            future.cancel()
+
+
+def transcribe_with_segments(audio: Union[str, np.ndarray], model_size: str = None) -> Dict[str, Any]:
+    """
+    使用 Whisper 模型转录音频，返回全文和分段时间戳
+
+    长音频（达到 TRANSCRIBE_PARALLEL_MIN_SECONDS）在启用多进程时切分并行转录，
+    其他情况在当前进程中使用注册表中的共享模型转录。
+
+    Args:
+        audio: 音频文件路径，或已解码的 16 kHz 单声道 float32 PCM 数组
+        model_size: Whisper 模型大小 (tiny, base, small, medium, large)
+
+    Returns:
+        包含 text 和 segments 的转录结果
     """
-    使用 Whisper 模型转录音频文件
-    
+    if model_size is None:
+        model_size = DEFAULT_MODEL_SIZE
+
+    if isinstance(audio, str):
+        if not os.path.exists(audio):
+            raise FileNotFoundError(f"Audio file not found at: {audio}")
+        if TRANSCRIBE_PROCESSES > 1:
+            audio = decode_audio(audio)
+    else:
+        audio = np.asarray(audio, dtype=np.float32)
+
+    if (
+        isinstance(audio, np.ndarray)
+        and TRANSCRIBE_PROCESSES > 1
+        and len(audio) / SAMPLE_RATE >= TRANSCRIBE_PARALLEL_MIN_SECONDS
+    ):
+        return transcribe_long_audio(audio, model_size)
+
+    description = f"audio file: {audio}" if isinstance(audio, str) else f"PCM buffer: {len(audio)} samples"
+    # 从进程级注册表获取模型，避免每次请求重复加载权重
+    with model_registry.use(model_size) as model:
+        logger.info(f"Transcribing {description}")
+        return model.transcribe(audio, language='zh')
+
+
+def transcribe_audio(audio: Union[str, np.ndarray], model_size: str = None) -> str:
+    """
+    使用 Whisper 模型转录音频
+
     Args:
-        audio_path: 音频文件路径
+        audio: 音频文件路径，或已解码的 16 kHz 单声道 float32 PCM 数组
         model_size: Whisper 模型大小 (tiny, base, small, medium, large)
-    
+
     Returns:
         转录后的文本
     """
     try:
-        # 如果没有指定模型大小，使用默认模型大小
-        if model_size is None:
-            model_size = DEFAULT_MODEL_SIZE
-            
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"Audio file not found at: {audio_path}")
-            
-        logger.info(f"Loading Whisper model: {model_size}")
-        model = whisper.load_model(model_size)
-        
-        logger.info(f"Transcribing audio file: {audio_path}")
-        result = model.transcribe(audio_path, language='zh')
-        
+        result = transcribe_with_segments(audio, model_size)
+
         if not result or "text" not in result:
             raise ValueError("Transcription failed: No text output")
-            
+
         transcript = result["text"]
         logger.info(f"Transcription completed. Length: {len(transcript)} characters")
-        
+
         return transcript
     except Exception as e:
         logger.error(f"Error transcribing audio: {str(e)}")
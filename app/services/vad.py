@@ -0,0 +1,108 @@
+import logging
+from typing import List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 分帧长度（毫秒）
+FRAME_MS = 30
+
+# 噪声底估计的分位数，以及语音判定高于噪声底的分贝数
+NOISE_PERCENTILE = 10
+SPEECH_MARGIN_DB = 12.0
+
+# 低于该绝对能量（dBFS）的帧始终视为静音
+ABSOLUTE_SILENCE_DB = -60.0
+
+
+def frame_energy_db(audio: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """计算每一帧的 RMS 能量（dBFS），最后不足一帧的部分补零"""
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = int(np.ceil(len(audio) / frame_len))
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+    padded[:len(audio)] = audio
+    frames = padded.reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return (20.0 * np.log10(np.maximum(rms, 1e-10))).astype(np.float32)
+
+
+def speech_mask(audio: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """
+    基于能量的语音活动检测
+
+    阈值取噪声底（能量的低分位数）加上固定余量，并且不低于绝对静音阈值。
+
+    Returns:
+        每一帧是否为语音的布尔数组
+    """
+    energy = frame_energy_db(audio, sample_rate, frame_ms)
+    if len(energy) == 0:
+        return np.zeros(0, dtype=bool)
+    noise_floor = float(np.percentile(energy, NOISE_PERCENTILE))
+    threshold = max(noise_floor + SPEECH_MARGIN_DB, ABSOLUTE_SILENCE_DB)
+    return energy > threshold
+
+
+def _silence_runs(mask: np.ndarray, min_frames: int) -> List[Tuple[int, int]]:
+    """返回长度不少于 min_frames 的静音区间（帧下标，左闭右开）"""
+    silent = (~mask).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], silent, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return [(int(s), int(e)) for s, e in zip(starts, ends) if e - s >= min_frames]
+
+
+def split_on_silence(
+    audio: np.ndarray,
+    sample_rate: int,
+    max_segment_s: float = 240.0,
+    min_segment_s: float = 30.0,
+    min_silence_ms: int = 300,
+    frame_ms: int = FRAME_MS
+) -> List[Tuple[int, int]]:
+    """
+    在静音处把长音频切分成不超过 max_segment_s 的片段
+
+    切点取静音区间的中点；在 [min_segment_s, max_segment_s] 范围内找不到静音时
+    在 max_segment_s 处强制切分。完全没有语音的片段会被丢弃。
+
+    Returns:
+        (起始采样点, 结束采样点) 列表，按时间顺序排列
+    """
+    total = len(audio)
+    if total == 0:
+        return []
+
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    mask = speech_mask(audio, sample_rate, frame_ms)
+    runs = _silence_runs(mask, max(1, min_silence_ms // frame_ms))
+    # 候选切点（采样点）
+    cuts = np.array([((s + e) // 2) * frame_len for s, e in runs], dtype=np.int64)
+
+    max_len = int(max_segment_s * sample_rate)
+    min_len = int(min_segment_s * sample_rate)
+    segments = []
+    start = 0
+    while start < total:
+        if total - start <= max_len:
+            end = total
+        else:
+            lo = np.searchsorted(cuts, start + min_len, side="left")
+            hi = np.searchsorted(cuts, start + max_len, side="right")
+            end = int(cuts[hi - 1]) if hi > lo else start + max_len
+        segments.append((start, end))
+        start = end
+
+    # 丢弃完全静音的片段
+    voiced = []
+    for start, end in segments:
+        if mask[start // frame_len:max(start // frame_len + 1, end // frame_len)].any():
+            voiced.append((start, end))
+    logger.info(
+        f"Split {total / sample_rate:.1f}s audio into {len(voiced)} voiced segments "
+        f"({len(segments) - len(voiced)} silent segments dropped)"
+    )
+    return voiced
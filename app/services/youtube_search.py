@@ -1,212 +1,339 @@
 import os
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Iterable, Optional
 import yt_dlp
+from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 import re
 
+from app.database.base import SessionLocal
+from app.crud.channel import (
+    get_channel_by_key,
+    get_channel_video_ids,
+    get_latest_channel_videos,
+    save_channel_videos
+)
+
 logger = logging.getLogger(__name__)
 
+# 增量刷新时最多抓取的新视频数；超过仍未遇到已知视频时，重新建立该频道的索引
+CHANNEL_INDEX_MAX_NEW = int(os.getenv("CHANNEL_INDEX_MAX_NEW", "200"))
+
+# 规范化频道标识 -> 刷新锁；同一频道的刷新串行执行，
+# 否则并发刷新（如 max_results 不同的两个缓存键）会读到同样的已知视频并重复插入新视频
+_refresh_locks: Dict[str, threading.Lock] = {}
+_refresh_locks_guard = threading.Lock()
+
+_CHANNEL_ID_PATTERN = re.compile(r'^(?:https?://)?(?:www\.|m\.)?youtube\.com/channel/([^/?#\s]+)', re.IGNORECASE)
+_CHANNEL_URL_PREFIX = re.compile(r'^(?:https?://)?(?:www\.|m\.)?youtube\.com/', re.IGNORECASE)
+
+def normalize_channel(channel_name: str) -> str:
+    """
+    规范化频道输入，使同一频道的不同写法得到同一个标识
+
+    频道名、@handle 和 /c/、/user/ 链接不区分大小写；/channel/ 后的频道ID区分大小写，保持原样。
+    """
+    value = " ".join(channel_name.split())
+    match = _CHANNEL_ID_PATTERN.match(value)
+    if match:
+        return f"channel/{match.group(1)}"
+    value = _CHANNEL_URL_PREFIX.sub("", value).rstrip("/")
+    if value.lower().endswith("/videos"):
+        value = value[:-len("/videos")]
+    return value.lower()
+
+def format_video_entry(video: Dict[str, Any]) -> Dict[str, Any]:
+    """把 yt-dlp 的条目转换为返回给客户端的视频信息"""
+    # 解析上传日期
+    upload_date = video.get('upload_date') or ''
+    if len(upload_date) == 8:
+        formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
+    else:
+        formatted_date = ""
+
+    return {
+        'id': video.get('id', ''),
+        'title': video.get('title', ''),
+        'url': f"https://www.youtube.com/watch?v={video.get('id', '')}",
+        'upload_date': formatted_date,
+        'duration': int(video['duration']) if video.get('duration') is not None else 0,
+        'view_count': video.get('view_count') or 0,
+        'description': video.get('description') or ''
+    }
+
+def _indexed_video(video) -> Dict[str, Any]:
+    """把 ChannelVideo 记录转换为视频信息"""
+    return {
+        'id': video.video_id,
+        'title': video.title or '',
+        'url': f"https://www.youtube.com/watch?v={video.video_id}",
+        'upload_date': video.upload_date or '',
+        'duration': video.duration or 0,
+        'view_count': video.view_count or 0,
+        'description': video.description or ''
+    }
+
+def resolve_channel_url(channel_name: str) -> Optional[str]:
+    """
+    把博主名字或频道链接解析为频道链接
+
+    Returns:
+        频道链接，找不到频道时返回 None
+    """
+    # 检查是否已经是一个YouTube频道链接
+    channel_url_pattern = re.compile(r'(https?://)?(www\.)?youtube\.com/(@|channel/|c/|user/)?([^/\s]+)')
+    channel_match = channel_url_pattern.match(channel_name)
+
+    if channel_match:
+        # 已经是频道链接，直接使用
+        logger.info(f"Input appears to be a channel URL: {channel_name}")
+        if not channel_name.startswith('http'):
+            return f"https://{channel_name}"
+        return channel_name
+
+    # 使用搜索功能查找频道
+    logger.info(f"Searching for channel: {channel_name}")
+
+    ydl_opts_search = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': True,
+        'force_generic_extractor': False,  # 修改为False
+        'ignoreerrors': True,
+        'skip_download': True,
+    }
+
+    # 构建搜索查询
+    search_query = f"ytsearch:{channel_name} channel"
+
+    try:
+        # 搜索频道
+        with yt_dlp.YoutubeDL(ydl_opts_search) as ydl:
+            search_results = ydl.extract_info(search_query, download=False)
+
+            if not search_results or 'entries' not in search_results or not search_results['entries']:
+                logger.warning(f"No channel found for: {channel_name}")
+                return None
+
+            # 尝试找到匹配的频道
+            for entry in search_results['entries']:
+                # 检查是否为频道
+                if 'url' in entry and ('youtube.com/@' in entry['url'] or
+                                      'youtube.com/channel/' in entry['url'] or
+                                      'youtube.com/c/' in entry['url'] or
+                                      'youtube.com/user/' in entry['url']):
+                    logger.info(f"Found channel URL: {entry['url']}")
+                    return entry['url']
+
+            # 尝试使用第一个结果对应的频道
+            if 'uploader_url' in search_results['entries'][0]:
+                channel_url = search_results['entries'][0]['uploader_url']
+                logger.info(f"Using uploader URL as channel: {channel_url}")
+                return channel_url
+            logger.warning(f"Could not find channel URL for: {channel_name}")
+            return None
+    except Exception as e:
+        logger.error(f"Error during channel search: {str(e)}")
+        # 尝试直接构建可能的频道URL
+        channel_url = f"https://www.youtube.com/@{channel_name.replace(' ', '')}"
+        logger.info(f"Attempting with constructed URL: {channel_url}")
+        return channel_url
+
+def _extract_listing(ydl, playlist_url: str) -> Optional[Dict[str, Any]]:
+    """
+    提取上传列表但不展开条目
+
+    process=False 时 entries 是惰性的生成器，遍历时才按页请求，提前停止即可省去后续分页。
+    """
+    info = ydl.extract_info(playlist_url, download=False, process=False)
+    # 跟随一次重定向（如 /c/ 或 /user/ 链接重定向到 /channel/）
+    if info and info.get('_type') in ('url', 'url_transparent') and info.get('url'):
+        info = ydl.extract_info(info['url'], download=False, process=False)
+    return info
+
+def _open_videos_listing(ydl, channel_url: str) -> Optional[Iterable[Dict[str, Any]]]:
+    """打开频道的上传视频列表，返回惰性的条目迭代器；找不到列表时返回 None"""
+    # 添加 /videos 以获取上传的视频列表
+    if not channel_url.endswith('/videos'):
+        playlist_url = f"{channel_url}/videos"
+    else:
+        playlist_url = channel_url
+
+    logger.info(f"Fetching videos from: {playlist_url}")
+    channel_info = _extract_listing(ydl, playlist_url)
+
+    if not channel_info or 'entries' not in channel_info:
+        logger.warning(f"No videos found for channel: {channel_url}")
+        # 尝试一个备选方案
+        if '@' in channel_url:
+            # 尝试移除@符号
+            alt_url = channel_url.replace('@', 'c/')
+            logger.info(f"Trying alternative URL: {alt_url}/videos")
+            channel_info = _extract_listing(ydl, f"{alt_url}/videos")
+
+        if not channel_info or 'entries' not in channel_info:
+            logger.warning(f"Alternative attempt also failed")
+            return None
+    return channel_info['entries'] or []
+
+def _get_refresh_lock(channel_key: str) -> threading.Lock:
+    with _refresh_locks_guard:
+        if channel_key not in _refresh_locks:
+            _refresh_locks[channel_key] = threading.Lock()
+        return _refresh_locks[channel_key]
+
+def refresh_channel_index(db, channel_url: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    刷新频道视频索引并返回最新的 max_results 个视频
+
+    已索引的视频足够时只做增量抓取：从上传列表开头读取，遇到第一个已知视频即停止分页，
+    新视频追加到索引最前面；否则抓取前 max_results 个视频重新建立索引。
+
+    Args:
+        db: 数据库会话
+        channel_url: 频道链接
+        max_results: 最大返回结果数量
+
+    Returns:
+        List[Dict]: 视频信息列表，按上传顺序降序；找不到上传列表时返回 None
+    """
+    channel_key = normalize_channel(channel_url)
+    # 读取已知视频到写入新视频之间持有该频道的锁
+    with _get_refresh_lock(channel_key):
+        return _refresh_channel_index(db, channel_key, channel_url, max_results)
+
+def _refresh_channel_index(db, channel_key: str, channel_url: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+    channel = get_channel_by_key(db, channel_key)
+    known = get_channel_video_ids(db, channel.id) if channel else set()
+    incremental = channel is not None and (channel.fully_indexed or len(known) >= max_results)
+    # 增量抓取至少读 max_results 个条目，未遇到已知视频而重建索引时结果仍然完整
+    limit = max(CHANNEL_INDEX_MAX_NEW, max_results) if incremental else max_results
+
+    ydl_opts_videos = {
+        'quiet': True,
+        'no_warnings': True,
+        'ignoreerrors': True,
+        'extract_flat': True,
+        'skip_download': True,
+    }
+
+    new_videos = []
+    reached_known = False
+    exhausted = True
+    with yt_dlp.YoutubeDL(ydl_opts_videos) as ydl:
+        entries = _open_videos_listing(ydl, channel_url)
+        if entries is None:
+            return None
+        for entry in entries:
+            if not entry or not entry.get('id'):
+                continue
+            if incremental and entry['id'] in known:
+                reached_known = True
+                break
+            new_videos.append(format_video_entry(entry))
+            if len(new_videos) >= limit:
+                exhausted = False
+                break
+
+    if incremental and reached_known:
+        logger.info(f"Channel {channel_key}: {len(new_videos)} new videos since last refresh")
+        if new_videos:
+            channel = save_channel_videos(db, channel_key, channel_url, new_videos)
+    else:
+        # 首次抓取、已索引的视频不足，或新视频超过 CHANNEL_INDEX_MAX_NEW 与旧索引之间可能有缺口
+        logger.info(f"Channel {channel_key}: rebuilding index with {len(new_videos)} videos")
+        channel = save_channel_videos(
+            db, channel_key, channel_url, new_videos, replace=True, fully_indexed=exhausted
+        )
+
+    return [_indexed_video(video) for video in get_latest_channel_videos(db, channel.id, max_results)]
+
+def _search_videos_by_name(channel_name: str, max_results: int) -> List[Dict[Any, Any]]:
+    """直接使用频道名称作为关键词搜索视频，只保留上传者匹配的结果"""
+    logger.info(f"Trying direct video search for: {channel_name}")
+    search_query = f"ytsearch{max_results}:{channel_name}"
+
+    ydl_opts_videos = {
+        'quiet': True,
+        'no_warnings': True,
+        'ignoreerrors': True,
+        'extract_flat': True,
+        'skip_download': True,
+        'playlistend': max_results
+    }
+
+    with yt_dlp.YoutubeDL(ydl_opts_videos) as ydl_direct:
+        search_results = ydl_direct.extract_info(search_query, download=False)
+
+        if not search_results or 'entries' not in search_results:
+            return []
+
+        videos = []
+        for video in search_results.get('entries', []):
+            if not video:
+                continue
+
+            # 过滤掉不是指定频道的视频
+            video_uploader = (video.get('uploader') or '').lower()
+            if channel_name.lower() not in video_uploader:
+                continue
+
+            videos.append(format_video_entry(video))
+
+        # 按上传日期排序（降序）
+        videos.sort(key=lambda x: x['upload_date'], reverse=True)
+
+        logger.info(f"Found {len(videos)} videos via direct search for: {channel_name}")
+        return videos
+
 def search_channel_videos(channel_name: str, max_results: int = 20) -> List[Dict[Any, Any]]:
     """
     搜索特定YouTube博主/频道的视频列表并按上传时间排序
-    
+
+    频道的上传列表保存在 channel_videos 表中，再次搜索同一频道时只增量抓取新上传的视频。
+
     Args:
         channel_name: YouTube博主名字或频道名称
         max_results: 最大返回结果数量，默认20
-        
+
     Returns:
         List[Dict]: 包含视频信息的列表，按上传日期降序排序
     """
     try:
         logger.info(f"Searching videos for channel: {channel_name}")
-        
-        # 检查是否已经是一个YouTube频道链接
-        channel_url_pattern = re.compile(r'(https?://)?(www\.)?youtube\.com/(@|channel/|c/|user/)?([^/\s]+)')
-        channel_match = channel_url_pattern.match(channel_name)
-        
-        if channel_match:
-            # 已经是频道链接，直接使用
-            logger.info(f"Input appears to be a channel URL: {channel_name}")
-            channel_url = channel_name
-            if not channel_name.startswith('http'):
-                channel_url = f"https://{channel_name}"
-        else:
-            # 使用搜索功能查找频道
-            logger.info(f"Searching for channel: {channel_name}")
-            
-            ydl_opts_search = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': True,
-                'force_generic_extractor': False,  # 修改为False
-                'ignoreerrors': True,
-                'skip_download': True,
-            }
-            
-            # 构建搜索查询
-            search_query = f"ytsearch:{channel_name} channel"
-            
-            try:
-                # 搜索频道
-                with yt_dlp.YoutubeDL(ydl_opts_search) as ydl:
-                    search_results = ydl.extract_info(search_query, download=False)
-                    
-                    if not search_results or 'entries' not in search_results or not search_results['entries']:
-                        logger.warning(f"No channel found for: {channel_name}")
-                        return []
-                    
-                    # 尝试找到匹配的频道
-                    channel_url = None
-                    for entry in search_results['entries']:
-                        # 检查是否为频道
-                        if 'url' in entry and ('youtube.com/@' in entry['url'] or 
-                                              'youtube.com/channel/' in entry['url'] or
-                                              'youtube.com/c/' in entry['url'] or
-                                              'youtube.com/user/' in entry['url']):
-                            channel_url = entry['url']
-                            logger.info(f"Found channel URL: {channel_url}")
-                            break
-                    
-                    if not channel_url:
-                        # 尝试使用第一个结果对应的频道
-                        if 'uploader_url' in search_results['entries'][0]:
-                            channel_url = search_results['entries'][0]['uploader_url']
-                            logger.info(f"Using uploader URL as channel: {channel_url}")
-                        else:
-                            logger.warning(f"Could not find channel URL for: {channel_name}")
-                            return []
-            except Exception as e:
-                logger.error(f"Error during channel search: {str(e)}")
-                # 尝试直接构建可能的频道URL
-                channel_url = f"https://www.youtube.com/@{channel_name.replace(' ', '')}"
-                logger.info(f"Attempting with constructed URL: {channel_url}")
-        
+
+        channel_url = resolve_channel_url(channel_name)
+        if not channel_url:
+            return []
+
         # 获取频道的视频
         logger.info(f"Fetching videos from channel: {channel_url}")
-        
-        ydl_opts_videos = {
-            'quiet': True,
-            'no_warnings': True,
-            'ignoreerrors': True,
-            'extract_flat': True,
-            'skip_download': True,
-            'playlistend': max_results
-        }
-        
+
         try:
-            # 获取频道上传的视频列表
-            with yt_dlp.YoutubeDL(ydl_opts_videos) as ydl_videos:
-                # 添加 /videos 以获取上传的视频列表
-                if not channel_url.endswith('/videos'):
-                    playlist_url = f"{channel_url}/videos"
-                else:
-                    playlist_url = channel_url
-                
-                logger.info(f"Fetching videos from: {playlist_url}")
-                channel_info = ydl_videos.extract_info(playlist_url, download=False)
-                
-                if not channel_info or 'entries' not in channel_info:
-                    logger.warning(f"No videos found for channel: {channel_url}")
-                    # 尝试一个备选方案
-                    if '@' in channel_url:
-                        # 尝试移除@符号
-                        alt_url = channel_url.replace('@', 'c/')
-                        logger.info(f"Trying alternative URL: {alt_url}/videos")
-                        channel_info = ydl_videos.extract_info(f"{alt_url}/videos", download=False)
-                    
-                    if not channel_info or 'entries' not in channel_info:
-                        logger.warning(f"Alternative attempt also failed")
-                        return []
-                
-                # 处理视频信息
-                videos = []
-                for video in channel_info.get('entries', []):
-                    if not video:
-                        continue
-                    
-                    # 解析上传日期
-                    upload_date = video.get('upload_date', '')
-                    if upload_date and len(upload_date) == 8:
-                        try:
-                            formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                        except Exception:
-                            formatted_date = ""
-                    else:
-                        formatted_date = ""
-                    
-                    # 构建视频信息对象
-                    video_info = {
-                        'id': video.get('id', ''),
-                        'title': video.get('title', ''),
-                        'url': f"https://www.youtube.com/watch?v={video.get('id', '')}",
-                        'upload_date': formatted_date,
-                        'duration': video.get('duration', 0),
-                        'view_count': video.get('view_count', 0),
-                        'description': video.get('description', '')
-                    }
-                    videos.append(video_info)
-                
-                # 按上传日期排序（降序）
-                videos.sort(key=lambda x: x['upload_date'], reverse=True)
-                
-                logger.info(f"Found {len(videos)} videos for channel: {channel_name}")
-                return videos
-        
+            db = SessionLocal()
+            try:
+                videos = refresh_channel_index(db, channel_url, max_results)
+            finally:
+                db.close()
+
+            if videos is None:
+                return []
+            logger.info(f"Found {len(videos)} videos for channel: {channel_name}")
+            return videos
+
+        except SQLAlchemyError:
+            # 数据库错误不是提取失败，不回退到按名称搜索（回退结果会被频道缓存保存）
+            raise
         except Exception as e:
             logger.error(f"Error fetching channel videos: {str(e)}")
             # 最后的尝试：直接使用频道名称作为关键词搜索视频
             try:
-                logger.info(f"Trying direct video search for: {channel_name}")
-                search_query = f"ytsearch{max_results}:{channel_name}"
-                
-                with yt_dlp.YoutubeDL(ydl_opts_videos) as ydl_direct:
-                    search_results = ydl_direct.extract_info(search_query, download=False)
-                    
-                    if not search_results or 'entries' not in search_results:
-                        return []
-                    
-                    videos = []
-                    for video in search_results.get('entries', []):
-                        if not video:
-                            continue
-                        
-                        # 过滤掉不是指定频道的视频
-                        video_uploader = video.get('uploader', '').lower()
-                        if channel_name.lower() not in video_uploader:
-                            continue
-                        
-                        # 解析上传日期
-                        upload_date = video.get('upload_date', '')
-                        if upload_date and len(upload_date) == 8:
-                            try:
-                                formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                            except Exception:
-                                formatted_date = ""
-                        else:
-                            formatted_date = ""
-                        
-                        # 构建视频信息对象
-                        video_info = {
-                            'id': video.get('id', ''),
-                            'title': video.get('title', ''),
-                            'url': f"https://www.youtube.com/watch?v={video.get('id', '')}",
-                            'upload_date': formatted_date,
-                            'duration': video.get('duration', 0),
-                            'view_count': video.get('view_count', 0),
-                            'description': video.get('description', '')
-                        }
-                        videos.append(video_info)
-                    
-                    # 按上传日期排序（降序）
-                    videos.sort(key=lambda x: x['upload_date'], reverse=True)
-                    
-                    logger.info(f"Found {len(videos)} videos via direct search for: {channel_name}")
-                    return videos
+                return _search_videos_by_name(channel_name, max_results)
             except Exception as direct_error:
                 logger.error(f"Direct video search also failed: {str(direct_error)}")
                 return []
-                
+
     except Exception as e:
         logger.error(f"Error searching YouTube channel: {str(e)}")
-        raise Exception(f"搜索YouTube频道时出错: {str(e)}") 
\ No newline at end of file
+        raise Exception(f"搜索YouTube频道时出错: {str(e)}")
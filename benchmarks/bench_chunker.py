@@ -0,0 +1,88 @@
+"""
+文本分块微基准
+
+在 10 万字符的合成转录文本上比较旧的按字符分块实现和新的按 token 分块实现：
+耗时、块数量、单块最大 token 数以及超出预算的块数量。
+
+用法:
+    python -m benchmarks.bench_chunker [--chars 100000] [--repeat 5] [--max-tokens 3000]
+"""
+import argparse
+import random
+import re
+import time
+
+from app.services.chunker import chunk_text, count_tokens, tiktoken
+
+_ZH_WORDS = ["我们", "今天", "讨论", "视频", "内容", "模型", "数据", "这个", "问题", "其实", "非常", "重要", "因为", "所以", "大家"]
+_EN_WORDS = ["the", "model", "video", "today", "we", "discuss", "data", "really", "important", "because", "so", "people", "talk"]
+
+
+def legacy_chunk_text(text, max_chunk_size=4000):
+    """旧实现：按字符数打包句子（用于对比）"""
+    sentences = re.split(r'(?<=[。！？.!?])\s*', text)
+    chunks = []
+    current_chunk = ""
+    for sentence in sentences:
+        if len(current_chunk) + len(sentence) <= max_chunk_size:
+            current_chunk += sentence
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            current_chunk = sentence
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def make_transcript(kind: str, chars: int, seed: int = 0) -> str:
+    """生成合成转录文本：zh 中文、en 英文、runon 无标点的中文（Whisper 常见输出）"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < chars:
+        if kind == "en":
+            sentence = " ".join(rng.choice(_EN_WORDS) for _ in range(rng.randint(6, 20))) + ". "
+        else:
+            sentence = "".join(rng.choice(_ZH_WORDS) for _ in range(rng.randint(5, 25)))
+            if kind == "zh":
+                sentence += rng.choice("。！？")
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)[:chars]
+
+
+def measure(fn, text, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunker micro-benchmark")
+    parser.add_argument("--chars", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-tokens", type=int, default=3000)
+    parser.add_argument("--overlap", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"tokenizer: {'tiktoken' if tiktoken else 'estimator'}, budget: {args.max_tokens} tokens")
+    print(f"{'text':<6} {'impl':<8} {'time_ms':>9} {'chunks':>7} {'max_tok':>8} {'over':>5}")
+    for kind in ("zh", "en", "runon"):
+        text = make_transcript(kind, args.chars)
+        for name, fn in (
+            ("legacy", legacy_chunk_text),
+            ("token", lambda t: chunk_text(t, max_tokens=args.max_tokens, overlap_tokens=args.overlap)),
+        ):
+            elapsed, chunks = measure(fn, text, args.repeat)
+            sizes = [count_tokens(chunk) for chunk in chunks]
+            over = sum(1 for size in sizes if size > args.max_tokens)
+            print(f"{kind:<6} {name:<8} {elapsed * 1000:>9.1f} {len(chunks):>7} {max(sizes):>8} {over:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+SQLite 并发写入基准
+
+多个线程同时向同一个 SQLite 文件写入摘要记录（每次写入一个事务），比较：
+- default: 旧的引擎配置（只设置 check_same_thread，回滚日志 + synchronous=FULL）
+- tuned: app/database/config.py 的配置（WAL、synchronous=NORMAL、busy_timeout 等）
+
+同时运行若干读线程分页查询列表，输出写入吞吐、写入延迟分位数和 database is locked 错误数。
+
+用法:
+    python -m benchmarks.bench_concurrent_writers [--writers 8] [--readers 2] [--seconds 5]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database.base import Base
+from app.database.config import create_db_engine
+from app.models import VideoSummary
+from app.crud.summary import get_summaries
+
+TRANSCRIPT = "今天我们讨论视频内容。" * 200
+
+
+def legacy_engine(url):
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def run(engine, writers: int, readers: int, seconds: float):
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = []
+    stats = {"commits": 0, "locked": 0, "reads": 0}
+
+    def writer(n):
+        i = 0
+        while not stop.is_set():
+            db = session_factory()
+            try:
+                start = time.perf_counter()
+                db.add(VideoSummary(
+                    video_id=f"w{n}-{i}",
+                    video_url=f"https://youtu.be/w{n}-{i}",
+                    transcript=TRANSCRIPT,
+                    summary="摘要",
+                    user_id=n + 1,
+                ))
+                db.commit()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    stats["commits"] += 1
+                    latencies.append(elapsed)
+            except OperationalError as e:
+                db.rollback()
+                with lock:
+                    stats["locked"] += "locked" in str(e)
+            finally:
+                db.close()
+            i += 1
+
+    def reader():
+        while not stop.is_set():
+            db = session_factory()
+            try:
+                get_summaries(db, limit=50)
+                with lock:
+                    stats["reads"] += 1
+            except OperationalError as e:
+                with lock:
+                    stats["locked"] += "locked" in str(e)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 if latencies else 0.0
+    return stats["commits"] / seconds, pick(0.5), pick(0.99), stats["reads"] / seconds, stats["locked"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite concurrent writers benchmark")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s per run")
+    print(f"{'engine':<8} {'commits/s':>10} {'p50_ms':>8} {'p99_ms':>8} {'reads/s':>9} {'locked':>7}")
+    for name, factory in (("default", legacy_engine), ("tuned", create_db_engine)):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = factory(f"sqlite:///{os.path.join(tmp, 'writers.db')}")
+            commits, p50, p99, reads, locked = run(engine, args.writers, args.readers, args.seconds)
+            print(f"{name:<8} {commits:>10.0f} {p50:>8.1f} {p99:>8.1f} {reads:>9.0f} {locked:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+摘要列表分页基准
+
+在预置了大量长转录的 SQLite 数据库上比较两种列表实现的单页耗时（查询 + 序列化为 JSON）：
+- legacy: 加载整行并按 SummaryResponse 序列化（包含完整转录和摘要）
+- list: 只加载列表字段，摘要在数据库中截取为预览，按 SummaryListItem 序列化
+- keyset: 同 list，但用游标（键集分页）代替 offset 定位到同一页
+
+用法:
+    python -m benchmarks.bench_list_summaries [--rows 10000] [--transcript-chars 20000] [--pages 30]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database.base import Base
+from app.models import VideoSummary
+from app.crud.summary import get_summaries, LIST_FIELDS
+from app.crud.pagination import encode_cursor
+from app.schemas.summary import SummaryResponse, SummaryListItem
+
+_ZH_WORDS = ["我们", "今天", "讨论", "视频", "内容", "模型", "数据", "这个", "问题", "其实", "非常", "重要", "。"]
+
+
+def seed(session_factory, rows: int, transcript_chars: int, summary_chars: int) -> None:
+    rng = random.Random(0)
+    # 预先生成少量文本循环使用，避免生成文本的时间主导预置过程
+    transcripts = ["".join(rng.choice(_ZH_WORDS) for _ in range(transcript_chars // 2))[:transcript_chars] for _ in range(8)]
+    summaries = ["".join(rng.choice(_ZH_WORDS) for _ in range(summary_chars // 2))[:summary_chars] for _ in range(8)]
+    db = session_factory()
+    try:
+        batch = []
+        for i in range(rows):
+            batch.append({
+                "video_id": f"vid{i:07d}",
+                "video_url": f"https://www.youtube.com/watch?v=vid{i:07d}",
+                "video_title": f"Video {i}",
+                "channel_name": f"Channel {i % 50}",
+                "transcript": transcripts[i % len(transcripts)],
+                "summary": summaries[i % len(summaries)],
+                "user_id": 1,
+            })
+            if len(batch) == 1000:
+                db.execute(insert(VideoSummary), batch)
+                batch = []
+        if batch:
+            db.execute(insert(VideoSummary), batch)
+        db.commit()
+    finally:
+        db.close()
+
+
+def legacy_page(db, skip: int, limit: int) -> bytes:
+    rows = db.query(VideoSummary).order_by(VideoSummary.created_at.desc()).offset(skip).limit(limit).all()
+    return TypeAdapter(List[SummaryResponse]).dump_json([SummaryResponse.model_validate(row) for row in rows])
+
+
+def list_page(db, skip: int, limit: int, cursor: str = None) -> bytes:
+    rows = get_summaries(db, skip=skip, limit=limit, cursor=cursor)
+    items = [SummaryListItem(**{field: getattr(row, field) for field in LIST_FIELDS}) for row in rows]
+    return TypeAdapter(List[SummaryListItem]).dump_json(items, exclude_unset=True)
+
+
+def measure(session_factory, page_fn, offsets: List[int], limit: int):
+    timings = []
+    size = 0
+    for skip in offsets:
+        db = session_factory()
+        try:
+            start = time.perf_counter()
+            body = page_fn(db, skip, limit)
+            timings.append(time.perf_counter() - start)
+            size = max(size, len(body))
+        finally:
+            db.close()
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1], size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summary list pagination benchmark")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--transcript-chars", type=int, default=20_000)
+    parser.add_argument("--summary-chars", type=int, default=2_000)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        start = time.perf_counter()
+        seed(session_factory, args.rows, args.transcript_chars, args.summary_chars)
+        print(f"seeded {args.rows} rows ({args.transcript_chars} transcript chars each) in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(1)
+        offsets = [rng.randrange(0, max(1, args.rows - args.limit)) for _ in range(args.pages)]
+        # 预先取得每个 offset 前一行的游标，键集分页从该行之后继续
+        db = session_factory()
+        try:
+            anchors = get_summaries(db, limit=args.rows, fields=["id", "created_at"])
+            cursors = {skip: encode_cursor(anchors[skip - 1].created_at, anchors[skip - 1].id) for skip in offsets if skip}
+        finally:
+            db.close()
+
+        def keyset_page(db, skip, limit):
+            return list_page(db, 0, limit, cursor=cursors.get(skip))
+
+        print(f"{'impl':<8} {'p50_ms':>9} {'p95_ms':>9} {'page_kb':>9}")
+        for name, fn in (("legacy", legacy_page), ("list", list_page), ("keyset", keyset_page)):
+            p50, p95, size = measure(session_factory, fn, offsets, args.limit)
+            print(f"{name:<8} {p50 * 1000:>9.1f} {p95 * 1000:>9.1f} {size / 1024:>9.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+登录负载基准
+
+在临时 SQLite 数据库上并发调用 POST /api/auth/token，同时以固定间隔请求 GET /，
+比较两种密码校验方式下的登录延迟和其他请求被拖慢的程度：
+- event-loop: 在事件循环中直接校验 bcrypt（旧行为，校验期间其他请求全部等待）
+- pool: 在专用的有界线程池中校验（app/auth/security.py）
+
+输出登录 p50/p99、登录吞吐和探测请求 GET / 的 p99。
+成本因子由 BCRYPT_ROUNDS 环境变量控制，线程池大小由 PASSWORD_HASH_WORKERS 控制。
+
+用法:
+    python -m benchmarks.bench_login [--users 20] [--concurrency 16] [--logins 64]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'login.db')}"
+os.environ.setdefault("WHISPER_PRELOAD", "false")
+
+import httpx
+from sqlalchemy import insert
+
+import app.crud.async_user as async_user
+from app.auth.security import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, get_password_hash, verify_and_update_password
+from app.database.base import Base, engine, async_engine, SessionLocal
+from app.models import User
+from main import app
+
+PASSWORD = "BenchPassw0rd"
+
+
+def seed(users: int) -> None:
+    Base.metadata.create_all(engine)
+    # 所有用户共用一个哈希，避免预置过程本身花费数秒
+    hashed = get_password_hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {"email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": hashed}
+            for i in range(users)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _verify_on_event_loop(plain_password, hashed_password):
+    return verify_and_update_password(plain_password, hashed_password)
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else 0.0
+
+
+async def run(users: int, concurrency: int, logins: int):
+    transport = httpx.ASGITransport(app=app)
+    login_latencies, probe_latencies = [], []
+    remaining = iter(range(logins))
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login_worker():
+            for i in remaining:
+                start = time.perf_counter()
+                r = await client.post("/api/auth/token", data={"username": f"user{i % users}", "password": PASSWORD})
+                r.raise_for_status()
+                login_latencies.append(time.perf_counter() - start)
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/")
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+    # 异步连接绑定在当前事件循环上，下一轮使用新的事件循环
+    await async_engine.dispose()
+
+    return percentile(login_latencies, 0.5), percentile(login_latencies, 0.99), logins / elapsed, percentile(probe_latencies, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent login latency benchmark")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    seed(args.users)
+    print(f"bcrypt rounds={BCRYPT_ROUNDS}, pool workers={PASSWORD_HASH_WORKERS}, "
+          f"{args.concurrency} concurrent clients, {args.logins} logins")
+    print(f"{'mode':<11} {'login_p50':>10} {'login_p99':>10} {'logins/s':>9} {'probe_p99':>10}")
+    pooled = async_user.verify_and_update_password_async
+    for name, verify in (("event-loop", _verify_on_event_loop), ("pool", pooled)):
+        async_user.verify_and_update_password_async = verify
+        p50, p99, throughput, probe_p99 = asyncio.run(run(args.users, args.concurrency, args.logins))
+        print(f"{name:<11} {p50:>10.1f} {p99:>10.1f} {throughput:>9.1f} {probe_p99:>10.1f}")
+    async_user.verify_and_update_password_async = pooled
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
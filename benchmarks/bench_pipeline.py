@@ -0,0 +1,390 @@
+"""
+端到端摘要流水线基准（离线）
+
+在本地替身上分别运行流水线的各个阶段和完整接口：
+- download: app.services.downloader.download_audio，yt-dlp 的提取器替换为本地夹具（benchmarks/fake_youtube.py），
+  音频经 yt-dlp 的 HTTP 下载器从本地端口下载
+- transcribe: app.services.transcriber.transcribe_audio，使用 --model 指定的 Whisper 模型（默认 tiny），
+  输入为合成语音（安装了 espeak-ng 时）或合成音调夹具
+- summarize: app.services.summarizer.summarize_text，调用本地 OpenAI 兼容桩服务（benchmarks/openai_stub.py）
+- api: POST /api/videos/summarize 提交任务并轮询 GET /api/videos/jobs/{job_id} 直到完成，
+  经过后台任务队列的下载、解码、转录和摘要；使用临时 SQLite 数据库
+
+每个阶段依次在并发度 1 到 --max-concurrency 下运行 --requests 次，报告吞吐、p50/p95/p99 延迟
+和本进程的峰值 RSS；每个阶段先预热一次（加载模型、建立连接），不计入结果。
+缺少依赖（whisper、ffmpeg）的阶段标记为 skipped，其余阶段照常运行。
+
+结果保存为 JSON（默认 benchmarks/results/bench_pipeline-<commit>.json），
+--compare 指定旧结果时逐项打印变化，--max-regression 超出时以非零状态退出。
+
+用法:
+    python -m benchmarks.bench_pipeline [--stages download,transcribe,summarize,api] [--max-concurrency 4]
+        [--requests 8] [--model tiny] [--compare benchmarks/results/bench_pipeline-<commit>.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'pipeline.db')}"
+os.environ["AUDIO_OUTPUT_DIR"] = os.path.join(_tmp.name, "audio")
+os.environ["WHISPER_PRELOAD"] = "false"
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from benchmarks.fake_youtube import FixtureServer, install_fake_extractor, make_fixtures, read_wav
+from benchmarks.openai_stub import StubOpenAIServer
+
+STAGES = ("download", "transcribe", "summarize", "api")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PASSWORD = "BenchPassw0rd"
+# 接口阶段单个任务的超时（秒）
+API_JOB_TIMEOUT = 600
+
+# 摘要阶段使用的合成转录文本的句子
+TRANSCRIPT_SENTENCE = "这是用于基准测试的第{}句合成转录文本，内容覆盖下载、转录和摘要三个阶段。"
+
+
+class StageSkipped(Exception):
+    """当前环境无法运行该阶段"""
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else 0.0
+
+
+def current_rss_mb() -> Optional[float]:
+    """本进程当前的 RSS（MB），仅 Linux"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class RssSampler:
+    """在后台线程中定期采样 RSS，记录运行期间的峰值；无法读取 /proc 时退回进程生命周期内的峰值"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = current_rss_mb() or 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss_mb()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if current_rss_mb() is None:
+            # ru_maxrss 在 Linux 上为 KB，在 macOS 上为字节
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak = maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def summarize_level(concurrency: int, latencies: List[float], errors: int, elapsed: float, peak_rss: float) -> Dict[str, Any]:
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "wall_s": round(elapsed, 3),
+        "throughput_per_s": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+
+
+def run_threaded(op: Callable[[int], Any], concurrency: int, requests: int) -> Dict[str, Any]:
+    """用 concurrency 个线程执行 requests 次 op(i)，返回该并发度的统计"""
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(i: int) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            op(i)
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Request {i} failed: {str(e)}")
+            with lock:
+                errors += 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed, range(requests)))
+        elapsed = time.perf_counter() - start
+    return summarize_level(concurrency, latencies, errors, elapsed, rss.peak)
+
+
+class Context:
+    """各阶段共用的夹具、替身服务和参数"""
+
+    def __init__(self, args):
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        fixture_dir = os.path.join(_tmp.name, "fixtures")
+        self.fixtures, self.fixture_kind = make_fixtures(
+            fixture_dir, args.fixtures, args.fixture_seconds, speech=not args.tones
+        )
+        self.audio = [read_wav(os.path.join(fixture_dir, name)) for name in self.fixtures]
+        self.fixture_server = FixtureServer(fixture_dir).start()
+        install_fake_extractor(self.fixture_server, self.fixtures)
+        self.stub = StubOpenAIServer(
+            latency=args.stub_latency, token_latency=args.stub_token_latency, output_tokens=args.stub_output_tokens
+        ).start()
+        # 应用模块在设置好桩服务地址后才导入（见各阶段函数）
+        os.environ["OPENAI_BASE_URL"] = self.stub.base_url
+        self.transcript = "".join(TRANSCRIPT_SENTENCE.format(i) for i in range(args.transcript_sentences))
+
+    def video_url(self) -> str:
+        """每个请求使用不同的 video_id，避免命中摘要缓存或合并为同一任务"""
+        return f"https://www.youtube.com/watch?v=b{uuid.uuid4().hex[:16]}"
+
+    def close(self) -> None:
+        self.fixture_server.stop()
+        self.stub.stop()
+
+
+def bench_download(ctx: Context, concurrency: int, requests: int) -> Dict[str, Any]:
+    from app.services.downloader import download_audio
+
+    output_dir = os.path.join(_tmp.name, "downloads")
+
+    def op(i: int) -> None:
+        path = download_audio(ctx.video_url(), output_path=output_dir)
+        os.remove(path)
+
+    return run_threaded(op, concurrency, requests)
+
+
+def bench_transcribe(ctx: Context, concurrency: int, requests: int) -> Dict[str, Any]:
+    try:
+        from app.services.transcriber import transcribe_audio
+    except ImportError as e:
+        raise StageSkipped(f"whisper not installed ({str(e)})")
+
+    return run_threaded(lambda i: transcribe_audio(ctx.audio[i % len(ctx.audio)], ctx.args.model), concurrency, requests)
+
+
+def bench_summarize(ctx: Context, concurrency: int, requests: int) -> Dict[str, Any]:
+    from app.services.summarizer import summarize_text
+
+    return run_threaded(lambda i: summarize_text(ctx.transcript), concurrency, requests)
+
+
+def bench_api(ctx: Context, concurrency: int, requests: int) -> Dict[str, Any]:
+    if shutil.which("ffmpeg") is None:
+        raise StageSkipped("ffmpeg not found on PATH (needed by decode_audio)")
+    try:
+        import httpx
+        from app.database.base import async_engine
+        from main import app
+    except ImportError as e:
+        raise StageSkipped(f"application dependencies missing ({str(e)})")
+
+    async def run() -> Dict[str, Any]:
+        latencies: List[float] = []
+        errors = 0
+        remaining = iter(range(requests))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=API_JOB_TIMEOUT) as client:
+            username = f"bench{ctx.run_id}"
+            await client.post("/api/users/", json={"email": f"{username}@example.com", "username": username, "password": PASSWORD})
+            token = (await client.post("/api/auth/token", data={"username": username, "password": PASSWORD})).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            async def summarize_one(i: int) -> None:
+                r = await client.post(
+                    "/api/videos/summarize", json={"video_url": ctx.video_url()}, headers=headers
+                )
+                r.raise_for_status()
+                job = r.json()
+                deadline = time.monotonic() + API_JOB_TIMEOUT
+                while job["status"] not in ("completed", "failed"):
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"job {job['id']} did not finish in {API_JOB_TIMEOUT}s")
+                    await asyncio.sleep(0.05)
+                    job = (await client.get(f"/api/videos/jobs/{job['id']}", headers=headers)).json()
+                if job["status"] == "failed":
+                    raise RuntimeError(job["error"])
+
+            async def worker() -> None:
+                nonlocal errors
+                for i in remaining:
+                    start = time.perf_counter()
+                    try:
+                        await summarize_one(i)
+                    except Exception as e:
+                        logging.getLogger(__name__).warning(f"Request {i} failed: {str(e)}")
+                        errors += 1
+                        continue
+                    latencies.append(time.perf_counter() - start)
+
+            with RssSampler() as rss:
+                start = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+                elapsed = time.perf_counter() - start
+        # 异步连接绑定在当前事件循环上，下一轮使用新的事件循环
+        await async_engine.dispose()
+        return summarize_level(concurrency, latencies, errors, elapsed, rss.peak)
+
+    return asyncio.run(run())
+
+
+BENCHMARKS = {
+    "download": bench_download,
+    "transcribe": bench_transcribe,
+    "summarize": bench_summarize,
+    "api": bench_api,
+}
+
+
+def git_commit() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "unknown", "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> float:
+    """
+    打印与旧结果的对比，返回最大的退化百分比
+
+    延迟按 p50/p99 上升计算，吞吐按下降计算。
+    """
+    print(f"\ncompared with {baseline['meta']['commit']} ({baseline['meta']['timestamp']})")
+    print(f"{'stage':<11} {'conc':>4} {'rps':>8} {'p50':>8} {'p99':>8}")
+    worst = 0.0
+    for stage, result in results["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if result["status"] != "ok" or not old or old.get("status") != "ok":
+            continue
+        old_levels = {level["concurrency"]: level for level in old["levels"]}
+        for level in result["levels"]:
+            before = old_levels.get(level["concurrency"])
+            if before is None:
+                continue
+
+            def change(key):
+                return (level[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+
+            rps, p50, p99 = change("throughput_per_s"), change("p50_ms"), change("p99_ms")
+            worst = max(worst, -rps, p50, p99)
+            print(f"{stage:<11} {level['concurrency']:>4} {rps:>+7.1f}% {p50:>+7.1f}% {p99:>+7.1f}%")
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of " + ",".join(STAGES))
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=8, help="requests per concurrency level")
+    parser.add_argument("--model", default="tiny", help="Whisper model size")
+    parser.add_argument("--fixtures", type=int, default=3)
+    parser.add_argument("--fixture-seconds", type=float, default=30.0)
+    parser.add_argument("--tones", action="store_true", help="use tone fixtures even if espeak-ng is installed")
+    parser.add_argument("--transcript-sentences", type=int, default=400, help="length of the summarize-stage transcript")
+    parser.add_argument("--stub-latency", type=float, default=0.3, help="OpenAI stub time to first token (s)")
+    parser.add_argument("--stub-token-latency", type=float, default=0.002, help="OpenAI stub per-token delay (s)")
+    parser.add_argument("--stub-output-tokens", type=int, default=200)
+    parser.add_argument("--output", help="JSON result path (default: benchmarks/results/bench_pipeline-<commit>.json)")
+    parser.add_argument("--compare", help="previous JSON result to compare against")
+    parser.add_argument("--max-regression", type=float, help="exit non-zero if any metric regresses by more than this percent")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    ctx = Context(args)
+    meta = {
+        **git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "fixtures": ctx.fixture_kind,
+        "args": vars(args),
+    }
+    print(f"commit {meta['commit']}{' (dirty)' if meta['dirty'] else ''}, {meta['cpus']} cpus, "
+          f"{len(ctx.fixtures)} x {args.fixture_seconds:.0f}s {ctx.fixture_kind} fixtures, model {args.model}")
+    print(f"{'stage':<11} {'conc':>4} {'reqs':>5} {'rps':>8} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'rss_mb':>8} {'errors':>6}")
+
+    results: Dict[str, Any] = {"meta": meta, "stages": {}}
+    try:
+        for stage in stages:
+            bench = BENCHMARKS[stage]
+            try:
+                # 预热：加载模型、建立连接池，不计入结果
+                bench(ctx, 1, 1)
+                levels = []
+                for concurrency in range(1, args.max_concurrency + 1):
+                    level = bench(ctx, concurrency, max(args.requests, concurrency))
+                    levels.append(level)
+                    print(f"{stage:<11} {level['concurrency']:>4} {level['requests']:>5} {level['throughput_per_s']:>8.2f} "
+                          f"{level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} {level['p99_ms']:>9.1f} "
+                          f"{level['peak_rss_mb']:>8.1f} {level['errors']:>6}")
+                results["stages"][stage] = {"status": "ok", "levels": levels}
+            except StageSkipped as e:
+                print(f"{stage:<11} skipped: {str(e)}")
+                results["stages"][stage] = {"status": "skipped", "reason": str(e)}
+    finally:
+        ctx.close()
+    results["meta"]["openai_stub"] = {
+        "requests": ctx.stub.requests,
+        "prompt_tokens": ctx.stub.prompt_tokens,
+        "completion_tokens": ctx.stub.completion_tokens,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_pipeline-{meta['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            worst = compare(results, json.load(f))
+        if args.max_regression is not None and worst > args.max_regression:
+            print(f"regression of {worst:.1f}% exceeds --max-regression {args.max_regression:.1f}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
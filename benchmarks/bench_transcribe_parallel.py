@@ -0,0 +1,69 @@
+"""
+长音频并行转录基准
+
+合成一段由音调片段和静音交替组成的长音频，按不同进程数运行
+transcribe_long_audio，报告墙钟时间、加速比和实时率。
+首轮会启动进程池并在每个进程中加载模型，不计入计时。
+
+用法:
+    python -m benchmarks.bench_transcribe_parallel [--minutes 20] [--model tiny] [--max-processes 4]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.services.audio import SAMPLE_RATE
+from app.services.transcriber import transcribe_long_audio, shutdown_transcribe_pool
+
+
+def make_long_audio(minutes: float, seed: int = 0) -> np.ndarray:
+    """生成合成长音频：2-8 秒的调幅音调，间隔 0.4-1.5 秒的低噪声静音"""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    parts = []
+    length = 0
+    while length < total:
+        voiced = rng.uniform(2.0, 8.0)
+        t = np.arange(int(voiced * SAMPLE_RATE)) / SAMPLE_RATE
+        freq = rng.uniform(120.0, 300.0)
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3.0 * t)
+        parts.append((0.3 * envelope * np.sin(2 * np.pi * freq * t)).astype(np.float32))
+        silence = int(rng.uniform(0.4, 1.5) * SAMPLE_RATE)
+        parts.append((rng.standard_normal(silence) * 1e-4).astype(np.float32))
+        length += len(parts[-2]) + silence
+    return np.concatenate(parts)[:total]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel transcription benchmark")
+    parser.add_argument("--minutes", type=float, default=20.0)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    audio = make_long_audio(args.minutes)
+    duration = len(audio) / SAMPLE_RATE
+    print(f"audio: {duration:.0f}s synthetic, model: {args.model}, cpus: {os.cpu_count()}")
+    print(f"{'processes':>9} {'wall_s':>8} {'speedup':>8} {'rtf':>7} {'segments':>9}")
+
+    baseline = None
+    processes = 1
+    while processes <= args.max_processes:
+        # 预热：启动进程池并加载模型
+        transcribe_long_audio(audio[:SAMPLE_RATE * 5], args.model, processes)
+        start = time.perf_counter()
+        result = transcribe_long_audio(audio, args.model, processes)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(
+            f"{processes:>9} {elapsed:>8.1f} {baseline / elapsed:>8.2f} "
+            f"{elapsed / duration:>7.3f} {len(result['segments']):>9}"
+        )
+        processes *= 2
+    shutdown_transcribe_pool()
+
+
+if __name__ == "__main__":
+    main()
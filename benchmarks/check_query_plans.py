@@ -0,0 +1,138 @@
+"""
+列表查询执行计划检查
+
+在临时 SQLite 数据库上对摘要、用户和频道视频索引的列表/查找查询执行 EXPLAIN QUERY PLAN，
+任一查询对 video_summaries、users 或 channel_videos 做全表扫描（SCAN 且未使用索引）时以非零状态退出，
+可在 CI 中作为索引回归检查运行。
+
+用法:
+    python -m benchmarks.check_query_plans [--rows 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database.base import Base
+from app.models import User, VideoSummary, Channel, ChannelVideo
+from app.crud.pagination import next_cursor
+from app.crud.summary import (
+    get_summaries,
+    get_user_summaries,
+    get_summary_by_video_id,
+    get_user_summary_by_video_id,
+    get_completed_summary
+)
+from app.crud.user import get_users
+from app.crud.channel import get_latest_channel_videos
+
+CHECKED_TABLES = ("video_summaries", "users", "channel_videos")
+
+
+def seed(session_factory, rows: int) -> None:
+    db = session_factory()
+    try:
+        db.execute(insert(User), [
+            {"email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x"}
+            for i in range(1, 51)
+        ])
+        db.execute(insert(VideoSummary), [
+            {
+                "video_id": f"vid{i:07d}",
+                "video_url": f"https://www.youtube.com/watch?v=vid{i:07d}",
+                "summary": "s",
+                "user_id": i % 50 + 1,
+            }
+            for i in range(rows)
+        ])
+        db.execute(insert(Channel), [
+            {"channel_key": f"@channel{i}", "channel_url": f"https://www.youtube.com/@channel{i}"}
+            for i in range(1, 21)
+        ])
+        db.execute(insert(ChannelVideo), [
+            {"channel_id": i % 20 + 1, "video_id": f"vid{i:07d}", "seq": i}
+            for i in range(rows)
+        ])
+        db.commit()
+        db.execute(text("ANALYZE"))
+    finally:
+        db.close()
+
+
+def capture(engine, fn) -> List[Tuple[str, tuple]]:
+    """执行 fn 并记录其发出的 SELECT 语句和参数"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """返回计划中对受检表的全表扫描步骤"""
+    return [
+        detail for detail in plan
+        if detail.startswith("SCAN")
+        and "USING" not in detail
+        and any(detail.split()[1] == table for table in CHECKED_TABLES)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN-based full scan check for listing queries")
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        seed(session_factory, args.rows)
+
+        db = session_factory()
+        summary_cursor = next_cursor(get_summaries(db, limit=10), 10)
+        user_summary_cursor = next_cursor(get_user_summaries(db, 1, limit=10), 10)
+        user_cursor = next_cursor(get_users(db, limit=10), 10)
+        queries = {
+            "get_summaries": lambda: get_summaries(db, skip=100, limit=20),
+            "get_summaries(cursor)": lambda: get_summaries(db, limit=20, cursor=summary_cursor),
+            "get_user_summaries": lambda: get_user_summaries(db, 1, skip=10, limit=20),
+            "get_user_summaries(cursor)": lambda: get_user_summaries(db, 1, limit=20, cursor=user_summary_cursor),
+            "get_users": lambda: get_users(db, skip=10, limit=20),
+            "get_users(cursor)": lambda: get_users(db, limit=20, cursor=user_cursor),
+            "get_summary_by_video_id": lambda: get_summary_by_video_id(db, "vid0000042"),
+            "get_user_summary_by_video_id": lambda: get_user_summary_by_video_id(db, "vid0000042", 43),
+            "get_completed_summary": lambda: get_completed_summary(db, "vid0000042"),
+            "get_latest_channel_videos": lambda: get_latest_channel_videos(db, 3, limit=20),
+        }
+
+        failures = 0
+        for name, fn in queries.items():
+            for statement, parameters in capture(engine, fn):
+                with engine.connect() as conn:
+                    plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                scans = full_scans(plan)
+                status = "FULL SCAN" if scans else "ok"
+                print(f"{name:<30} {status:<10} {' | '.join(plan)}")
+                failures += bool(scans)
+        db.close()
+        engine.dispose()
+
+    if failures:
+        print(f"{failures} queries fall back to a full table scan")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
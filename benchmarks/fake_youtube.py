@@ -0,0 +1,180 @@
+"""
+离线 YouTube 替身
+
+- make_fixtures: 生成 16 kHz 单声道 WAV 夹具；安装了 espeak-ng 时为合成语音，否则为合成音调
+- FixtureServer: 在本地 HTTP 端口提供夹具文件
+- install_fake_extractor: 替换 yt_dlp.YoutubeDL，把 YouTube 视频链接解析为本地夹具，
+  下载仍然经过 yt-dlp 的格式选择和 HTTP 下载器
+
+同一 video_id 总是对应同一个夹具，不同 video_id 按哈希分配到各个夹具。
+"""
+import os
+import shutil
+import subprocess
+import threading
+import wave
+import zlib
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+import numpy as np
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+from app.services.audio import SAMPLE_RATE
+
+# 合成语音使用的文本，按句循环直到达到目标时长
+SPEECH_TEXT = (
+    "This is a synthetic benchmark recording. "
+    "The pipeline downloads the audio, transcribes it and writes a summary. "
+    "Each sentence is spoken by a text to speech engine so the recognizer has real words to decode. "
+)
+
+
+def make_tone_audio(seconds: float, seed: int = 0) -> np.ndarray:
+    """合成音调夹具：2-8 秒的调幅音调，间隔 0.4-1.5 秒的低噪声静音（同 bench_transcribe_parallel）"""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * SAMPLE_RATE)
+    parts = []
+    length = 0
+    while length < total:
+        t = np.arange(int(rng.uniform(2.0, 8.0) * SAMPLE_RATE)) / SAMPLE_RATE
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3.0 * t)
+        parts.append((0.3 * envelope * np.sin(2 * np.pi * rng.uniform(120.0, 300.0) * t)).astype(np.float32))
+        parts.append((rng.standard_normal(int(rng.uniform(0.4, 1.5) * SAMPLE_RATE)) * 1e-4).astype(np.float32))
+        length += len(parts[-2]) + len(parts[-1])
+    return np.concatenate(parts)[:total]
+
+
+def write_wav(path: str, audio: np.ndarray) -> None:
+    """把 [-1, 1] 的 float32 PCM 写为 16 位 WAV"""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+
+
+def read_wav(path: str) -> np.ndarray:
+    """读取 write_wav 写出的 WAV，返回 float32 PCM"""
+    with wave.open(path, "rb") as f:
+        frames = f.readframes(f.getnframes())
+    return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def _speak(path: str, seconds: float) -> bool:
+    """用 espeak-ng 生成约 seconds 秒的语音；未安装或失败时返回 False"""
+    espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+    if espeak is None:
+        return False
+    # espeak 约每分钟 175 词
+    words = SPEECH_TEXT.split()
+    text = " ".join(words[i % len(words)] for i in range(max(1, int(seconds * 175 / 60))))
+    raw = path + ".raw.wav"
+    try:
+        subprocess.run([espeak, "-w", raw, text], check=True, capture_output=True)
+        with wave.open(raw, "rb") as f:
+            rate, width = f.getframerate(), f.getsampwidth()
+            frames = f.readframes(f.getnframes())
+    except (OSError, subprocess.CalledProcessError, wave.Error):
+        return False
+    finally:
+        if os.path.exists(raw):
+            os.remove(raw)
+    if width != 2:
+        return False
+    audio = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    # 线性插值重采样到 16 kHz
+    positions = np.arange(int(len(audio) * SAMPLE_RATE / rate)) * rate / SAMPLE_RATE
+    write_wav(path, np.interp(positions, np.arange(len(audio)), audio).astype(np.float32))
+    return True
+
+
+def make_fixtures(directory: str, count: int = 3, seconds: float = 30.0, speech: bool = True) -> Tuple[List[str], str]:
+    """
+    生成 count 个约 seconds 秒的 WAV 夹具
+
+    Returns:
+        (夹具文件名列表（相对 directory）, 夹具类型 speech/tone/mixed)
+    """
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    kinds = set()
+    for i in range(count):
+        name = f"fixture_{i}.wav"
+        path = os.path.join(directory, name)
+        if speech and _speak(path, seconds):
+            kinds.add("speech")
+        else:
+            write_wav(path, make_tone_audio(seconds, seed=i))
+            kinds.add("tone")
+        names.append(name)
+    return names, kinds.pop() if len(kinds) == 1 else "mixed"
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """在 127.0.0.1 的随机端口上提供夹具目录"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=directory))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def install_fake_extractor(server: FixtureServer, fixtures: List[str]) -> None:
+    """
+    替换 yt_dlp.YoutubeDL：只注册本地夹具提取器，并去掉读取浏览器 cookies 的选项
+
+    app.services.downloader 通过 yt_dlp.YoutubeDL 创建下载器，因此无需修改应用代码。
+    """
+    if getattr(yt_dlp.YoutubeDL, "_fake_youtube", False):
+        return
+    real_youtube_dl = yt_dlp.YoutubeDL
+
+    class FakeYoutubeIE(InfoExtractor):
+        IE_NAME = "fakeyoutube"
+        _VALID_URL = r'https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/)(?P<id>[0-9A-Za-z_-]+)'
+
+        def _real_extract(self, url):
+            video_id = self._match_id(url)
+            name = fixtures[zlib.crc32(video_id.encode()) % len(fixtures)]
+            return {
+                "id": video_id,
+                "title": f"Benchmark fixture {name}",
+                "url": f"{server.base_url}/{name}",
+                "ext": "wav",
+                "vcodec": "none",
+                "acodec": "pcm_s16le",
+            }
+
+    class FakeYoutubeDL(real_youtube_dl):
+        _fake_youtube = True
+
+        def __init__(self, params=None, auto_init=True):
+            params = dict(params or {})
+            params.pop("cookiesfrombrowser", None)
+            params.setdefault("noprogress", True)
+            super().__init__(params, auto_init=False)
+            self.add_info_extractor(FakeYoutubeIE())
+
+    yt_dlp.YoutubeDL = FakeYoutubeDL
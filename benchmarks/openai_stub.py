@@ -0,0 +1,168 @@
+"""
+本地 OpenAI 兼容桩服务
+
+实现 POST /v1/chat/completions，包括 stream=True 的 SSE 输出和 stream_options.include_usage。
+返回的摘要长度由 --output-tokens 和请求的 max_tokens 决定，并按配置模拟首 token 延迟
+和逐 token 生成延迟；usage 按输入字符数估算（约 2 字符 / token）。
+
+用法:
+    python -m benchmarks.openai_stub [--port 8080] [--latency 0.3] [--token-latency 0.002]
+    OPENAI_BASE_URL=http://127.0.0.1:8080/v1 OPENAI_API_KEY=stub uvicorn main:app
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# 每个"token"输出的文本
+TOKEN_TEXT = "摘要"
+
+
+class StubOpenAIServer:
+    """
+    在 127.0.0.1 上运行的聊天补全桩服务
+
+    Args:
+        port: 端口，0 表示随机端口
+        latency: 每次请求返回第一个 token 之前的延迟（秒）
+        token_latency: 每个输出 token 的生成延迟（秒）
+        output_tokens: 每次回复的 token 数（不超过请求的 max_tokens）
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.3, token_latency: float = 0.002, output_tokens: int = 200):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.output_tokens = output_tokens
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "StubOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        """在当前线程中运行，直到 Ctrl+C"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def _record(self, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": {"message": "invalid JSON", "type": "invalid_request_error"}})
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+
+                model = request.get("model", "stub")
+                prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+                prompt_tokens = max(1, prompt_chars // 2)
+                completion_tokens = max(1, min(stub.output_tokens, request.get("max_tokens") or stub.output_tokens))
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                }
+                stub._record(prompt_tokens, completion_tokens)
+                time.sleep(stub.latency)
+
+                if not request.get("stream"):
+                    time.sleep(stub.token_latency * completion_tokens)
+                    self._send_json(200, {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": TOKEN_TEXT * completion_tokens},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": usage,
+                    })
+                    return
+
+                # 流式响应以关闭连接结束
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def send(chunk: dict) -> None:
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+                for i in range(completion_tokens):
+                    send({**base, "choices": [{"index": 0, "delta": {"content": TOKEN_TEXT}, "finish_reason": None}]})
+                    time.sleep(stub.token_latency)
+                send({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    send({**base, "choices": [], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions stub")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.002)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    args = parser.parse_args()
+
+    server = StubOpenAIServer(args.port, args.latency, args.token_latency, args.output_tokens)
+    print(f"OpenAI stub listening on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
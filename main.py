@@ -1,8 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from app.api import router as api_router
 from fastapi.middleware.cors import CORSMiddleware
-from app.database.base import engine
+from app.database.base import engine, async_engine
 from app.models import User, VideoSummary  # 导入所有模型，以便创建表
+from app.services.model_registry import model_registry
+from app.services.transcriber import DEFAULT_MODEL_SIZE, shutdown_transcribe_pool
+from app.services.job_queue import job_queue
+from app.services.openai_client import init_clients, close_clients
+from app.auth.security import shutdown_password_pool
+from app.services.channel_cache import channel_search_cache
+from app.services.audio_cache import audio_cache
+from app.services.tracing import pipeline_metrics
 import os
 from dotenv import load_dotenv
 import logging
@@ -40,8 +48,53 @@ app.add_middleware(
 # 包含API路由
 app.include_router(api_router)
 
+# 启动时预加载配置的Whisper模型，避免首个请求承担加载开销
+@app.on_event("startup")
+def preload_whisper_model():
+    if os.getenv("WHISPER_PRELOAD", "true").lower() != "true":
+        return
+    try:
+        model_registry.preload(DEFAULT_MODEL_SIZE)
+        logger.info(f"Preloaded Whisper model: {DEFAULT_MODEL_SIZE}")
+    except Exception as e:
+        logger.error(f"Failed to preload Whisper model: {str(e)}")
+
+# 启动时创建共享的OpenAI客户端
+@app.on_event("startup")
+def start_openai_clients():
+    init_clients()
+
+# 启动后台任务队列，恢复重启前未完成的摘要任务
+@app.on_event("startup")
+def start_job_queue():
+    job_queue.start()
+
+@app.on_event("shutdown")
+def stop_job_queue():
+    job_queue.shutdown()
+    shutdown_transcribe_pool()
+    shutdown_password_pool()
+    channel_search_cache.shutdown()
+    audio_cache.close()
+
+# 关闭处理按注册顺序执行：任务队列停止、进行中的摘要调用结束之后再释放OpenAI连接池
+@app.on_event("shutdown")
+def stop_openai_clients():
+    close_clients()
+
+# 关闭时释放异步数据库连接池
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+
 # 定义根路由
 @app.get("/")
 def read_root():
     logger.debug("访问根路径")
     return {"message": "YouTube Summary API is running"}
+
+# Prometheus 抓取端点：流水线各阶段耗时、转录实时率、token 用量和任务结果计数
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    content, content_type = pipeline_metrics.render()
+    return Response(content=content, media_type=content_type)
@@ -0,0 +1,25 @@
+"""Add user token version
+
+Revision ID: 0a6c93d5e8b1
+Revises: e71f08b3a4c2
+Create Date: 2026-10-16 19:48:13.275604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6c93d5e8b1'
+down_revision = 'e71f08b3a4c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,56 @@
+"""Add channel video index
+
+Revision ID: 3f8a2c61d9b7
+Revises: 0a6c93d5e8b1
+Create Date: 2026-10-16 21:12:40.518327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8a2c61d9b7'
+down_revision = '0a6c93d5e8b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('channels',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('channel_key', sa.String(), nullable=False),
+    sa.Column('channel_url', sa.String(), nullable=False),
+    sa.Column('fully_indexed', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('channel_key')
+    )
+    op.create_index(op.f('ix_channels_id'), 'channels', ['id'], unique=False)
+    op.create_table('channel_videos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('channel_id', sa.Integer(), nullable=False),
+    sa.Column('video_id', sa.String(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('upload_date', sa.String(), nullable=True),
+    sa.Column('duration', sa.Integer(), nullable=True),
+    sa.Column('view_count', sa.Integer(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['channel_id'], ['channels.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_channel_videos_channel_id_seq', 'channel_videos', ['channel_id', 'seq'], unique=False)
+    op.create_index(op.f('ix_channel_videos_id'), 'channel_videos', ['id'], unique=False)
+    op.create_index('uq_channel_videos_channel_id_video_id', 'channel_videos', ['channel_id', 'video_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_channel_videos_channel_id_video_id', table_name='channel_videos')
+    op.drop_index(op.f('ix_channel_videos_id'), table_name='channel_videos')
+    op.drop_index('ix_channel_videos_channel_id_seq', table_name='channel_videos')
+    op.drop_table('channel_videos')
+    op.drop_index(op.f('ix_channels_id'), table_name='channels')
+    op.drop_table('channels')
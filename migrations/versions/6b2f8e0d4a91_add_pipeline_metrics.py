@@ -0,0 +1,28 @@
+"""Add pipeline metrics
+
+Revision ID: 6b2f8e0d4a91
+Revises: 9d4e1b7a5c20
+Create Date: 2026-10-16 23:12:40.518362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b2f8e0d4a91'
+down_revision = '9d4e1b7a5c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('summary_jobs', sa.Column('metrics', sa.JSON(), nullable=True))
+    op.add_column('video_summaries', sa.Column('metrics', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('video_summaries') as batch_op:
+        batch_op.drop_column('metrics')
+    with op.batch_alter_table('summary_jobs') as batch_op:
+        batch_op.drop_column('metrics')
@@ -0,0 +1,39 @@
+"""Add transcript segments
+
+Revision ID: 8b3e6d41c0a7
+Revises: 5f1c2a9d7e34
+Create Date: 2026-10-16 14:37:52.104861
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3e6d41c0a7'
+down_revision = '5f1c2a9d7e34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('transcript_segments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('summary_id', sa.Integer(), nullable=False),
+    sa.Column('segment_count', sa.Integer(), nullable=False),
+    sa.Column('duration_ms', sa.Integer(), nullable=False),
+    sa.Column('timeline', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['summary_id'], ['video_summaries.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('summary_id')
+    )
+    op.create_index(op.f('ix_transcript_segments_id'), 'transcript_segments', ['id'], unique=False)
+    op.add_column('summary_jobs', sa.Column('segments', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('summary_jobs') as batch_op:
+        batch_op.drop_column('segments')
+    op.drop_index(op.f('ix_transcript_segments_id'), table_name='transcript_segments')
+    op.drop_table('transcript_segments')
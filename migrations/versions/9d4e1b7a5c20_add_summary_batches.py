@@ -0,0 +1,42 @@
+"""Add summary batches
+
+Revision ID: 9d4e1b7a5c20
+Revises: 3f8a2c61d9b7
+Create Date: 2026-10-16 22:31:06.847215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4e1b7a5c20'
+down_revision = '3f8a2c61d9b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('summary_batches',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('channel_name', sa.String(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_summary_batches_id'), 'summary_batches', ['id'], unique=False)
+    with op.batch_alter_table('summary_jobs') as batch_op:
+        batch_op.add_column(sa.Column('batch_id', sa.String(length=32), nullable=True))
+        batch_op.create_index(batch_op.f('ix_summary_jobs_batch_id'), ['batch_id'], unique=False)
+        batch_op.create_foreign_key('fk_summary_jobs_batch_id_summary_batches', 'summary_batches', ['batch_id'], ['id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('summary_jobs') as batch_op:
+        batch_op.drop_constraint('fk_summary_jobs_batch_id_summary_batches', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_summary_jobs_batch_id'))
+        batch_op.drop_column('batch_id')
+    op.drop_index(op.f('ix_summary_batches_id'), table_name='summary_batches')
+    op.drop_table('summary_batches')
@@ -0,0 +1,43 @@
+"""Add summary source reference
+
+Revision ID: a3e5c8f1b2d6
+Revises: 6b2f8e0d4a91
+Create Date: 2026-10-17 10:04:51.203617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e5c8f1b2d6'
+down_revision = '6b2f8e0d4a91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('video_summaries') as batch_op:
+        batch_op.add_column(sa.Column('source_summary_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_video_summaries_source_summary_id'), ['source_summary_id'], unique=False)
+        batch_op.create_foreign_key('fk_video_summaries_source_summary_id_video_summaries', 'video_summaries', ['source_summary_id'], ['id'])
+
+
+def downgrade() -> None:
+    # 引用源记录的行在删除引用列之前补回转录和分段时间轴
+    op.execute(
+        "UPDATE video_summaries SET transcript = ("
+        "SELECT source.transcript FROM video_summaries AS source "
+        "WHERE source.id = video_summaries.source_summary_id"
+        ") WHERE source_summary_id IS NOT NULL"
+    )
+    op.execute(
+        "INSERT INTO transcript_segments (summary_id, segment_count, duration_ms, timeline, created_at) "
+        "SELECT summary.id, segments.segment_count, segments.duration_ms, segments.timeline, segments.created_at "
+        "FROM video_summaries AS summary "
+        "JOIN transcript_segments AS segments ON segments.summary_id = summary.source_summary_id"
+    )
+    with op.batch_alter_table('video_summaries') as batch_op:
+        batch_op.drop_constraint('fk_video_summaries_source_summary_id_video_summaries', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_video_summaries_source_summary_id'))
+        batch_op.drop_column('source_summary_id')
@@ -0,0 +1,28 @@
+"""Add keyset pagination indexes
+
+Revision ID: c4d9a7e2f615
+Revises: 8b3e6d41c0a7
+Create Date: 2026-10-16 16:05:27.381946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d9a7e2f615'
+down_revision = '8b3e6d41c0a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_video_summaries_created_at_id', 'video_summaries', ['created_at', 'id'], unique=False)
+    op.create_index('ix_video_summaries_user_id_created_at_id', 'video_summaries', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_video_summaries_user_id_created_at_id', table_name='video_summaries')
+    op.drop_index('ix_video_summaries_created_at_id', table_name='video_summaries')
+    op.drop_index('ix_users_created_at_id', table_name='users')
@@ -0,0 +1,48 @@
+"""Unique video summary per user
+
+Revision ID: e71f08b3a4c2
+Revises: c4d9a7e2f615
+Create Date: 2026-10-16 17:22:41.690215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e71f08b3a4c2'
+down_revision = 'c4d9a7e2f615'
+branch_labels = None
+depends_on = None
+
+
+def _deduplicate_summaries() -> None:
+    """每个 (video_id, user_id) 只保留一条记录：优先已完成的，其次最新的"""
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT id, video_id, user_id FROM video_summaries "
+        "WHERE user_id IS NOT NULL "
+        "ORDER BY video_id, user_id, "
+        "CASE WHEN summary IS NULL THEN 1 ELSE 0 END, created_at DESC, id DESC"
+    )).fetchall()
+
+    kept = {}
+    for row_id, video_id, user_id in rows:
+        keep_id = kept.setdefault((video_id, user_id), row_id)
+        if keep_id == row_id:
+            continue
+        conn.execute(
+            sa.text("UPDATE summary_jobs SET summary_id = :keep_id WHERE summary_id = :row_id"),
+            {"keep_id": keep_id, "row_id": row_id}
+        )
+        conn.execute(sa.text("DELETE FROM transcript_segments WHERE summary_id = :row_id"), {"row_id": row_id})
+        conn.execute(sa.text("DELETE FROM video_summaries WHERE id = :row_id"), {"row_id": row_id})
+
+
+def upgrade() -> None:
+    _deduplicate_summaries()
+    op.create_index('uq_video_summaries_video_id_user_id', 'video_summaries', ['video_id', 'user_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_video_summaries_video_id_user_id', table_name='video_summaries')